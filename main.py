@@ -13,7 +13,6 @@ Date: 2025-12-27
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-from PIL import Image, ImageTk
 import os
 import pandas as pd
 import threading
@@ -21,19 +20,30 @@ import threading
 # Import các module xử lý dữ liệu
 import src.data_loader as loader
 import src.data_cleaner as cleaner
-import src.visualizer as vis
-import src.visualizer_advanced as vis_adv
-import src.statistics as stats
 from src.config import (
     VIETNAM_CITIES, DEFAULT_CITY_VIET, 
-    get_chart_path, get_processed_data_path
+    get_processed_data_path, get_chart_path
 )
 from src.constants import WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_TITLE
 from src.logger import get_logger
+from src.storage import (
+    processed_data_exists, processed_data_version, load_processed_data, resolve_data_path
+)
+from src.image_cache import ImageCache
+from src.multi_city_analyzer import OverviewModel
+from src.pipeline import (
+    start_refresh_all, STAGE_LABELS, STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED
+)
 
 # Logger cho ứng dụng GUI
 logger = get_logger('WeatherApp.GUI')
 
+# Module vẽ biểu đồ (matplotlib, seaborn) và PIL được import khi dùng lần đầu,
+# không phải lúc khởi động: cửa sổ hiện ra ngay kể cả khi chỉ xem thống kê.
+
+# Các loại biểu đồ có nút hiển thị trong GUI (nạp sẵn vào bộ nhớ sau khi cập nhật)
+DISPLAY_CHART_TYPES = ('main', 'histogram', 'wind', 'pressure', 'visibility', 'clouds')
+
 
 class WeatherApp:
     """
@@ -75,6 +85,15 @@ class WeatherApp:
         # Thành phố hiện tại
         self.current_city = DEFAULT_CITY_VIET
         
+        # Ảnh biểu đồ sẵn sàng hiển thị, key (thành phố, loại biểu đồ, phiên bản dữ liệu)
+        self.chart_images = ImageCache()
+        # Key ảnh mỗi label đang chờ hiển thị và các key đang được nạp ở thread nền
+        self.chart_requests = {}
+        self.chart_loading = set()
+        
+        # Bảng tổng quan các thành phố (cache theo phiên bản file dữ liệu)
+        self.overview_model = OverviewModel()
+        
         # Tạo giao diện
         self.create_ui()
     
@@ -140,6 +159,42 @@ class WeatherApp:
         )
         self.btn_update.pack(side="left", padx=5)
         
+        # Nút cập nhật tất cả thành phố và nút hủy
+        self.btn_update_all = tk.Button(
+            control_frame,
+            text="🌏 Cập Nhật Tất Cả",
+            font=("Arial", 11, "bold"),
+            bg=self.colors['primary'],
+            fg="white",
+            command=self.update_all_cities,
+            padx=20,
+            pady=8,
+            cursor="hand2",
+            relief="flat",
+            bd=0
+        )
+        self.btn_update_all.pack(side="left", padx=5)
+        
+        self.btn_cancel = tk.Button(
+            control_frame,
+            text="⛔ Hủy",
+            font=("Arial", 11, "bold"),
+            bg=self.colors['danger'],
+            fg="white",
+            command=self.cancel_update_all,
+            padx=15,
+            pady=8,
+            cursor="hand2",
+            relief="flat",
+            bd=0,
+            state="disabled"
+        )
+        self.btn_cancel.pack(side="left", padx=5)
+        
+        # Tiến độ cập nhật tất cả thành phố
+        self.refresh_progress = ttk.Progressbar(control_frame, length=180, mode="determinate")
+        self.refresh_progress.pack(side="left", padx=10)
+        
         # Status bar
         self.status_var = tk.StringVar(value="✓ Sẵn sàng")
         status_label = tk.Label(
@@ -412,7 +467,7 @@ class WeatherApp:
     
     def update_data_threaded(self):
         """Cập nhật dữ liệu trong thread riêng để không block GUI."""
-        self.btn_update.config(state="disabled")
+        self.set_update_buttons_state("disabled")
         self.status_var.set("⏳ Đang tải dữ liệu...")
         
         thread = threading.Thread(target=self.update_data)
@@ -431,27 +486,36 @@ class WeatherApp:
             if df_raw is None:
                 self.root.after(0, lambda: self.status_var.set("❌ Lỗi: Không lấy được dữ liệu"))
                 self.root.after(0, lambda: messagebox.showerror("Lỗi", "Không thể lấy dữ liệu từ API"))
-                self.root.after(0, lambda: self.btn_update.config(state="normal"))
+                self.root.after(0, lambda: self.set_update_buttons_state("normal"))
                 return
             
             # Bước 2: Làm sạch dữ liệu
             self.root.after(0, lambda: self.status_var.set("🧹 Đang xử lý dữ liệu..."))
-            df_clean = cleaner.clean_data(city)
+            df_clean = cleaner.clean_data(city, df=df_raw)
             
             if df_clean is None:
                 self.root.after(0, lambda: self.status_var.set("❌ Lỗi xử lý dữ liệu"))
-                self.root.after(0, lambda: self.btn_update.config(state="normal"))
+                self.root.after(0, lambda: self.set_update_buttons_state("normal"))
                 return
             
-            # Bước 3: Vẽ biểu đồ
+            # Bước 3: Vẽ biểu đồ ra file PNG (một lần, song song), rồi nạp các ảnh
+            # vừa vẽ ở kích thước hiển thị vào cache (không vẽ lại lần hai)
             self.root.after(0, lambda: self.status_var.set("📊 Đang vẽ biểu đồ..."))
-            vis.create_all_charts(city)
-            vis_adv.create_all_advanced_charts(city)
+            from src.render_scheduler import render_city_charts, load_chart_image
+            
+            chart_paths = set(render_city_charts(city, df_clean).values())
+            images = {
+                chart_type: load_chart_image(get_chart_path(city, chart_type))
+                for chart_type in DISPLAY_CHART_TYPES
+                if get_chart_path(city, chart_type) in chart_paths
+            }
+            version = processed_data_version(city)
+            self.root.after(0, lambda: self.store_chart_images(city, version, images))
             
             # Thành công
             self.root.after(0, lambda: self.status_var.set(f"✅ Đã cập nhật dữ liệu cho {city}"))
             self.root.after(0, lambda: messagebox.showinfo("Thành công", f"Đã cập nhật dữ liệu cho {city}!"))
-            self.root.after(0, lambda: self.btn_update.config(state="normal"))
+            self.root.after(0, lambda: self.set_update_buttons_state("normal"))
             
             # Tự động hiển thị biểu đồ chính
             self.root.after(100, lambda: self.show_chart("main", self.main_chart_label))
@@ -459,48 +523,222 @@ class WeatherApp:
         except Exception as e:
             self.root.after(0, lambda: self.status_var.set(f"❌ Lỗi: {str(e)[:50]}"))
             self.root.after(0, lambda: messagebox.showerror("Lỗi", f"Lỗi không xác định:\n{str(e)}"))
-            self.root.after(0, lambda: self.btn_update.config(state="normal"))
+            self.root.after(0, lambda: self.set_update_buttons_state("normal"))
     
-    def show_chart(self, chart_type: str, label_widget: tk.Label):
-        """Hiển thị biểu đồ."""
+    def set_update_buttons_state(self, state: str):
+        """Bật/tắt các nút cập nhật (chỉ cho một lần cập nhật chạy tại một thời điểm)."""
+        self.btn_update.config(state=state)
+        self.btn_update_all.config(state=state)
+    
+    def update_all_cities(self):
+        """
+        Cập nhật dữ liệu và biểu đồ cho tất cả thành phố.
+        
+        Pipeline chạy trên worker pool (src.pipeline); tiến độ từng thành phố được
+        đưa về thread GUI qua root.after, nút Hủy dừng các thành phố chưa xong.
+        """
+        city_list = list(VIETNAM_CITIES.keys())
+        
+        self.refresh_cancel = threading.Event()
+        self.refresh_total = len(city_list)
+        self.refresh_finished = set()
+        
+        self.set_update_buttons_state("disabled")
+        self.btn_cancel.config(state="normal")
+        self.refresh_progress.config(maximum=self.refresh_total, value=0)
+        self.status_var.set(f"⏳ Đang cập nhật {self.refresh_total} thành phố...")
+        
+        future = start_refresh_all(
+            city_list,
+            on_progress=lambda city, stage: self.root.after(0, self.on_refresh_progress, city, stage),
+            cancel_event=self.refresh_cancel
+        )
+        future.add_done_callback(lambda f: self.root.after(0, self.on_refresh_all_done, f))
+    
+    def on_refresh_progress(self, city: str, stage: str):
+        """Cập nhật thanh tiến độ và status bar (chạy trên thread GUI)."""
+        if stage in (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED):
+            self.refresh_finished.add(city)
+            self.refresh_progress.config(value=len(self.refresh_finished))
+        
+        self.status_var.set(
+            f"⏳ {len(self.refresh_finished)}/{self.refresh_total} thành phố | "
+            f"{city}: {STAGE_LABELS.get(stage, stage)}"
+        )
+    
+    def cancel_update_all(self):
+        """Hủy lần cập nhật tất cả thành phố đang chạy."""
+        self.refresh_cancel.set()
+        self.btn_cancel.config(state="disabled")
+        self.status_var.set("⛔ Đang hủy, chờ các thành phố đang chạy dừng...")
+    
+    def on_refresh_all_done(self, future):
+        """Kết thúc cập nhật tất cả thành phố: báo kết quả và làm mới giao diện."""
+        self.set_update_buttons_state("normal")
+        self.btn_cancel.config(state="disabled")
+        
         try:
-            chart_path = get_chart_path(self.current_city, chart_type)
-            
-            if not os.path.exists(chart_path):
-                messagebox.showwarning("Cảnh báo", f"Chưa có biểu đồ {chart_type}. Vui lòng cập nhật dữ liệu trước.")
-                return
-            
-            img = Image.open(chart_path)
-            img = img.resize((1000, 650), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(img)
-            
+            results = future.result()
+        except Exception as e:
+            self.status_var.set(f"❌ Lỗi: {str(e)[:50]}")
+            messagebox.showerror("Lỗi", f"Lỗi khi cập nhật tất cả thành phố:\n{str(e)}")
+            return
+        
+        done = [city for city, result in results.items() if result['status'] == STATUS_DONE]
+        failed = [f"{city}: {result['error']}" for city, result in results.items()
+                  if result['status'] == STATUS_FAILED]
+        cancelled = [city for city, result in results.items() if result['status'] == STATUS_CANCELLED]
+        chart_failures = [
+            f"{city}: {', '.join(name for name, path in result['charts'].items() if path is None)}"
+            for city, result in results.items()
+            if any(path is None for path in result['charts'].values())
+        ]
+        
+        # Ảnh đang cache của các thành phố vừa cập nhật đã cũ
+        for city in results:
+            if results[city]['stage'] is not None:
+                self.chart_images.invalidate(lambda key, city=city: key[0] == city)
+        
+        self.status_var.set(f"✅ Đã cập nhật {len(done)}/{len(results)} thành phố")
+        self.refresh_overview()
+        if self.current_city in done:
+            self.show_chart("main", self.main_chart_label)
+        
+        message = f"Đã cập nhật {len(done)}/{len(results)} thành phố."
+        if failed:
+            message += "\n\nLỗi:\n" + "\n".join(failed)
+        if cancelled:
+            message += f"\n\nĐã hủy: {', '.join(cancelled)}"
+        if chart_failures:
+            message += "\n\nBiểu đồ vẽ lỗi:\n" + "\n".join(chart_failures)
+        if failed or cancelled or chart_failures:
+            messagebox.showwarning("Cập nhật tất cả", message)
+        else:
+            messagebox.showinfo("Thành công", message)
+    
+    def request_chart(self, chart_type: str, label_widget: tk.Label, missing_message: str):
+        """
+        Hiển thị biểu đồ của thành phố hiện tại lên label_widget.
+        
+        Ảnh giữ trong cache LRU theo (thành phố, loại biểu đồ, phiên bản file dữ liệu
+        sạch) được hiển thị ngay. Nếu chưa có, label hiện thông báo đang tải và ảnh
+        được nạp ở thread nền (load_chart_in_background); thread GUI không bao giờ vẽ
+        biểu đồ hay chờ khóa vẽ.
+        
+        Args:
+            chart_type: Loại biểu đồ (phần cuối tên file ảnh)
+            label_widget: Label hiển thị ảnh
+            missing_message: Cảnh báo khi chưa có dữ liệu / không tạo được ảnh
+        """
+        city = self.current_city
+        version = processed_data_version(city)
+        if version is None:
+            messagebox.showwarning("Cảnh báo", missing_message)
+            return
+        
+        key = (city, chart_type, version)
+        self.chart_requests[label_widget] = key
+        photo = self.chart_images.get(key)
+        if photo is not None:
             label_widget.config(image=photo, text="")
             label_widget.image = photo
+            return
+        
+        label_widget.config(image="", text="⏳ Đang tải biểu đồ...")
+        label_widget.image = None
+        if key not in self.chart_loading:
+            self.chart_loading.add(key)
+            thread = threading.Thread(target=self.load_chart_in_background, args=(key, label_widget, missing_message))
+            thread.daemon = True
+            thread.start()
+    
+    def load_chart_in_background(self, key: tuple, label_widget: tk.Label, missing_message: str):
+        """
+        Nạp ảnh biểu đồ ở kích thước hiển thị (chạy ở thread nền).
+        
+        Dùng file PNG đã xuất nếu nó mới hơn file dữ liệu sạch, nếu không thì vẽ
+        thẳng vào bộ nhớ. Kết quả đưa về thread GUI qua root.after.
+        """
+        city, chart_type, version = key
+        img = None
+        try:
+            from src.render_scheduler import load_chart_image, render_chart_image
             
+            chart_path = get_chart_path(city, chart_type)
+            if os.path.exists(chart_path) and os.stat(chart_path).st_mtime_ns >= version[1]:
+                img = load_chart_image(chart_path)
+            if img is None:
+                img = render_chart_image(city, chart_type)
+        except Exception as e:
+            logger.error(f"Lỗi khi nạp biểu đồ {chart_type} cho {city}: {e}")
+        
+        self.root.after(0, self.on_chart_loaded, key, img, label_widget, missing_message)
+    
+    def on_chart_loaded(self, key: tuple, img, label_widget: tk.Label, missing_message: str):
+        """Đưa ảnh vừa nạp vào cache và hiển thị nếu label vẫn đang chờ ảnh đó (thread GUI)."""
+        self.chart_loading.discard(key)
+        photo = self._cache_chart_image(key, img) if img is not None else None
+        
+        if self.chart_requests.get(label_widget) != key:
+            return  # Người dùng đã chọn biểu đồ/thành phố khác trong lúc chờ
+        
+        if photo is None:
+            self.clear_chart(label_widget)
+            messagebox.showwarning("Cảnh báo", missing_message)
+            return
+        
+        label_widget.config(image=photo, text="")
+        label_widget.image = photo
+    
+    def _cache_chart_image(self, key: tuple, img):
+        """Tạo PhotoImage từ ảnh PIL và đưa vào cache (dung lượng RGBA rộng x cao x 4)."""
+        from PIL import ImageTk
+        
+        photo = ImageTk.PhotoImage(img)
+        self.chart_images.put(key, photo, photo.width() * photo.height() * 4)
+        return photo
+    
+    def store_chart_images(self, city: str, version, images: dict):
+        """
+        Thay ảnh biểu đồ của một thành phố bằng ảnh vừa vẽ từ dữ liệu mới.
+        
+        Chạy trên thread GUI (PhotoImage phải tạo ở thread của Tk).
+        
+        Args:
+            city: Tên thành phố
+            version: Phiên bản dữ liệu sạch (processed_data_version) của các ảnh
+            images: {loại biểu đồ: PIL Image hoặc None}
+        """
+        self.chart_images.invalidate(lambda key: key[0] == city)
+        if version is None:
+            return
+        for chart_type, img in images.items():
+            if img is not None:
+                self._cache_chart_image((city, chart_type, version), img)
+    
+    def show_chart(self, chart_type: str, label_widget: tk.Label):
+        """Hiển thị biểu đồ."""
+        try:
+            self.request_chart(
+                chart_type, label_widget,
+                f"Chưa có biểu đồ {chart_type}. Vui lòng cập nhật dữ liệu trước."
+            )
         except Exception as e:
             messagebox.showerror("Lỗi", f"Không thể hiển thị biểu đồ:\n{str(e)}")
     
     def show_advanced_chart(self, chart_type: str):
         """Hiển thị biểu đồ nâng cao."""
         try:
-            chart_path = get_chart_path(self.current_city, chart_type)
-            
-            if not os.path.exists(chart_path):
-                messagebox.showwarning("Cảnh báo", f"Chưa có biểu đồ {chart_type}.\nVui lòng cập nhật dữ liệu trước.")
-                return
-            
-            img = Image.open(chart_path)
-            img = img.resize((1000, 650), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(img)
-            
-            self.advanced_chart_label.config(image=photo, text="")
-            self.advanced_chart_label.image = photo
-            
+            self.request_chart(
+                chart_type, self.advanced_chart_label,
+                f"Chưa có biểu đồ {chart_type}.\nVui lòng cập nhật dữ liệu trước."
+            )
         except Exception as e:
             messagebox.showerror("Lỗi", f"Không thể hiển thị biểu đồ:\n{str(e)}")
     
     def clear_chart(self, label_widget: tk.Label):
         """Xóa biểu đồ hiện tại và quay lại trạng thái ban đầu."""
+        self.chart_requests.pop(label_widget, None)
         label_widget.config(image="", text="💾 Vui lòng chọn biểu đồ để xem")
         label_widget.image = None
     
@@ -512,8 +750,7 @@ class WeatherApp:
             cities_with_data = []
             
             for city in all_cities:
-                processed_path = get_processed_data_path(city)
-                if os.path.exists(processed_path):
+                if processed_data_exists(city):
                     cities_with_data.append(city)
             
             if len(cities_with_data) == 0:
@@ -543,10 +780,10 @@ class WeatherApp:
         text += f"📍 Tổng số thành phố có dữ liệu: {len(city_list)}\n"
         text += f"📅 Thời gian: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
         
-        # Bảng tổng quan theo metric
-        metrics = ['Nhiệt Độ', 'Độ Ẩm', 'Tốc Gió', 'Áp Suất']
+        # Bảng tổng quan theo metric (chỉ đọc lại các thành phố có dữ liệu thay đổi)
+        summary = self.overview_model.refresh(city_list)
         
-        for metric in metrics:
+        for metric in self.overview_model.metrics:
             text += f"\n{'='*80}\n"
             text += f"📊 {metric.upper()}\n"
             text += f"{'='*80}\n"
@@ -554,24 +791,13 @@ class WeatherApp:
             text += "-" * 80 + "\n"
             
             city_stats = []
-            for city in city_list:
-                try:
-                    processed_path = get_processed_data_path(city)
-                    df = pd.read_csv(processed_path)
-                    
-                    if metric in df.columns:
-                        mean_val = df[metric].mean()
-                        max_val = df[metric].max()
-                        min_val = df[metric].min()
-                        
-                        city_stats.append({
-                            'city': city,
-                            'mean': mean_val,
-                            'max': max_val,
-                            'min': min_val
-                        })
-                except:
-                    continue
+            if metric in summary.columns.get_level_values(0):
+                metric_stats = summary[metric]
+                metric_stats = metric_stats[metric_stats['count'] > 0]
+                city_stats = [
+                    {'city': city, 'mean': row['mean'], 'max': row['max'], 'min': row['min']}
+                    for city, row in metric_stats.iterrows()
+                ]
             
             # Sắp xếp theo trung bình (cao đến thấp)
             city_stats.sort(key=lambda x: x['mean'], reverse=True)
@@ -606,7 +832,7 @@ class WeatherApp:
     def refresh_statistics(self):
         """Làm mới thống kê."""
         try:
-            processed_path = get_processed_data_path(self.current_city)
+            processed_path = resolve_data_path(get_processed_data_path, self.current_city)
             
             if not os.path.exists(processed_path):
                 self.stats_text.config(state="normal")
@@ -615,8 +841,7 @@ class WeatherApp:
                 self.stats_text.config(state="disabled")
                 return
             
-            df = pd.read_csv(processed_path)
-            df['Thời Gian'] = pd.to_datetime(df['Thời Gian'])
+            df = load_processed_data(self.current_city)
             
             # Tạo báo cáo thống kê
             stats_report = self.generate_statistics_text(df)
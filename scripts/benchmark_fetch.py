@@ -0,0 +1,157 @@
+# scripts/benchmark_fetch.py
+"""
+Benchmark tải dữ liệu nhiều thành phố (fetch_multiple_cities) với số luồng khác nhau.
+
+Không gọi API thật: một server HTTP cục bộ trả response giả lập sau một độ trễ
+cố định (mặc định 50 ms), data_loader.BASE_URL được trỏ tới server này. File raw
+và cache response được ghi vào thư mục tạm, không đụng tới data/.
+
+Cách chạy (từ thư mục gốc dự án):
+    python scripts/benchmark_fetch.py
+    python scripts/benchmark_fetch.py --cities 10 100 --workers 1 5 20 --delay 0.05
+
+Author: Weather Forecast Pro Team
+Date: 2025-12-27
+"""
+
+import argparse
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+import src.data_loader as loader
+from src.response_cache import ResponseCache
+from src.storage import flush_pending_writes
+
+# Response giả lập: 40 mốc dự báo 3 giờ (5 ngày), giống API forecast
+FAKE_FORECAST = json.dumps({
+    'cod': '200',
+    'city': {'name': 'Benchmark'},
+    'list': [
+        {
+            'dt_txt': f'2025-01-{1 + i // 8:02d} {(i % 8) * 3:02d}:00:00',
+            'main': {'temp': 25 + i % 5, 'feels_like': 26, 'humidity': 70, 'pressure': 1010},
+            'wind': {'speed': 3.5, 'deg': 90},
+            'clouds': {'all': 40},
+            'visibility': 10000,
+            'weather': [{'description': 'mây rải rác'}],
+        }
+        for i in range(40)
+    ],
+}).encode('utf-8')
+
+
+class _StubForecastHandler(BaseHTTPRequestHandler):
+    """Handler trả FAKE_FORECAST cho mọi GET sau server.delay giây"""
+
+    protocol_version = 'HTTP/1.1'
+    # Gửi header và body trong một gói: tránh trễ Nagle + delayed ACK (~40 ms)
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self) -> None:
+        time.sleep(self.server.delay)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(FAKE_FORECAST)))
+        self.end_headers()
+        self.wfile.write(FAKE_FORECAST)
+        self.wfile.flush()
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_stub_server(delay: float) -> ThreadingHTTPServer:
+    """
+    Chạy server HTTP giả lập API forecast trên một cổng trống (luồng nền).
+
+    Args:
+        delay: Độ trễ mỗi response (giây)
+
+    Returns:
+        ThreadingHTTPServer: Server đang chạy (gọi shutdown() khi xong)
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _StubForecastHandler)
+    server.daemon_threads = True
+    server.delay = delay
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_benchmark(city_counts: List[int], worker_counts: List[int], delay: float) -> Dict[int, Dict[int, float]]:
+    """
+    Đo thời gian fetch_multiple_cities cho từng số thành phố và số luồng.
+
+    Args:
+        city_counts: Các số thành phố cần đo (ví dụ [10, 100, 1000])
+        worker_counts: Các giá trị max_workers cần đo (ví dụ [1, 5, 20])
+        delay: Độ trễ mỗi response của server giả lập (giây)
+
+    Returns:
+        Dict[int, Dict[int, float]]: {số thành phố: {max_workers: thời gian (giây)}}
+    """
+    server = start_stub_server(delay)
+    tmp_dir = tempfile.mkdtemp(prefix='weather_bench_')
+    cache = ResponseCache(cache_dir=os.path.join(tmp_dir, 'cache'))
+
+    loader.BASE_URL = f'http://127.0.0.1:{server.server_port}/forecast'
+    loader.HISTORY_STORE_ENABLED = False
+    loader.get_response_cache = lambda: cache
+    loader.get_raw_data_path = lambda city: os.path.join(tmp_dir, f'weather_raw_{city}.csv')
+
+    results = {}
+    try:
+        for count in city_counts:
+            loader.VIETNAM_CITIES = {f'Bench {i}': f'Bench{i}' for i in range(count)}
+            results[count] = {}
+            for workers in worker_counts:
+                started = time.perf_counter()
+                fetched = loader.fetch_multiple_cities(list(loader.VIETNAM_CITIES), max_workers=workers,
+                                                       force_refresh=True)
+                elapsed = time.perf_counter() - started
+                if len(fetched) != count:
+                    raise RuntimeError(f"Chỉ tải được {len(fetched)}/{count} thành phố")
+                results[count][workers] = elapsed
+                print(f"{count:>7} thành phố  workers={workers:<3} {elapsed:8.2f}s", file=sys.stderr)
+    finally:
+        flush_pending_writes()
+        server.shutdown()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark fetch_multiple_cities với server API giả lập")
+    parser.add_argument('--cities', type=int, nargs='+', default=[10, 100, 1000],
+                        help="Các số thành phố cần đo (mặc định: 10 100 1000)")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 5, 20],
+                        help="Các giá trị max_workers cần đo (mặc định: 1 5 20)")
+    parser.add_argument('--delay', type=float, default=0.05,
+                        help="Độ trễ mỗi response của server giả lập, giây (mặc định: 0.05)")
+    args = parser.parse_args()
+
+    # Chỉ giữ log lỗi để kết quả đo dễ đọc
+    logging.disable(logging.WARNING)
+
+    results = run_benchmark(args.cities, args.workers, args.delay)
+
+    print(f"\n{'thành phố':>10}" + ''.join(f"  workers={w:<4}" for w in args.workers))
+    for count, timings in results.items():
+        print(f"{count:>10}" + ''.join(f"  {timings[w]:>10.2f}s" for w in args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,15 @@
+# src/__main__.py
+"""
+Chạy CLI không giao diện: python -m src <lệnh> [tùy chọn] (xem src/cli.py).
+
+Author: Weather Forecast Pro Team
+Date: 2025-12-27
+"""
+
+import sys
+
+from .cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
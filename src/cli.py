@@ -0,0 +1,327 @@
+# src/cli.py
+"""
+Giao diện dòng lệnh (không cần màn hình) cho các lần cập nhật theo lịch.
+
+Cách dùng:
+    python -m src fetch  [--cities "Hà Nội" "Đà Nẵng"] [--workers N] [--force-refresh]
+    python -m src clean  [--cities ...] [--workers N] [--chunk-size N | --incremental]
+    python -m src stats  [--cities ...] [--start "2025-01-01"] [--end "2025-01-02 12:00"]
+    python -m src render [--cities ...] [--workers N]
+    python -m src all    [--cities ...] [--workers N] [--force-refresh]
+    python -m src compact [--cities ...]
+
+Log được ghi ra stderr (và file log); stdout chỉ chứa một dòng JSON tóm tắt
+thời gian từng stage và kết quả từng thành phố, để cron/script đọc được.
+Module chỉ import phần cần cho lệnh được chạy (không import Tkinter;
+matplotlib chỉ được import với lệnh render/all).
+
+Mã thoát:
+    0   Tất cả thành công
+    1   Một phần thất bại (thành phố hoặc biểu đồ lỗi)
+    2   Sai tham số dòng lệnh
+    3   Tất cả thành phố thất bại
+    130 Bị ngắt (Ctrl+C); các thành phố chưa xong được hủy
+
+Author: Weather Forecast Pro Team
+Date: 2025-12-27
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from .config import LOG_STDERR_ENV, VIETNAM_CITIES
+from .logger import get_logger
+from .storage import flush_pending_writes
+
+
+# Logger cho module này
+logger = get_logger(__name__)
+
+# Mã thoát
+EXIT_OK = 0
+EXIT_PARTIAL_FAILURE = 1
+EXIT_USAGE = 2
+EXIT_ALL_FAILED = 3
+EXIT_INTERRUPTED = 130
+
+COMMANDS = ('fetch', 'clean', 'stats', 'render', 'all', 'compact')
+
+
+def _city_result(ok: bool, error: Optional[str] = None, **extra: Any) -> Dict[str, Any]:
+    result: Dict[str, Any] = {'status': 'done' if ok else 'failed', 'error': error}
+    result.update(extra)
+    return result
+
+
+def _run_per_city(
+    city_list: List[str],
+    workers: int,
+    job: Callable[[str], Dict[str, Any]]
+) -> Dict[str, Dict[str, Any]]:
+    """Chạy job(city) cho từng thành phố trên thread pool, lỗi của một thành phố được ghi lại."""
+    def safe_job(city: str) -> Dict[str, Any]:
+        try:
+            return job(city)
+        except Exception as e:
+            logger.error(f"Lỗi khi xử lý {city}: {e}")
+            return _city_result(False, str(e))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(city_list))),
+                            thread_name_prefix='cli') as executor:
+        return dict(zip(city_list, executor.map(safe_job, city_list)))
+
+
+def _command_fetch(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from .data_loader import fetch_multiple_cities
+
+    fetched = fetch_multiple_cities(args.cities, max_workers=args.workers,
+                                    force_refresh=args.force_refresh)
+    return {
+        city: _city_result(True, rows=len(fetched[city])) if city in fetched
+        else _city_result(False, "Không lấy được dữ liệu từ API")
+        for city in args.cities
+    }
+
+
+def _command_clean(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from .data_cleaner import clean_data, clean_data_chunked, clean_data_incremental
+
+    def job(city: str) -> Dict[str, Any]:
+        if args.incremental:
+            rows = clean_data_incremental(city)
+        elif args.chunk_size is not None:
+            rows = clean_data_chunked(city, args.chunk_size)
+        else:
+            df = clean_data(city)
+            rows = None if df is None else len(df)
+        if rows is None:
+            return _city_result(False, "Lỗi xử lý dữ liệu")
+        return _city_result(True, rows=rows)
+
+    return _run_per_city(args.cities, args.workers or 1, job)
+
+
+def _command_stats(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from .column_names import NUMERIC_CLEAN_COLUMNS
+    from .statistics import calculate_statistics
+    from .storage import load_processed_data
+
+    def job(city: str) -> Dict[str, Any]:
+        df = load_processed_data(city, columns=[col.value for col in NUMERIC_CLEAN_COLUMNS],
+                                  start=args.start, end=args.end)
+        return _city_result(True, rows=len(df), statistics=calculate_statistics(df))
+
+    return _run_per_city(args.cities, args.workers or 1, job)
+
+
+def _charts_result(charts: Dict[str, Optional[str]]) -> Dict[str, Any]:
+    failed = [name for name, path in charts.items() if path is None]
+    if charts and len(failed) == len(charts):
+        return _city_result(False, "Không vẽ được biểu đồ nào", chart_failures=failed)
+    return _city_result(True, chart_failures=failed)
+
+
+def _command_render(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from .render_scheduler import render_charts
+
+    results = render_charts(args.cities, max_workers=args.workers)
+    return {city: _charts_result(results[city]) for city in args.cities}
+
+
+def _command_all(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from .pipeline import start_refresh_all, STATUS_DONE
+
+    cancel_event = threading.Event()
+    future = start_refresh_all(args.cities, max_workers=args.workers,
+                               force_refresh=args.force_refresh, cancel_event=cancel_event)
+    try:
+        results = future.result()
+    except KeyboardInterrupt:
+        logger.warning("Đã nhận Ctrl+C, đang hủy các thành phố chưa xong...")
+        cancel_event.set()
+        results = future.result()
+
+    summary = {}
+    for city, result in results.items():
+        if result['status'] == STATUS_DONE:
+            summary[city] = _charts_result(result['charts'])
+        else:
+            summary[city] = {'status': result['status'], 'error': result['error']}
+        summary[city]['timings'] = {stage: round(seconds, 3)
+                                    for stage, seconds in result['timings'].items()}
+    return summary
+
+
+def _command_compact(args: argparse.Namespace) -> Dict[str, Dict[str, Any]]:
+    from .history_store import compact_partition, list_partitions
+
+    def job(city: str) -> Dict[str, Any]:
+        merged = sum(compact_partition(city, month) for month in list_partitions(city))
+        return _city_result(True, parts_merged=merged)
+
+    return _run_per_city(args.cities, args.workers or 1, job)
+
+
+_COMMAND_FUNCS: Dict[str, Callable[[argparse.Namespace], Dict[str, Dict[str, Any]]]] = {
+    'fetch': _command_fetch,
+    'clean': _command_clean,
+    'stats': _command_stats,
+    'render': _command_render,
+    'all': _command_all,
+    'compact': _command_compact,
+}
+
+
+def _stage_summary(command: str, elapsed: float, cities: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Thời gian từng stage: wall time của lệnh, với 'all' thêm tổng/max theo thành phố."""
+    if command != 'all':
+        return {command: {'wall_seconds': round(elapsed, 3)}}
+
+    stages: Dict[str, Any] = {}
+    for result in cities.values():
+        for stage, seconds in result.get('timings', {}).items():
+            entry = stages.setdefault(stage, {'city_seconds_total': 0.0, 'city_seconds_max': 0.0})
+            entry['city_seconds_total'] = round(entry['city_seconds_total'] + seconds, 3)
+            entry['city_seconds_max'] = max(entry['city_seconds_max'], seconds)
+    stages['all'] = {'wall_seconds': round(elapsed, 3)}
+    return stages
+
+
+def _exit_code(cities: Dict[str, Dict[str, Any]], interrupted: bool) -> int:
+    if interrupted:
+        return EXIT_INTERRUPTED
+    failed = [city for city, result in cities.items() if result['status'] != 'done']
+    if cities and len(failed) == len(cities):
+        return EXIT_ALL_FAILED
+    if failed or any(result.get('chart_failures') for result in cities.values()):
+        return EXIT_PARTIAL_FAILURE
+    return EXIT_OK
+
+
+def _json_default(value: Any) -> Any:
+    """Chuyển kiểu NumPy/pandas sang kiểu JSON."""
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def _log_to_stderr() -> None:
+    """
+    Chuyển log console sang stderr để stdout chỉ còn bản tóm tắt JSON.
+
+    Đặt cả biến môi trường LOG_STDERR_ENV để các process con (process vẽ biểu đồ,
+    khởi động bằng spawn và import lại src.logger) cũng ghi log ra stderr.
+    """
+    os.environ[LOG_STDERR_ENV] = "1"
+    for handler in logger.handlers:
+        if isinstance(handler, logging.StreamHandler) and getattr(handler, 'stream', None) is sys.stdout:
+            handler.setStream(sys.stderr)
+
+
+def _parse_time(value: str) -> pd.Timestamp:
+    """Parse thời gian cho --start/--end (báo lỗi tham số nếu sai định dạng)."""
+    try:
+        return pd.Timestamp(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"Thời gian không hợp lệ: {value}") from e
+
+
+def _positive_int(value: str) -> int:
+    """Parse số nguyên dương cho --chunk-size (báo lỗi tham số nếu <= 0)."""
+    try:
+        number = int(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"Không phải số nguyên: {value}") from e
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"Phải là số nguyên dương: {value}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Tạo parser cho các lệnh của CLI."""
+    parser = argparse.ArgumentParser(
+        prog='python -m src',
+        description="Cập nhật dữ liệu thời tiết không cần giao diện (dùng cho cron)"
+    )
+    parser.add_argument('command', choices=COMMANDS,
+                        help="fetch: tải dữ liệu | clean: làm sạch | stats: thống kê | "
+                             "render: vẽ biểu đồ | all: tải → làm sạch → vẽ | "
+                             "compact: gộp file kho lịch sử dự báo")
+    parser.add_argument('--cities', nargs='+', metavar='CITY',
+                        help="Tên thành phố tiếng Việt (mặc định: tất cả)")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Số luồng/process chạy song song (mặc định theo từng lệnh)")
+    parser.add_argument('--force-refresh', action='store_true',
+                        help="Bỏ qua cache response API (fetch/all)")
+    clean_mode = parser.add_mutually_exclusive_group()
+    clean_mode.add_argument('--chunk-size', type=_positive_int, default=None, metavar='N',
+                            help="Làm sạch theo từng khối N dòng, bộ nhớ giới hạn (clean, file thô rất lớn)")
+    clean_mode.add_argument('--incremental', action='store_true',
+                            help="Chỉ làm sạch các dòng mới ghi thêm vào file thô CSV từ lần trước (clean). "
+                                 "Chỉ có lợi với file thô chỉ ghi thêm; fetch ghi lại file thô nên "
+                                 "lần clean sau fetch luôn làm sạch toàn bộ")
+    parser.add_argument('--start', type=_parse_time, default=None,
+                        help="Chỉ thống kê dữ liệu từ thời điểm này (stats)")
+    parser.add_argument('--end', type=_parse_time, default=None,
+                        help="Chỉ thống kê dữ liệu tới thời điểm này (stats)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Chạy CLI.
+
+    Args:
+        argv: Tham số dòng lệnh (None = sys.argv[1:])
+
+    Returns:
+        int: Mã thoát (xem docstring của module)
+    """
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.cities is None:
+        args.cities = list(VIETNAM_CITIES.keys())
+    unknown = [city for city in args.cities if city not in VIETNAM_CITIES]
+    if unknown:
+        parser.error(f"Thành phố không hỗ trợ: {', '.join(unknown)}")
+    if args.workers is not None and args.workers < 1:
+        parser.error("--workers phải >= 1")
+    if args.start is not None and args.end is not None and args.start > args.end:
+        parser.error("--start phải <= --end")
+
+    _log_to_stderr()
+
+    start = time.perf_counter()
+    interrupted = False
+    try:
+        cities = _COMMAND_FUNCS[args.command](args)
+    except KeyboardInterrupt:
+        interrupted = True
+        cities = {}
+    finally:
+        # Chờ các file đang ghi ở luồng nền (raw/processed) trước khi thoát
+        flush_pending_writes()
+    elapsed = time.perf_counter() - start
+
+    if args.command == 'all' and any(r['status'] == 'cancelled' for r in cities.values()):
+        interrupted = True
+
+    exit_code = _exit_code(cities, interrupted)
+    summary = {
+        'command': args.command,
+        'exit_code': exit_code,
+        'stages': _stage_summary(args.command, elapsed, cities),
+        'cities': cities,
+    }
+    print(json.dumps(summary, ensure_ascii=False, default=_json_default))
+    return exit_code
@@ -33,6 +33,7 @@ class RawColumns(str, Enum):
     VISIBILITY = 'visibility'        # Tầm nhìn
     DESCRIPTION = 'description'      # Mô tả thời tiết
     CITY_NAME = 'city_name'          # Tên thành phố
+    ISSUED_AT = 'issued_at'          # Thời điểm phát hành bản dự báo (UTC, chỉ có trong kho lịch sử)
 
 
 class CleanColumns(str, Enum):
@@ -54,6 +55,22 @@ class CleanColumns(str, Enum):
     THANH_PHO = 'Thành Phố'              # Tên thành phố
 
 
+# Schema gọn cho processed data (tùy chọn, bật bằng WEATHER_COMPACT_DTYPES=1).
+# Áp dụng giống nhau trong bộ nhớ và trên đĩa (xem storage.to_compact_dtypes).
+COMPACT_CLEAN_DTYPES: Dict[str, str] = {
+    CleanColumns.NHIET_DO.value: 'float32',
+    CleanColumns.NHIET_DO_CAM_NHAN.value: 'float32',
+    CleanColumns.DO_AM.value: 'int8',        # 0-100 %
+    CleanColumns.AP_SUAT.value: 'int16',     # hPa
+    CleanColumns.TOC_GIO.value: 'float32',
+    CleanColumns.HUONG_GIO.value: 'int16',   # 0-360 độ
+    CleanColumns.MAY.value: 'int8',          # 0-100 %
+    CleanColumns.TAM_NHIN.value: 'float32',
+    CleanColumns.MO_TA.value: 'category',
+    CleanColumns.THANH_PHO.value: 'category',
+}
+
+
 # Mapping từ raw columns sang clean columns
 RAW_TO_CLEAN_MAPPING: Dict[str, str] = {
     RawColumns.DT_TXT.value: CleanColumns.THOI_GIAN.value,
@@ -11,8 +11,11 @@ Author: Weather Forecast Pro Team
 Date: 2025-12-27
 """
 
+import importlib.util
 import os
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from .constants import CSV_EXTENSION, PARQUET_EXTENSION, FEATHER_EXTENSION
 
 # --- 1. CẤU HÌNH API ---
 # ⚠️ QUAN TRỌNG: Thay mã API của bạn vào dòng dưới
@@ -43,16 +46,40 @@ DEFAULT_CITY_EN = VIETNAM_CITIES[DEFAULT_CITY_VIET]
 # Lấy đường dẫn gốc của dự án để tránh lỗi "File not found"
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Định dạng lưu trữ dữ liệu raw/processed: "csv", "parquet" hoặc "feather"
+# (parquet/feather cần cài pyarrow). Có thể ghi đè bằng biến môi trường WEATHER_STORAGE_FORMAT.
+DATA_STORAGE_FORMAT = os.environ.get("WEATHER_STORAGE_FORMAT", "csv")
+
+DATA_FILE_EXTENSIONS = {
+    "csv": CSV_EXTENSION,
+    "parquet": PARQUET_EXTENSION,
+    "feather": FEATHER_EXTENSION,
+}
+
+def get_data_extension(storage_format: Optional[str] = None) -> str:
+    """Lấy phần mở rộng file theo định dạng lưu trữ (mặc định: DATA_STORAGE_FORMAT)"""
+    storage_format = storage_format or DATA_STORAGE_FORMAT
+    if storage_format not in DATA_FILE_EXTENSIONS:
+        raise ValueError(f"Định dạng lưu trữ không hỗ trợ: {storage_format}. Chọn một trong {list(DATA_FILE_EXTENSIONS)}")
+    return DATA_FILE_EXTENSIONS[storage_format]
+
 # Định nghĩa nơi lưu file (theo thành phố)
-def get_raw_data_path(city_name_viet: str = DEFAULT_CITY_VIET) -> str:
+def get_raw_data_path(city_name_viet: str = DEFAULT_CITY_VIET, storage_format: Optional[str] = None) -> str:
     """Lấy đường dẫn file raw data theo thành phố"""
     city_safe = city_name_viet.replace(" ", "_").replace(".", "")
-    return os.path.join(BASE_DIR, "data", "raw", f"weather_raw_{city_safe}.csv")
+    extension = get_data_extension(storage_format)
+    return os.path.join(BASE_DIR, "data", "raw", f"weather_raw_{city_safe}{extension}")
 
-def get_processed_data_path(city_name_viet: str = DEFAULT_CITY_VIET) -> str:
+def get_processed_data_path(city_name_viet: str = DEFAULT_CITY_VIET, storage_format: Optional[str] = None) -> str:
     """Lấy đường dẫn file processed data theo thành phố"""
     city_safe = city_name_viet.replace(" ", "_").replace(".", "")
-    return os.path.join(BASE_DIR, "data", "processed", f"weather_clean_{city_safe}.csv")
+    extension = get_data_extension(storage_format)
+    return os.path.join(BASE_DIR, "data", "processed", f"weather_clean_{city_safe}{extension}")
+
+def get_clean_state_path(city_name_viet: str = DEFAULT_CITY_VIET) -> str:
+    """Lấy đường dẫn file trạng thái làm sạch tăng dần (mốc đã xử lý của file raw) theo thành phố"""
+    city_safe = city_name_viet.replace(" ", "_").replace(".", "")
+    return os.path.join(BASE_DIR, "data", "processed", f"clean_state_{city_safe}.json")
 
 def get_chart_path(city_name_viet: str = DEFAULT_CITY_VIET, chart_type: str = "main") -> str:
     """Lấy đường dẫn file biểu đồ theo thành phố và loại"""
@@ -60,6 +87,42 @@ def get_chart_path(city_name_viet: str = DEFAULT_CITY_VIET, chart_type: str = "m
     filename = f"weather_chart_{city_safe}_{chart_type}.png"
     return os.path.join(BASE_DIR, "assets", filename)
 
+def get_cache_dir() -> str:
+    """Lấy thư mục lưu cache response từ API"""
+    return os.path.join(BASE_DIR, "data", "cache")
+
+# Lưu lịch sử mọi bản dự báo đã tải (Parquet, cần pyarrow). Tắt bằng WEATHER_HISTORY=0;
+# tự tắt khi chưa cài pyarrow (kiểm tra bằng find_spec, không import pyarrow lúc khởi động).
+HISTORY_STORE_ENABLED = (
+    os.environ.get("WEATHER_HISTORY", "1") != "0"
+    and importlib.util.find_spec("pyarrow") is not None
+)
+
+def get_history_dir(city_name_viet: Optional[str] = None) -> str:
+    """Lấy thư mục lịch sử dự báo (của một thành phố nếu truyền city_name_viet)"""
+    history_dir = os.path.join(BASE_DIR, "data", "history")
+    if city_name_viet is None:
+        return history_dir
+    city_safe = city_name_viet.replace(" ", "_").replace(".", "")
+    return os.path.join(history_dir, city_safe)
+
+# Lưu thêm dữ liệu sạch vào cơ sở dữ liệu SQLite (tổng quan/xếp hạng dùng truy vấn SQL).
+# Mặc định tắt, bật bằng biến môi trường WEATHER_DATABASE=1.
+WEATHER_DATABASE_ENABLED = os.environ.get("WEATHER_DATABASE", "0") == "1"
+
+def get_database_path() -> str:
+    """Lấy đường dẫn file cơ sở dữ liệu SQLite"""
+    return os.path.join(BASE_DIR, "data", "weather.db")
+
+# Dùng schema gọn (float32/int8/int16/category, xem column_names.COMPACT_CLEAN_DTYPES)
+# cho dữ liệu sạch. Mặc định tắt, bật bằng biến môi trường WEATHER_COMPACT_DTYPES=1.
+COMPACT_DTYPES_ENABLED = os.environ.get("WEATHER_COMPACT_DTYPES", "0") == "1"
+
+# Ghi log console ra stderr thay vì stdout (CLI bật để stdout chỉ còn bản tóm tắt JSON;
+# biến môi trường được process con kế thừa, ví dụ các process vẽ biểu đồ).
+LOG_STDERR_ENV = "WEATHER_LOG_STDERR"
+LOG_TO_STDERR = os.environ.get(LOG_STDERR_ENV, "0") == "1"
+
 # Đường dẫn mặc định (tương thích với code cũ)
 RAW_DATA_PATH = get_raw_data_path(DEFAULT_CITY_VIET)
 PROCESSED_DATA_PATH = get_processed_data_path(DEFAULT_CITY_VIET)
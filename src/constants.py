@@ -17,6 +17,14 @@ from typing import Tuple
 API_TIMEOUT_SECONDS = 10  # Thời gian chờ API response (giây)
 API_RETRY_ATTEMPTS = 3    # Số lần thử lại khi gọi API thất bại
 API_RETRY_DELAY = 2       # Thời gian chờ giữa các lần retry (giây)
+API_RETRY_MAX_DELAY = 30  # Thời gian chờ tối đa trước một lần retry, kể cả khi server gửi Retry-After lớn hơn (giây)
+API_MAX_CONCURRENT_REQUESTS = 5  # Số request tối đa chạy song song khi lấy nhiều thành phố
+API_POOL_MAXSIZE = 10     # Số kết nối keep-alive tối đa trong connection pool
+API_RETRY_STATUS_CODES = (429, 500, 502, 503, 504)  # Mã HTTP được phép thử lại
+
+# ==================== RESPONSE CACHE ====================
+RESPONSE_CACHE_TTL_SECONDS = 3 * 3600        # Thời gian sống của response cache (dự báo cập nhật 3h/lần)
+RESPONSE_CACHE_MAX_BYTES = 20 * 1024 * 1024  # Dung lượng tối đa của thư mục cache (20 MB)
 
 # ==================== DATA VALIDATION THRESHOLDS ====================
 # Nhiệt độ
@@ -74,6 +82,13 @@ LINE_WIDTH_THIN = 2.0     # Tăng từ 1.5
 GRID_ALPHA = 0.3
 GRID_LINESTYLE = '--'
 
+# Render song song
+CHART_RENDER_MAX_WORKERS = 4  # Số process vẽ biểu đồ tối đa (không vượt quá số CPU)
+
+# Render cache: bỏ qua vẽ lại khi dữ liệu và tham số biểu đồ không đổi
+RENDER_CACHE_VERSION = 1           # Tăng khi sửa code vẽ để làm mất hiệu lực ảnh cũ
+RENDER_CACHE_KEY_EXTENSION = ".key"  # File key đặt cạnh ảnh PNG
+
 # ==================== FONT CONFIGURATION ====================
 FONT_FAMILY = 'Arial'
 FONT_WEIGHT_NORMAL = 'normal'
@@ -92,6 +107,14 @@ WINDOW_WIDTH = 1400
 WINDOW_HEIGHT = 900
 WINDOW_TITLE = "🌤️ Weather Forecast Pro - Dự Báo Thời Tiết v3.0"
 
+# Kích thước ảnh biểu đồ hiển thị trong GUI (pixel, vẽ thẳng đúng cỡ này)
+CHART_DISPLAY_WIDTH = 1000
+CHART_DISPLAY_HEIGHT = 650
+
+# Cache ảnh biểu đồ đã sẵn sàng hiển thị trong GUI (LRU theo dung lượng)
+# Mỗi ảnh 1000x650 RGBA ~2.5 MB → 256 MB đủ cho 10 thành phố x 6 biểu đồ
+CHART_IMAGE_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
 # Padding
 PADDING_SMALL = 5
 PADDING_MEDIUM = 10
@@ -127,6 +150,8 @@ CHART_FILENAME_PREFIX = "weather_chart_"
 
 # Extensions
 CSV_EXTENSION = ".csv"
+PARQUET_EXTENSION = ".parquet"
+FEATHER_EXTENSION = ".feather"
 PNG_EXTENSION = ".png"
 LOG_EXTENSION = ".log"
 
@@ -143,6 +168,21 @@ MISSING_VALUE_THRESHOLD = 0.5  # Nếu > 50% missing thì loại bỏ cột
 INTERPOLATION_METHOD = 'linear'
 INTERPOLATION_LIMIT = 3  # Số missing values liên tiếp tối đa để interpolate
 
+# Bộ nhớ cấp phát thêm tối đa khi làm sạch (bội số của kích thước DataFrame đầu vào),
+# chỉ kiểm tra khi đo bộ nhớ (clean_data(..., measure_memory=True))
+CLEANING_MAX_MEMORY_RATIO = 3.0
+CLEANING_MEMORY_ALLOWANCE_BYTES = 1024 * 1024  # Phần cố định không tỷ lệ với dữ liệu (index, metadata)
+
+# Số dòng mỗi khối khi làm sạch file thô rất lớn theo từng khối (clean_data_chunked)
+CLEANING_CHUNK_ROWS = 100_000
+
+# Làm sạch tăng dần: kích thước khối khi đọc file thô để băm phần đã xử lý
+RAW_CHECKSUM_BLOCK_BYTES = 1024 * 1024
+
+# Làm sạch tăng dần: số byte đầu/cuối phần đã xử lý được băm để phát hiện nhanh
+# file thô bị ghi lại (trước khi băm toàn bộ phần đã xử lý)
+RAW_PROBE_BYTES = 64 * 1024
+
 # Outlier detection
 OUTLIER_STD_THRESHOLD = 3  # Số lần độ lệch chuẩn để coi là outlier
 
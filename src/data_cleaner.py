@@ -3,36 +3,93 @@
 Module xử lý và làm sạch dữ liệu thời tiết.
 
 Chức năng:
-    - Đọc dữ liệu thô từ CSV
+    - Đọc dữ liệu thô (CSV/Parquet/Feather)
     - Kiểm tra và loại bỏ dữ liệu không hợp lệ
     - Chuẩn hóa định dạng và tên cột
     - Làm tròn số liệu
-    - Lưu dữ liệu sạch thành CSV
+    - Lưu dữ liệu sạch (CSV/Parquet/Feather)
+    - Làm sạch file thô rất lớn theo từng khối với bộ nhớ giới hạn (clean_data_chunked)
+    - Làm sạch tăng dần: chỉ xử lý các dòng mới ghi thêm vào file thô (clean_data_incremental)
 
 Author: Weather Forecast Pro Team
 Date: 2025-12-27 (Refactored for code quality)
 """
 
+import functools
+import hashlib
+import io
+import json
+import numpy as np
 import pandas as pd
 import os
-from typing import Optional, List
+import sqlite3
+import tempfile
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, Optional, List, Tuple
 
-from .config import DEFAULT_CITY_VIET, get_raw_data_path, get_processed_data_path
+from .config import (
+    COMPACT_DTYPES_ENABLED, DEFAULT_CITY_VIET, WEATHER_DATABASE_ENABLED,
+    get_raw_data_path, get_processed_data_path, get_clean_state_path
+)
 from .constants import (
     MIN_VALID_TEMPERATURE, MAX_VALID_TEMPERATURE,
     MIN_VALID_HUMIDITY, MAX_VALID_HUMIDITY,
-    MIN_VALID_WIND_SPEED,
-    MISSING_VALUE_THRESHOLD,
-    EMOJI_FILE, EMOJI_CHART
+    MIN_VALID_WIND_SPEED, MAX_VALID_WIND_SPEED,
+    MIN_VALID_PRESSURE, MAX_VALID_PRESSURE,
+    MISSING_VALUE_THRESHOLD, CLEANING_MAX_MEMORY_RATIO, CLEANING_MEMORY_ALLOWANCE_BYTES, CLEANING_CHUNK_ROWS,
+    RAW_CHECKSUM_BLOCK_BYTES, RAW_PROBE_BYTES, CSV_EXTENSION, EMOJI_FILE, EMOJI_CHART
 )
 from .column_names import RawColumns, CleanColumns, rename_to_clean
 from .exceptions import FileOperationError, DataValidationError, DataProcessingError, EmptyDataFrameError
 from .logger import get_logger, log_success, log_error, log_warning, log_info
+from .storage import (
+    FrameChunkWriter, iter_frame_chunks, read_frame, write_frame, write_frame_async,
+    resolve_data_path, processed_data_version, to_compact_dtypes
+)
+from .weather_db import write_city
 
 
 # Logger cho module này
 logger = get_logger(__name__)
 
+# Quy tắc loại bỏ giá trị ngoại lệ: (cột raw, giá trị nhỏ nhất, giá trị lớn nhất, tên hiển thị).
+# Dòng có giá trị ngoài [min, max] bị loại; giá trị thiếu (NaN) được giữ lại.
+RANGE_RULES: List[Tuple[str, float, float, str]] = [
+    (RawColumns.TEMP.value, MIN_VALID_TEMPERATURE, MAX_VALID_TEMPERATURE, 'nhiệt độ'),
+    (RawColumns.HUMIDITY.value, MIN_VALID_HUMIDITY, MAX_VALID_HUMIDITY, 'độ ẩm'),
+    (RawColumns.WIND_SPEED.value, MIN_VALID_WIND_SPEED, MAX_VALID_WIND_SPEED, 'tốc gió'),
+    (RawColumns.PRESSURE.value, MIN_VALID_PRESSURE, MAX_VALID_PRESSURE, 'áp suất'),
+]
+
+# Số chữ số thập phân khi làm tròn (cột không có trong DataFrame được bỏ qua)
+ROUND_DECIMALS: Dict[str, int] = {
+    RawColumns.TEMP.value: 1,
+    RawColumns.FEELS_LIKE.value: 1,
+    RawColumns.HUMIDITY.value: 0,
+    RawColumns.PRESSURE.value: 0,
+    RawColumns.WIND_SPEED.value: 2,
+    RawColumns.WIND_DEG.value: 0,
+    RawColumns.CLOUDS.value: 0,
+    RawColumns.VISIBILITY.value: 2,
+}
+
+# Các cột được ép sang số nguyên sau khi làm tròn
+INTEGER_COLUMNS = [
+    RawColumns.HUMIDITY.value,
+    RawColumns.PRESSURE.value,
+    RawColumns.WIND_DEG.value,
+    RawColumns.CLOUDS.value,
+]
+
+# Cột thiếu được điền bằng thống kê trên toàn bộ dữ liệu: cột raw → 'mean'/'median'.
+# Khi làm sạch theo khối, thống kê được tính trước ở một lượt đọc riêng.
+GLOBAL_FILL_STATISTICS: Dict[str, str] = {
+    RawColumns.PRESSURE.value: 'mean',
+    RawColumns.WIND_DEG.value: 'median',
+    RawColumns.CLOUDS.value: 'median',
+    RawColumns.VISIBILITY.value: 'median',
+}
+
 
 def _validate_file_exists(filepath: str) -> None:
     """
@@ -52,10 +109,10 @@ def _validate_file_exists(filepath: str) -> None:
 
 def _load_raw_data(filepath: str) -> pd.DataFrame:
     """
-    Đọc dữ liệu từ file CSV.
+    Đọc dữ liệu thô từ file (CSV/Parquet/Feather).
     
     Args:
-        filepath: Đường dẫn file CSV
+        filepath: Đường dẫn file dữ liệu thô
         
     Returns:
         pd.DataFrame: DataFrame chứa dữ liệu thô
@@ -65,7 +122,7 @@ def _load_raw_data(filepath: str) -> pd.DataFrame:
     """
     try:
         logger.info(f"Đang đọc file: {filepath}")
-        df = pd.read_csv(filepath, encoding='utf-8-sig')
+        df = read_frame(filepath)
         log_success(f"Đã đọc {len(df)} dòng dữ liệu", logger)
         return df
         
@@ -74,6 +131,9 @@ def _load_raw_data(filepath: str) -> pd.DataFrame:
         log_error(error_msg, logger, exc_info=True)
         raise FileOperationError(error_msg, filepath) from e
         
+    except FileOperationError:
+        raise
+        
     except Exception as e:
         error_msg = f"Lỗi không xác định khi đọc file: {e}"
         log_error(error_msg, logger, exc_info=True)
@@ -109,77 +169,119 @@ def _validate_required_columns(df: pd.DataFrame) -> None:
     log_success("Tất cả các cột bắt buộc đều có sẵn", logger)
 
 
-def _handle_missing_values(df: pd.DataFrame) -> pd.DataFrame:
+def _handle_missing_values(
+    df: pd.DataFrame,
+    fill_statistics: Optional[Dict[str, float]] = None
+) -> pd.DataFrame:
     """
     Xử lý dữ liệu thiếu (missing values).
     
+    Giá trị điền của từng cột được gom vào một dict và điền bằng một lần
+    df.fillna(dict) (không gán lại từng cột).
+    
     Args:
         df: DataFrame cần xử lý
+        fill_statistics: Thống kê GLOBAL_FILL_STATISTICS đã tính trên toàn bộ dữ liệu
+                         (khi làm sạch theo khối). None = tính trên df
         
     Returns:
         pd.DataFrame: DataFrame đã được xử lý missing values
     """
     logger.info("Kiểm tra dữ liệu thiếu...")
-    missing_info = df.isnull().sum()
-    
-    if missing_info.sum() > 0:
-        log_warning("Phát hiện dữ liệu thiếu:", logger)
-        for col, count in missing_info[missing_info > 0].items():
-            logger.warning(f"  - {col}: {count} dòng")
-        
-        # Điền giá trị cho các cột cụ thể
-        if RawColumns.PRESSURE.value in df.columns:
-            df[RawColumns.PRESSURE.value] = df[RawColumns.PRESSURE.value].fillna(
-                df[RawColumns.PRESSURE.value].mean()
-            )
-        
-        if RawColumns.WIND_SPEED.value in df.columns:
-            df[RawColumns.WIND_SPEED.value] = df[RawColumns.WIND_SPEED.value].fillna(0)
-        
-        if RawColumns.DESCRIPTION.value in df.columns:
-            df[RawColumns.DESCRIPTION.value] = df[RawColumns.DESCRIPTION.value].fillna('Không xác định')
-        
-        # Xử lý các cột optional
-        if RawColumns.FEELS_LIKE.value in df.columns:
-            df[RawColumns.FEELS_LIKE.value] = df[RawColumns.FEELS_LIKE.value].fillna(
-                df[RawColumns.TEMP.value]
-            )
-        
-        if RawColumns.WIND_DEG.value in df.columns:
-            df[RawColumns.WIND_DEG.value] = df[RawColumns.WIND_DEG.value].fillna(
-                df[RawColumns.WIND_DEG.value].median()
-            )
-        
-        if RawColumns.CLOUDS.value in df.columns:
-            df[RawColumns.CLOUDS.value] = df[RawColumns.CLOUDS.value].fillna(
-                df[RawColumns.CLOUDS.value].median()
-            )
-        
-        if RawColumns.VISIBILITY.value in df.columns:
-            df[RawColumns.VISIBILITY.value] = df[RawColumns.VISIBILITY.value].fillna(
-                df[RawColumns.VISIBILITY.value].median()
-            )
-        
-        log_success("Đã xử lý dữ liệu thiếu (điền giá trị hợp lý)", logger)
-    else:
+    # Đếm theo từng cột: không tạo mask boolean cho cả DataFrame
+    missing_info = {col: int(df[col].isna().sum()) for col in df.columns}
+    missing_info = {col: count for col, count in missing_info.items() if count > 0}
+    
+    if not missing_info:
         log_success("Không có dữ liệu thiếu", logger)
+        return df
+    
+    log_warning("Phát hiện dữ liệu thiếu:", logger)
+    for col, count in missing_info.items():
+        logger.warning(f"  - {col}: {count} dòng")
+    
+    # Giá trị điền cho các cột cụ thể (chỉ tính cho cột thực sự thiếu)
+    fill_rules = {
+        RawColumns.WIND_SPEED.value: lambda: 0,
+        RawColumns.DESCRIPTION.value: lambda: 'Không xác định',
+        RawColumns.FEELS_LIKE.value: lambda: df[RawColumns.TEMP.value],
+    }
     
+    def global_statistic(col: str) -> float:
+        if fill_statistics is not None:
+            return fill_statistics.get(col, np.nan)
+        return getattr(df[col], GLOBAL_FILL_STATISTICS[col])()
+    
+    fill_rules.update({col: functools.partial(global_statistic, col) for col in GLOBAL_FILL_STATISTICS})
+    fill_values = {col: fill_rules[col]() for col in missing_info if col in fill_rules}
+    if fill_values:
+        df = df.fillna(fill_values)
+    
+    log_success("Đã xử lý dữ liệu thiếu (điền giá trị hợp lý)", logger)
     return df
 
 
-def _remove_duplicates(df: pd.DataFrame) -> pd.DataFrame:
+def _time_keys(df: pd.DataFrame) -> np.ndarray:
+    """Khóa uint64 (hash) của cột thời gian thô, so sánh bằng nhau giống drop_duplicates."""
+    return pd.util.hash_pandas_object(df[RawColumns.DT_TXT.value], index=False).to_numpy()
+
+
+class _SeenKeys:
     """
-    Loại bỏ dữ liệu trùng lặp.
+    Tập các khóa (hash uint64 của cột thời gian) đã gặp ở các khối trước.
+    
+    Khóa được lưu thành vài mảng NumPy đã sắp xếp (8 byte/khóa, không phải
+    object Python); mảng mới được gộp với mảng trước khi kích thước tương đương
+    nên chỉ có O(log n) mảng để tìm nhị phân.
+    """
+    
+    def __init__(self):
+        self._runs: List[np.ndarray] = []
+    
+    def keep_mask(self, keys: np.ndarray) -> np.ndarray:
+        """
+        Đánh dấu các dòng giữ lại (lần xuất hiện đầu tiên) và ghi nhớ khóa của chúng.
+        
+        Args:
+            keys: Khóa của các dòng trong khối, theo thứ tự
+            
+        Returns:
+            np.ndarray: Mask boolean, True = khóa chưa gặp ở khối trước và xuất hiện lần đầu trong khối
+        """
+        keep = np.zeros(len(keys), dtype=bool)
+        keep[np.unique(keys, return_index=True)[1]] = True
+        for run in self._runs:
+            positions = np.minimum(np.searchsorted(run, keys), len(run) - 1)
+            keep &= run[positions] != keys
+        
+        new_keys = np.sort(keys[keep])
+        if len(new_keys):
+            self._runs.append(new_keys)
+        while len(self._runs) > 1 and len(self._runs[-2]) <= 2 * len(self._runs[-1]):
+            last = self._runs.pop()
+            self._runs[-1] = np.sort(np.concatenate([self._runs[-1], last]))
+        return keep
+
+
+def _remove_duplicates(df: pd.DataFrame, seen: Optional[_SeenKeys] = None) -> pd.DataFrame:
+    """
+    Loại bỏ dữ liệu trùng lặp (giữ dòng đầu tiên của mỗi mốc thời gian).
     
     Args:
         df: DataFrame cần xử lý
+        seen: Khóa đã gặp ở các khối trước (khi làm sạch theo khối). None = chỉ xét df
         
     Returns:
         pd.DataFrame: DataFrame đã loại bỏ duplicate
     """
     logger.info("Kiểm tra dữ liệu trùng lặp...")
     dup_before = len(df)
-    df = df.drop_duplicates(subset=[RawColumns.DT_TXT.value], keep='first')
+    if seen is None:
+        df = df.drop_duplicates(subset=[RawColumns.DT_TXT.value], keep='first')
+    else:
+        keep = seen.keep_mask(_time_keys(df))
+        if not keep.all():
+            df = df[keep]
     dup_count = dup_before - len(df)
     
     if dup_count > 0:
@@ -195,7 +297,7 @@ def _convert_datetime_column(df: pd.DataFrame) -> pd.DataFrame:
     Chuyển đổi cột thời gian sang DateTime.
     
     Args:
-        df: DataFrame cần xử lý
+        df: DataFrame cần xử lý (không bị sửa đổi)
         
     Returns:
         pd.DataFrame: DataFrame với cột thời gian đã được chuyển đổi
@@ -205,6 +307,7 @@ def _convert_datetime_column(df: pd.DataFrame) -> pd.DataFrame:
     """
     logger.info("Chuyển đổi cột thời gian...")
     try:
+        df = df.copy(deep=False)
         df[RawColumns.DT_TXT.value] = pd.to_datetime(df[RawColumns.DT_TXT.value])
         log_success("Chuyển đổi thành công sang định dạng DateTime", logger)
         return df
@@ -217,78 +320,62 @@ def _convert_datetime_column(df: pd.DataFrame) -> pd.DataFrame:
 
 def _validate_data_ranges(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Kiểm tra và loại bỏ giá trị ngoại lệ (outliers).
+    Kiểm tra và loại bỏ giá trị ngoại lệ (outliers) theo RANGE_RULES.
+    
+    Tất cả quy tắc được gộp thành một mask NumPy và DataFrame chỉ được lọc
+    (sao chép) một lần. Số dòng vi phạm được đếm riêng cho từng quy tắc
+    (một dòng có thể vi phạm nhiều quy tắc).
     
     Args:
         df: DataFrame cần kiểm tra
         
     Returns:
-        pd.DataFrame: DataFrame đã loại bỏ outliers
+        pd.DataFrame: DataFrame đã loại bỏ outliers (chính df nếu không có outlier)
     """
     logger.info("Kiểm tra giá trị ngoại lệ...")
     
-    initial_len = len(df)
-    
-    # Kiểm tra nhiệt độ
-    temp_col = RawColumns.TEMP.value
-    invalid_temp = df[(df[temp_col] < MIN_VALID_TEMPERATURE) | (df[temp_col] > MAX_VALID_TEMPERATURE)]
-    if len(invalid_temp) > 0:
-        log_warning(f"Tìm thấy {len(invalid_temp)} giá trị nhiệt độ ngoại lệ (loại bỏ)", logger)
-        df = df.drop(invalid_temp.index)
-    
-    # Kiểm tra độ ẩm
-    humidity_col = RawColumns.HUMIDITY.value
-    invalid_humidity = df[(df[humidity_col] < MIN_VALID_HUMIDITY) | (df[humidity_col] > MAX_VALID_HUMIDITY)]
-    if len(invalid_humidity) > 0:
-        log_warning(f"Tìm thấy {len(invalid_humidity)} giá trị độ ẩm ngoại lệ (loại bỏ)", logger)
-        df = df.drop(invalid_humidity.index)
-    
-    # Kiểm tra tốc gió
-    wind_col = RawColumns.WIND_SPEED.value
-    invalid_wind = df[df[wind_col] < MIN_VALID_WIND_SPEED]
-    if len(invalid_wind) > 0:
-        log_warning(f"Tìm thấy {len(invalid_wind)} giá trị tốc gió âm (loại bỏ)", logger)
-        df = df.drop(invalid_wind.index)
-    
-    removed = initial_len - len(df)
+    invalid = np.zeros(len(df), dtype=bool)
+    for column, min_value, max_value, label in RANGE_RULES:
+        if column not in df.columns:
+            continue
+        
+        values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        rule_invalid = (values < min_value) | (values > max_value)
+        rejected = int(np.count_nonzero(rule_invalid))
+        if rejected > 0:
+            log_warning(f"Tìm thấy {rejected} giá trị {label} ngoài [{min_value}, {max_value}] (loại bỏ)", logger)
+            invalid |= rule_invalid
+    
+    removed = int(np.count_nonzero(invalid))
     if removed == 0:
         log_success("Tất cả giá trị đều hợp lệ", logger)
-    else:
-        logger.info(f"Đã loại bỏ tổng {removed} bản ghi ngoại lệ")
+        return df
     
-    return df
+    logger.info(f"Đã loại bỏ tổng {removed} bản ghi ngoại lệ")
+    return df[~invalid]
 
 
 def _round_numeric_values(df: pd.DataFrame) -> pd.DataFrame:
     """
     Làm tròn các giá trị số.
     
+    Số chữ số thập phân và kiểu số nguyên lấy từ ROUND_DECIMALS/INTEGER_COLUMNS.
+    Mỗi cột được thay trong một bản sao nông: df.round(dict) sẽ nối lại mọi cột
+    (kể cả cột văn bản) nên tốn bộ nhớ gấp nhiều lần.
+    
     Args:
-        df: DataFrame cần xử lý
+        df: DataFrame cần xử lý (không bị sửa đổi)
         
     Returns:
         pd.DataFrame: DataFrame với các giá trị đã được làm tròn
     """
     logger.info("Làm tròn số liệu...")
     
-    # Làm tròn các cột bắt buộc
-    df[RawColumns.TEMP.value] = df[RawColumns.TEMP.value].round(1)
-    df[RawColumns.HUMIDITY.value] = df[RawColumns.HUMIDITY.value].round(0).astype(int)
-    df[RawColumns.PRESSURE.value] = df[RawColumns.PRESSURE.value].round(0).astype(int)
-    df[RawColumns.WIND_SPEED.value] = df[RawColumns.WIND_SPEED.value].round(2)
-    
-    # Làm tròn các cột optional nếu có
-    if RawColumns.FEELS_LIKE.value in df.columns:
-        df[RawColumns.FEELS_LIKE.value] = df[RawColumns.FEELS_LIKE.value].round(1)
-    
-    if RawColumns.WIND_DEG.value in df.columns:
-        df[RawColumns.WIND_DEG.value] = df[RawColumns.WIND_DEG.value].round(0).astype(int)
-    
-    if RawColumns.CLOUDS.value in df.columns:
-        df[RawColumns.CLOUDS.value] = df[RawColumns.CLOUDS.value].round(0).astype(int)
-    
-    if RawColumns.VISIBILITY.value in df.columns:
-        df[RawColumns.VISIBILITY.value] = df[RawColumns.VISIBILITY.value].round(2)
+    df = df.copy(deep=False)
+    for col, places in ROUND_DECIMALS.items():
+        if col in df.columns:
+            rounded = df[col].round(places)
+            df[col] = rounded.astype(int) if col in INTEGER_COLUMNS else rounded.astype(float)
     
     log_success("Làm tròn hoàn tất", logger)
     return df
@@ -314,13 +401,113 @@ def _rename_columns_vietnamese(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
-def _save_processed_data(df: pd.DataFrame, filepath: str) -> None:
+def _apply_compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
     """
-    Lưu DataFrame đã xử lý thành file CSV.
+    Ép sang schema gọn COMPACT_CLEAN_DTYPES (chỉ khi COMPACT_DTYPES_ENABLED).
+    
+    Args:
+        df: DataFrame đã đổi tên cột tiếng Việt
+        
+    Returns:
+        pd.DataFrame: DataFrame với kiểu dữ liệu gọn (hoặc chính df nếu tắt)
+    """
+    if not COMPACT_DTYPES_ENABLED:
+        return df
+    
+    logger.info("Chuyển sang kiểu dữ liệu gọn...")
+    return to_compact_dtypes(df)
+
+
+# Các bước làm sạch DataFrame thô, theo thứ tự. Không bước nào sửa DataFrame
+# đầu vào tại chỗ (mỗi bước trả về DataFrame mới hoặc chính DataFrame nếu không đổi).
+CLEANING_STEPS: List[Tuple[str, Callable[[pd.DataFrame], pd.DataFrame]]] = [
+    ('missing', _handle_missing_values),
+    ('duplicates', _remove_duplicates),
+    ('datetime', _convert_datetime_column),
+    ('ranges', _validate_data_ranges),
+    ('round', _round_numeric_values),
+    ('rename', _rename_columns_vietnamese),
+    ('compact', _apply_compact_dtypes),
+]
+
+
+def run_cleaning_steps(
+    df: pd.DataFrame,
+    measure_memory: bool = False,
+    steps: Optional[List[Tuple[str, Callable[[pd.DataFrame], pd.DataFrame]]]] = None
+) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+    """
+    Chạy CLEANING_STEPS trên DataFrame thô.
+    
+    Khi measure_memory=True, bộ nhớ cấp phát thêm của từng bước được đo bằng
+    tracemalloc (chậm hơn, chỉ dùng khi kiểm tra) và cảnh báo nếu đỉnh vượt
+    CLEANING_MAX_MEMORY_RATIO lần kích thước đầu vào (cộng CLEANING_MEMORY_ALLOWANCE_BYTES).
+    
+    Args:
+        df: DataFrame thô (đã qua _validate_required_columns), không bị sửa đổi
+        measure_memory: True để đo bộ nhớ
+        steps: Danh sách bước thay cho CLEANING_STEPS (cùng tên bước)
+        
+    Returns:
+        Tuple[pd.DataFrame, Dict[str, Any]]: (DataFrame đã làm sạch, báo cáo bộ nhớ).
+            Báo cáo rỗng nếu không đo; nếu đo: {'input_bytes', 'peak_bytes',
+            'peak_ratio', 'within_limit', 'steps': {tên bước: đỉnh bộ nhớ (byte)}}
+    """
+    if steps is None:
+        steps = CLEANING_STEPS
+    
+    if not measure_memory:
+        for _, step in steps:
+            df = step(df)
+        return df, {}
+    
+    input_bytes = int(df.memory_usage(deep=True).sum())
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        step_peaks = {}
+        for name, step in steps:
+            tracemalloc.reset_peak()
+            df = step(df)
+            step_peaks[name] = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        if started:
+            tracemalloc.stop()
+    
+    peak_bytes = max(step_peaks.values())
+    limit_bytes = CLEANING_MAX_MEMORY_RATIO * input_bytes + CLEANING_MEMORY_ALLOWANCE_BYTES
+    report = {
+        'input_bytes': input_bytes,
+        'peak_bytes': peak_bytes,
+        'peak_ratio': peak_bytes / input_bytes if input_bytes else 0.0,
+        'within_limit': peak_bytes <= limit_bytes,
+        'steps': step_peaks,
+    }
+    
+    message = (f"Bộ nhớ làm sạch: đỉnh {peak_bytes / 1024:.1f} KB "
+               f"= {report['peak_ratio']:.2f} lần đầu vào ({input_bytes / 1024:.1f} KB)")
+    if not report['within_limit']:
+        log_warning(f"{message}, vượt giới hạn {CLEANING_MAX_MEMORY_RATIO} lần", logger)
+    else:
+        logger.info(message)
+    
+    return df, report
+
+
+def _save_processed_data(df: pd.DataFrame, filepath: str, city_name_viet: Optional[str] = None) -> None:
+    """
+    Lưu DataFrame đã xử lý thành file (CSV/Parquet/Feather theo phần mở rộng).
+    
+    Nếu bật WEATHER_DATABASE, dữ liệu của thành phố trong cơ sở dữ liệu SQLite
+    cũng được thay mới (lỗi cơ sở dữ liệu chỉ được log, file vẫn được lưu).
     
     Args:
         df: DataFrame cần lưu
         filepath: Đường dẫn file output
+        city_name_viet: Tên thành phố (cần để ghi vào cơ sở dữ liệu)
         
     Raises:
         FileOperationError: Nếu không thể lưu file
@@ -328,8 +515,7 @@ def _save_processed_data(df: pd.DataFrame, filepath: str) -> None:
     logger.info("Lưu file dữ liệu sạch...")
     
     try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        df.to_csv(filepath, index=False, encoding='utf-8-sig')
+        write_frame(df, filepath)
         
         file_size = df.memory_usage(deep=True).sum() / 1024
         log_success("Đã lưu dữ liệu sạch", logger)
@@ -346,6 +532,12 @@ def _save_processed_data(df: pd.DataFrame, filepath: str) -> None:
         error_msg = f"Lỗi I/O khi lưu file: {e}"
         log_error(error_msg, logger, exc_info=True)
         raise FileOperationError(error_msg, filepath) from e
+    
+    if WEATHER_DATABASE_ENABLED and city_name_viet is not None:
+        try:
+            write_city(df, city_name_viet)
+        except sqlite3.Error as e:
+            log_warning(f"Không thể ghi {city_name_viet} vào cơ sở dữ liệu: {e}", logger)
 
 
 def _log_data_statistics(df: pd.DataFrame) -> None:
@@ -366,24 +558,29 @@ def _log_data_statistics(df: pd.DataFrame) -> None:
     logger.info(f"\n{df.head(5).to_string(index=False)}")
 
 
-def clean_data(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[pd.DataFrame]:
+def clean_data(
+    city_name_viet: str = DEFAULT_CITY_VIET,
+    df: Optional[pd.DataFrame] = None,
+    measure_memory: bool = False
+) -> Optional[pd.DataFrame]:
     """
     Đọc, xử lý và làm sạch dữ liệu thời tiết.
     
     Quy trình xử lý:
-    1. Kiểm tra file dữ liệu thô tồn tại
-    2. Đọc file CSV
+    1. Kiểm tra file dữ liệu thô tồn tại (bỏ qua nếu truyền df)
+    2. Đọc file dữ liệu thô (bỏ qua nếu truyền df)
     3. Validate các cột bắt buộc
-    4. Xử lý dữ liệu thiếu
-    5. Loại bỏ dữ liệu trùng lặp
-    6. Chuyển đổi cột thời gian sang DateTime
-    7. Kiểm tra và loại bỏ giá trị ngoại lệ
-    8. Làm tròn số liệu
-    9. Đổi tên cột sang Tiếng Việt
-    10. Lưu file sạch
+    4. Chạy CLEANING_STEPS: xử lý dữ liệu thiếu, loại bỏ trùng lặp, chuyển
+       cột thời gian sang DateTime, loại bỏ giá trị ngoại lệ, làm tròn số liệu,
+       đổi tên cột sang Tiếng Việt
+    5. Kiểm tra còn dữ liệu
+    6. Lưu file sạch ở luồng nền (không chờ ghi xong)
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt (mặc định: "Hà Nội")
+        df: DataFrame thô đã có trong bộ nhớ (ví dụ kết quả của fetch_weather_data).
+            None = đọc từ file dữ liệu thô. DataFrame truyền vào không bị sửa đổi.
+        measure_memory: True để đo và log đỉnh bộ nhớ của các bước làm sạch
     
     Returns:
         Optional[pd.DataFrame]: DataFrame đã xử lý nếu thành công,
@@ -399,54 +596,609 @@ def clean_data(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[pd.DataFrame
         >>> df = clean_data("Hà Nội")
         >>> print(df.columns.tolist())
         ['Thời Gian', 'Nhiệt Độ', 'Nhiệt Độ Cảm Nhận', 'Độ Ẩm', ...]
+        
+        >>> raw = fetch_weather_data("Hà Nội")
+        >>> df = clean_data("Hà Nội", df=raw)  # Không đọc lại file thô
     """
     
-    raw_data_path = get_raw_data_path(city_name_viet)
     processed_data_path = get_processed_data_path(city_name_viet)
     
     logger.info(f"🧹 Bắt đầu làm sạch dữ liệu cho: {city_name_viet}")
     
     try:
-        # 1. Validate file tồn tại
-        _validate_file_exists(raw_data_path)
-        
-        # 2. Đọc dữ liệu
-        df = _load_raw_data(raw_data_path)
+        if df is None:
+            # 1. Validate file tồn tại
+            raw_data_path = resolve_data_path(get_raw_data_path, city_name_viet)
+            _validate_file_exists(raw_data_path)
+            
+            # 2. Đọc dữ liệu
+            df = _load_raw_data(raw_data_path)
         
         # 3. Validate cột bắt buộc
         _validate_required_columns(df)
         
-        # 4. Xử lý missing values
-        df = _handle_missing_values(df)
-        
-        # 5. Loại bỏ duplicate
-        df = _remove_duplicates(df)
+        # 4. Các bước làm sạch (không sửa DataFrame của caller nên không cần sao chép trước)
+        df, _ = run_cleaning_steps(df, measure_memory)
         
-        # 6. Chuyển đổi datetime
-        df = _convert_datetime_column(df)
-        
-        # 7. Validate ranges và loại bỏ outliers
-        df = _validate_data_ranges(df)
-        
-        # 8. Kiểm tra DataFrame không rỗng
+        # 5. Kiểm tra DataFrame không rỗng
         if len(df) == 0:
             error_msg = "Tất cả dữ liệu đã bị loại bỏ sau khi clean!"
             log_error(error_msg, logger)
             raise EmptyDataFrameError(error_msg)
         
-        # 9. Làm tròn số liệu
-        df = _round_numeric_values(df)
+        # 6. Lưu file (bất đồng bộ, lỗi ghi được log ở luồng nền)
+        write_frame_async(
+            df, processed_data_path,
+            writer=lambda frame, path: _save_processed_data(frame, path, city_name_viet)
+        )
         
-        # 10. Đổi tên cột sang tiếng Việt
-        df = _rename_columns_vietnamese(df)
+        # 7. Log statistics
+        _log_data_statistics(df)
         
-        # 11. Lưu file
-        _save_processed_data(df, processed_data_path)
+        return df
         
-        # 12. Log statistics
-        _log_data_statistics(df)
+    except (FileOperationError, DataValidationError, DataProcessingError, EmptyDataFrameError) as e:
+        logger.error(f"Lỗi khi clean data: {e}")
+        return None
         
+    except Exception as e:
+        log_error(f"Lỗi không xác định: {type(e).__name__}: {e}", logger, exc_info=True)
+        return None
+
+
+def _median_from_counts(counts: pd.Series) -> float:
+    """Trung vị từ bảng tần suất {giá trị: số lần} (trung bình hai giá trị giữa nếu số phần tử chẵn)."""
+    counts = counts.sort_index()
+    cumulative = counts.to_numpy().cumsum()
+    total = int(cumulative[-1])
+    values = counts.index.to_numpy(dtype=np.float64)
+    lower = values[np.searchsorted(cumulative, (total - 1) // 2, side='right')]
+    upper = values[np.searchsorted(cumulative, total // 2, side='right')]
+    return float((lower + upper) / 2)
+
+
+def _iter_raw_chunks(
+    filepath: str,
+    chunk_size: int,
+    columns: Optional[List[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Đọc file dữ liệu thô theo từng khối.
+    
+    Raises:
+        FileOperationError: Nếu không thể đọc file
+    """
+    try:
+        yield from iter_frame_chunks(filepath, chunk_size, columns)
+        
+    except pd.errors.ParserError as e:
+        error_msg = f"Lỗi parse CSV: {e}"
+        log_error(error_msg, logger, exc_info=True)
+        raise FileOperationError(error_msg, filepath) from e
+    
+    except FileOperationError:
+        raise
+    
+    except Exception as e:
+        error_msg = f"Lỗi không xác định khi đọc file: {e}"
+        log_error(error_msg, logger, exc_info=True)
+        raise FileOperationError(error_msg, filepath) from e
+
+
+class _FillStatistics:
+    """
+    Thống kê GLOBAL_FILL_STATISTICS tính dần qua nhiều khối dữ liệu thô.
+    
+    Trung bình dùng tổng + số lượng; trung vị dùng bảng tần suất của giá trị đã
+    làm tròn theo ROUND_DECIMALS (độ chính xác của dữ liệu sạch) nên kích thước
+    chỉ phụ thuộc số giá trị khác nhau, không phụ thuộc số dòng. Trạng thái lưu
+    được dạng dict JSON (to_dict/khởi tạo từ dict).
+    """
+    
+    def __init__(self, state: Optional[Dict[str, Any]] = None):
+        state = state or {}
+        self.sums: Dict[str, float] = dict(state.get('sums', {}))
+        self.totals: Dict[str, int] = dict(state.get('totals', {}))
+        self.counts: Dict[str, pd.Series] = {
+            col: pd.Series([count for _, count in pairs], index=[value for value, _ in pairs], dtype=np.int64)
+            for col, pairs in state.get('counts', {}).items()
+        }
+    
+    def update(self, df: pd.DataFrame) -> None:
+        """Cộng thêm các giá trị (khác NaN) của một khối dữ liệu thô."""
+        for col, statistic in GLOBAL_FILL_STATISTICS.items():
+            if col not in df.columns:
+                continue
+            values = pd.to_numeric(df[col]).dropna()
+            if statistic == 'mean':
+                self.sums[col] = self.sums.get(col, 0.0) + float(values.sum())
+                self.totals[col] = self.totals.get(col, 0) + len(values)
+            else:
+                chunk_counts = values.round(ROUND_DECIMALS.get(col, 2)).value_counts()
+                if col in self.counts:
+                    chunk_counts = self.counts[col].add(chunk_counts, fill_value=0).astype(np.int64)
+                self.counts[col] = chunk_counts
+    
+    def values(self) -> Dict[str, float]:
+        """Giá trị thống kê hiện tại: {cột raw: giá trị} (cột chưa có dữ liệu bị bỏ qua)."""
+        statistics = {col: self.sums[col] / self.totals[col] for col in self.sums if self.totals[col] > 0}
+        statistics.update({col: _median_from_counts(counts) for col, counts in self.counts.items() if len(counts)})
+        return statistics
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Trạng thái dạng dict JSON."""
+        return {
+            'sums': self.sums,
+            'totals': self.totals,
+            'counts': {col: [[float(value), int(count)] for value, count in counts.items()]
+                       for col, counts in self.counts.items()},
+        }
+
+
+def _collect_fill_statistics(filepath: str, chunk_size: int) -> Dict[str, float]:
+    """
+    Lượt đọc thứ nhất: tính GLOBAL_FILL_STATISTICS trên toàn bộ file thô.
+    
+    Chỉ đọc các cột cần thống kê; bộ nhớ không phụ thuộc số dòng (xem _FillStatistics).
+    
+    Args:
+        filepath: Đường dẫn file dữ liệu thô
+        chunk_size: Số dòng mỗi khối
+        
+    Returns:
+        Dict[str, float]: {cột raw: giá trị thống kê} (cột không có dữ liệu bị bỏ qua)
+    """
+    statistics = _FillStatistics()
+    for chunk in _iter_raw_chunks(filepath, chunk_size, list(GLOBAL_FILL_STATISTICS)):
+        statistics.update(chunk)
+    return statistics.values()
+
+
+def _write_database_chunked(filepath: str, city_name_viet: str, chunk_size: int) -> None:
+    """Nạp file dữ liệu sạch vào cơ sở dữ liệu theo từng khối (lỗi cơ sở dữ liệu chỉ được log)."""
+    try:
+        for index, chunk in enumerate(iter_frame_chunks(filepath, chunk_size)):
+            write_city(chunk, city_name_viet, replace=index == 0)
+    except sqlite3.Error as e:
+        log_warning(f"Không thể ghi {city_name_viet} vào cơ sở dữ liệu: {e}", logger)
+
+
+def clean_data_chunked(
+    city_name_viet: str = DEFAULT_CITY_VIET,
+    chunk_size: int = CLEANING_CHUNK_ROWS
+) -> Optional[int]:
+    """
+    Làm sạch file dữ liệu thô rất lớn theo từng khối, bộ nhớ không phụ thuộc kích thước file.
+    
+    Quy trình:
+    1. Lượt đọc thứ nhất (chỉ các cột cần): thống kê toàn cục để điền dữ liệu
+       thiếu (trung bình áp suất, trung vị hướng gió/mây/tầm nhìn)
+    2. Lượt đọc thứ hai: mỗi khối chạy CLEANING_STEPS như clean_data, với
+       thống kê của lượt 1 và loại trùng theo các mốc thời gian đã gặp ở khối trước
+    3. Mỗi khối sạch được ghi ngay vào file tạm; file dữ liệu sạch chỉ được thay
+       khi xong (lỗi giữa chừng giữ nguyên file cũ)
+    
+    Bộ nhớ gồm một khối chunk_size dòng và 8 byte mỗi mốc thời gian đã gặp.
+    Kết quả giống clean_data, trừ trung vị được tính trên giá trị đã làm tròn
+    theo ROUND_DECIMALS.
+    
+    Args:
+        city_name_viet: Tên thành phố tiếng Việt (mặc định: "Hà Nội")
+        chunk_size: Số dòng mỗi khối (mặc định: CLEANING_CHUNK_ROWS)
+    
+    Returns:
+        Optional[int]: Số dòng dữ liệu sạch đã ghi nếu thành công, None nếu thất bại
+        
+    Examples:
+        >>> rows = clean_data_chunked("Hà Nội", chunk_size=50_000)
+    """
+    processed_data_path = get_processed_data_path(city_name_viet)
+    
+    logger.info(f"🧹 Bắt đầu làm sạch theo khối {chunk_size} dòng cho: {city_name_viet}")
+    
+    try:
+        raw_data_path = resolve_data_path(get_raw_data_path, city_name_viet)
+        _validate_file_exists(raw_data_path)
+        
+        # 1. Thống kê toàn cục cho dữ liệu thiếu
+        fill_statistics = _collect_fill_statistics(raw_data_path, chunk_size)
+        logger.info(f"Thống kê điền dữ liệu thiếu: {fill_statistics}")
+        
+        # 2. Các bước làm sạch với thống kê toàn cục và loại trùng giữa các khối
+        overrides = {
+            'missing': functools.partial(_handle_missing_values, fill_statistics=fill_statistics),
+            'duplicates': functools.partial(_remove_duplicates, seen=_SeenKeys()),
+        }
+        steps = [(name, overrides.get(name, step)) for name, step in CLEANING_STEPS]
+        
+        rows_read = 0
+        chunk_count = 0
+        with FrameChunkWriter(processed_data_path) as writer:
+            for chunk in _iter_raw_chunks(raw_data_path, chunk_size):
+                if chunk_count == 0:
+                    _validate_required_columns(chunk)
+                chunk_count += 1
+                rows_read += len(chunk)
+                
+                chunk, _ = run_cleaning_steps(chunk, steps=steps)
+                writer.write(chunk)
+                logger.info(f"Khối {chunk_count}: đã đọc {rows_read} dòng, ghi {writer.rows} dòng sạch")
+            
+            # 3. Kiểm tra còn dữ liệu (lỗi → file tạm bị xóa)
+            if writer.rows == 0:
+                error_msg = "Tất cả dữ liệu đã bị loại bỏ sau khi clean!"
+                log_error(error_msg, logger)
+                raise EmptyDataFrameError(error_msg)
+        
+        log_success(f"Đã làm sạch {rows_read} → {writer.rows} dòng ({chunk_count} khối)", logger)
+        logger.info(f"{EMOJI_FILE} Vị trí: {processed_data_path}")
+        
+        if WEATHER_DATABASE_ENABLED:
+            _write_database_chunked(processed_data_path, city_name_viet, chunk_size)
+        
+        return writer.rows
+        
+    except (FileOperationError, DataValidationError, DataProcessingError, EmptyDataFrameError) as e:
+        logger.error(f"Lỗi khi clean data: {e}")
+        return None
+        
+    except Exception as e:
+        log_error(f"Lỗi không xác định: {type(e).__name__}: {e}", logger, exc_info=True)
+        return None
+
+
+def _complete_length(filepath: str) -> int:
+    """Độ dài phần đầu file kết thúc bằng một dòng hoàn chỉnh (bỏ dòng cuối có thể đang ghi dở)."""
+    with open(filepath, 'rb') as f:
+        end = f.seek(0, os.SEEK_END)
+        while end > 0:
+            start = max(0, end - RAW_CHECKSUM_BLOCK_BYTES)
+            f.seek(start)
+            newline = f.read(end - start).rfind(b'\n')
+            if newline >= 0:
+                return start + newline + 1
+            end = start
+    return 0
+
+
+def _raw_digest(filepath: str, end: int, digest: Optional[Any] = None, start: int = 0) -> Any:
+    """
+    Băm (blake2b) các byte [start, end) của file thô, đọc theo khối RAW_CHECKSUM_BLOCK_BYTES.
+    
+    Truyền digest của phần [0, start) để băm tiếp phần ghi thêm mà không đọc lại phần đầu.
+    
+    Returns:
+        Đối tượng hash của phần [0, end) (dùng .hexdigest() để lấy checksum)
+    """
+    if digest is None:
+        digest = hashlib.blake2b(digest_size=16)
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            block = f.read(min(remaining, RAW_CHECKSUM_BLOCK_BYTES))
+            if not block:
+                break
+            digest.update(block)
+            remaining -= len(block)
+    return digest
+
+
+def _raw_probe(filepath: str, end: int) -> str:
+    """
+    Checksum nhanh của phần [0, end) file thô: chỉ băm RAW_PROBE_BYTES byte đầu và
+    RAW_PROBE_BYTES byte cuối, đủ phát hiện file bị ghi lại mà không đọc cả file.
+    """
+    head_end = min(end, RAW_PROBE_BYTES)
+    digest = _raw_digest(filepath, head_end)
+    digest = _raw_digest(filepath, end, digest, start=max(head_end, end - RAW_PROBE_BYTES))
+    return digest.hexdigest()
+
+
+def _raw_stat(filepath: str) -> List[int]:
+    """(kích thước, mtime_ns, inode) của file thô: không đổi nghĩa là file chưa bị ghi."""
+    st = os.stat(filepath)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+def _read_raw_range(filepath: str, start: int, end: int) -> pd.DataFrame:
+    """
+    Đọc các dòng của file thô CSV nằm trong khoảng byte [start, end) (kèm dòng header).
+    
+    Raises:
+        FileOperationError: Nếu không thể đọc hoặc parse file
+    """
+    try:
+        with open(filepath, 'rb') as f:
+            header = f.readline()
+            f.seek(max(start, len(header)))
+            body = f.read(end - max(start, len(header)))
+        return pd.read_csv(io.BytesIO(header + body), encoding='utf-8-sig')
+        
+    except pd.errors.ParserError as e:
+        error_msg = f"Lỗi parse CSV: {e}"
+        log_error(error_msg, logger, exc_info=True)
+        raise FileOperationError(error_msg, filepath) from e
+        
+    except OSError as e:
+        error_msg = f"Lỗi khi đọc file: {e}"
+        log_error(error_msg, logger, exc_info=True)
+        raise FileOperationError(error_msg, filepath) from e
+
+
+def _seen_keys_path(city_name_viet: str) -> str:
+    """File nhị phân chứa khóa thời gian (uint64) của mọi dòng thô đã xử lý, cạnh file trạng thái."""
+    return os.path.splitext(get_clean_state_path(city_name_viet))[0] + '.keys'
+
+
+def _write_seen_keys(city_name_viet: str, keys: np.ndarray, offset: int) -> int:
+    """
+    Ghi khóa thời gian vào file khóa từ vị trí offset (số khóa đã có) và cắt phần thừa phía sau.
+    
+    Returns:
+        int: Tổng số khóa trong file sau khi ghi
+    """
+    path = _seen_keys_path(city_name_viet)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'r+b' if offset > 0 else 'wb') as f:
+        f.seek(offset * keys.itemsize)
+        f.write(keys.astype(np.uint64).tobytes())
+        f.truncate()
+    return offset + len(keys)
+
+
+def _load_clean_state(city_name_viet: str) -> Optional[Dict[str, Any]]:
+    """Đọc trạng thái làm sạch tăng dần (None nếu chưa có hoặc file hỏng)."""
+    try:
+        with open(get_clean_state_path(city_name_viet), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        log_warning(f"Bỏ qua trạng thái làm sạch hỏng của {city_name_viet}: {e}", logger)
+        return None
+
+
+def _save_clean_state(city_name_viet: str, state: Dict[str, Any]) -> None:
+    """Ghi trạng thái làm sạch tăng dần (nguyên tử qua file tạm + os.replace; lỗi chỉ được log)."""
+    path = get_clean_state_path(city_name_viet)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    except OSError as e:
+        log_warning(f"Không thể ghi trạng thái làm sạch của {city_name_viet}: {e}", logger)
+
+
+def _build_clean_state(
+    city_name_viet: str,
+    raw_path: str,
+    raw_bytes: int,
+    raw_checksum: str,
+    high_water_mark: pd.Timestamp,
+    fill_statistics: _FillStatistics,
+    seen_keys: int
+) -> Dict[str, Any]:
+    """Trạng thái sau một lần làm sạch: mốc đã xử lý của file thô + phiên bản dữ liệu sạch."""
+    version = processed_data_version(city_name_viet)
+    return {
+        'raw_path': raw_path,
+        'raw_bytes': raw_bytes,
+        'raw_stat': _raw_stat(raw_path),
+        'raw_probe': _raw_probe(raw_path, raw_bytes),
+        'raw_checksum': raw_checksum,
+        'high_water_mark': high_water_mark.isoformat(),
+        'processed_version': list(version) if version is not None else None,
+        'fill_statistics': fill_statistics.to_dict(),
+        'seen_keys': seen_keys,
+    }
+
+
+def _incremental_mismatch(
+    state: Optional[Dict[str, Any]],
+    raw_path: str,
+    raw_bytes: int,
+    city_name_viet: str
+) -> Tuple[Optional[str], Any]:
+    """
+    Kiểm tra có thể làm sạch tăng dần không: file thô hoặc dữ liệu sạch không đổi ngoài phần ghi thêm.
+    
+    Các kiểm tra rẻ chạy trước: kích thước, checksum nhanh đầu/cuối phần đã xử lý
+    (_raw_probe, phát hiện file bị ghi lại như sau mỗi lần tải từ API), phiên bản dữ
+    liệu sạch. File thô không đổi (cùng kích thước, mtime, inode) thì không băm gì;
+    chỉ khi file thật sự được ghi thêm mới băm toàn bộ phần đã xử lý.
+    
+    Returns:
+        Tuple[Optional[str], Any]: (lý do phải làm sạch toàn bộ hoặc None,
+            digest của phần file thô đã xử lý nếu đã băm)
+    """
+    if state is None:
+        return "chưa có trạng thái làm sạch", None
+    if state.get('raw_path') != raw_path:
+        return "file thô khác lần trước", None
+    if raw_bytes < state['raw_bytes']:
+        return "file thô bị ghi lại (ngắn hơn phần đã xử lý)", None
+    if state.get('raw_probe') != _raw_probe(raw_path, state['raw_bytes']):
+        return "file thô bị ghi lại", None
+    
+    version = processed_data_version(city_name_viet)
+    if version is None or list(version) != state['processed_version']:
+        return "dữ liệu sạch đã thay đổi", None
+    keys_path = _seen_keys_path(city_name_viet)
+    if 'seen_keys' not in state or not os.path.exists(keys_path) \
+            or os.path.getsize(keys_path) < state['seen_keys'] * np.dtype(np.uint64).itemsize:
+        return "thiếu khóa thời gian đã xử lý", None
+    
+    if raw_bytes == state['raw_bytes'] and _raw_stat(raw_path) == state.get('raw_stat'):
+        return None, None
+    
+    digest = _raw_digest(raw_path, state['raw_bytes'])
+    if digest.hexdigest() != state['raw_checksum']:
+        return "phần file thô đã xử lý bị thay đổi", None
+    return None, digest
+
+
+def _drop_seen_times(
+    df: pd.DataFrame,
+    keys: np.ndarray,
+    high_water_mark: pd.Timestamp,
+    city_name_viet: str,
+    seen_keys: int
+) -> pd.DataFrame:
+    """
+    Bỏ các dòng mới có mốc thời gian đã gặp trong phần file thô đã xử lý.
+    
+    Giống _remove_duplicates trên toàn bộ file thô (giữ bản ghi đầu tiên), kể cả
+    khi bản ghi đầu tiên đã bị loại vì ngoại lệ. Chỉ các dòng có thời gian
+    <= high_water_mark mới có thể trùng, nên file khóa chỉ được đọc khi có dòng như vậy.
+    """
+    times = pd.to_datetime(df[RawColumns.DT_TXT.value])
+    late = (times <= high_water_mark).to_numpy()
+    if not late.any():
         return df
+    
+    seen = np.fromfile(_seen_keys_path(city_name_viet), dtype=np.uint64, count=seen_keys)
+    duplicate = late & np.isin(keys, seen)
+    if duplicate.any():
+        log_warning(f"Phát hiện {int(duplicate.sum())} dòng mới trùng dữ liệu đã xử lý (đã loại bỏ)", logger)
+        df = df[~duplicate]
+    return df
+
+
+def _append_processed_data(df: pd.DataFrame, processed_path: str, city_name_viet: str) -> None:
+    """
+    Ghi thêm các dòng sạch mới vào dữ liệu sạch.
+    
+    CSV được ghi nối vào cuối file; Parquet/Feather không ghi nối được nên được
+    ghi lại theo từng khối (không làm sạch lại, bộ nhớ giới hạn).
+    """
+    if processed_path.endswith(CSV_EXTENSION):
+        df.to_csv(processed_path, mode='a', header=False, index=False, encoding='utf-8')
+    else:
+        with FrameChunkWriter(processed_path) as writer:
+            for chunk in iter_frame_chunks(processed_path, CLEANING_CHUNK_ROWS):
+                writer.write(chunk)
+            writer.write(df)
+    
+    if WEATHER_DATABASE_ENABLED:
+        try:
+            write_city(df, city_name_viet, replace=False)
+        except sqlite3.Error as e:
+            log_warning(f"Không thể ghi {city_name_viet} vào cơ sở dữ liệu: {e}", logger)
+
+
+def _clean_full_tracked(city_name_viet: str, raw_path: str, raw_bytes: int) -> Optional[int]:
+    """Làm sạch lại toàn bộ raw_bytes byte đầu của file thô bằng clean_data và lưu trạng thái mới."""
+    raw = _read_raw_range(raw_path, 0, raw_bytes)
+    df = clean_data(city_name_viet, df=raw)
+    if df is None:
+        return None
+    
+    fill_statistics = _FillStatistics()
+    fill_statistics.update(raw)
+    high_water_mark = pd.to_datetime(raw[RawColumns.DT_TXT.value]).max()
+    seen_keys = _write_seen_keys(city_name_viet, _time_keys(raw), 0)
+    raw_checksum = _raw_digest(raw_path, raw_bytes).hexdigest()
+    _save_clean_state(city_name_viet, _build_clean_state(
+        city_name_viet, raw_path, raw_bytes, raw_checksum, high_water_mark, fill_statistics, seen_keys
+    ))
+    return len(df)
+
+
+def clean_data_incremental(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[int]:
+    """
+    Làm sạch tăng dần: chỉ xử lý các dòng được ghi thêm vào file thô CSV kể từ lần trước.
+    
+    Trạng thái của lần trước (file clean_state_<thành phố>.json) gồm mốc thời gian
+    lớn nhất đã xử lý (high-water mark), số byte đã xử lý của file thô và checksum
+    của toàn bộ phần đó. Nếu phần đã xử lý không đổi, chỉ các byte mới được parse, làm sạch
+    (dữ liệu thiếu điền bằng thống kê cộng dồn của toàn bộ file thô) và ghi thêm vào
+    dữ liệu sạch; dòng mới trùng mốc thời gian đã gặp trong file thô bị bỏ (giữ bản
+    ghi đầu tiên, khóa thời gian lưu ở file clean_state_<thành phố>.keys).
+    Chi phí làm sạch tỷ lệ với số dòng mới; phần đã xử lý chỉ được đọc lại để băm.
+    
+    Làm sạch lại toàn bộ (như clean_data) khi: chưa có trạng thái, phần file thô
+    đã xử lý bị sửa (checksum khác) hoặc ngắn đi, dữ liệu sạch bị ghi bởi nơi khác, hoặc file
+    thô không phải CSV (Parquet/Feather không ghi nối được).
+    
+    Chỉ có lợi với file thô chỉ ghi thêm (ví dụ do một bộ thu thập bên ngoài ghi nối).
+    fetch_weather_data ghi lại file thô mỗi lần tải, nên lần chạy sau đó luôn làm
+    sạch toàn bộ; việc này được phát hiện bằng kiểm tra rẻ (_raw_probe), không băm cả file.
+    
+    Args:
+        city_name_viet: Tên thành phố tiếng Việt (mặc định: "Hà Nội")
+    
+    Returns:
+        Optional[int]: Số dòng sạch đã ghi (0 nếu không có dữ liệu mới), None nếu thất bại
+        
+    Examples:
+        >>> clean_data_incremental("Hà Nội")   # lần đầu: làm sạch toàn bộ
+        >>> clean_data_incremental("Hà Nội")   # sau khi file thô được ghi thêm: chỉ dòng mới
+    """
+    logger.info(f"🧹 Làm sạch tăng dần cho: {city_name_viet}")
+    
+    try:
+        raw_path = resolve_data_path(get_raw_data_path, city_name_viet)
+        _validate_file_exists(raw_path)
+        
+        if not raw_path.endswith(CSV_EXTENSION):
+            logger.info("Làm sạch tăng dần chỉ hỗ trợ file thô CSV, làm sạch toàn bộ")
+            df = clean_data(city_name_viet)
+            return None if df is None else len(df)
+        
+        raw_bytes = _complete_length(raw_path)
+        state = _load_clean_state(city_name_viet)
+        reason, digest = _incremental_mismatch(state, raw_path, raw_bytes, city_name_viet)
+        if reason is not None:
+            logger.info(f"Làm sạch toàn bộ: {reason}")
+            return _clean_full_tracked(city_name_viet, raw_path, raw_bytes)
+        
+        if raw_bytes == state['raw_bytes']:
+            log_success("Không có dữ liệu mới", logger)
+            return 0
+        
+        # 1. Chỉ đọc phần được ghi thêm
+        new_rows = _read_raw_range(raw_path, state['raw_bytes'], raw_bytes)
+        logger.info(f"Đã đọc {len(new_rows)} dòng mới")
+        _validate_required_columns(new_rows)
+        
+        fill_statistics = _FillStatistics(state['fill_statistics'])
+        fill_statistics.update(new_rows)
+        high_water_mark = pd.Timestamp(state['high_water_mark'])
+        
+        # 2. Loại trùng với phần file thô đã xử lý, rồi làm sạch như clean_data
+        processed_path = state['processed_version'][0]
+        new_keys = _time_keys(new_rows)
+        candidates = _drop_seen_times(new_rows, new_keys, high_water_mark, city_name_viet, state['seen_keys'])
+        steps = [
+            (name, functools.partial(_handle_missing_values, fill_statistics=fill_statistics.values())
+             if name == 'missing' else step)
+            for name, step in CLEANING_STEPS
+        ]
+        cleaned, _ = run_cleaning_steps(candidates, steps=steps)
+        
+        # 3. Ghi thêm vào dữ liệu sạch và lưu mốc mới
+        if len(cleaned) > 0:
+            _append_processed_data(cleaned, processed_path, city_name_viet)
+        
+        new_times = pd.to_datetime(new_rows[RawColumns.DT_TXT.value])
+        high_water_mark = max(high_water_mark, new_times.max())
+        seen_keys = _write_seen_keys(city_name_viet, new_keys, state['seen_keys'])
+        raw_checksum = _raw_digest(raw_path, raw_bytes, digest, start=state['raw_bytes']).hexdigest()
+        _save_clean_state(city_name_viet, _build_clean_state(
+            city_name_viet, raw_path, raw_bytes, raw_checksum, high_water_mark, fill_statistics, seen_keys
+        ))
+        
+        log_success(f"Đã thêm {len(cleaned)} dòng sạch (từ {len(new_rows)} dòng mới)", logger)
+        logger.info(f"{EMOJI_FILE} Vị trí: {processed_path}")
+        return len(cleaned)
         
     except (FileOperationError, DataValidationError, DataProcessingError, EmptyDataFrameError) as e:
         logger.error(f"Lỗi khi clean data: {e}")
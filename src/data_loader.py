@@ -11,26 +11,46 @@ Author: Weather Forecast Pro Team
 Date: 2025-12-27 (Refactored for code quality)
 """
 
-import requests
+import email.utils
 import pandas as pd
-import os
-from typing import Optional, Dict, Any, List
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Optional, Dict, Any, List
 
-from .config import API_KEY, BASE_URL, VIETNAM_CITIES, DEFAULT_CITY_VIET, get_raw_data_path
+from .config import (
+    API_KEY, BASE_URL, VIETNAM_CITIES, DEFAULT_CITY_VIET, HISTORY_STORE_ENABLED,
+    get_history_dir, get_raw_data_path
+)
 from .constants import (
-    API_TIMEOUT_SECONDS,
+    API_TIMEOUT_SECONDS, API_MAX_CONCURRENT_REQUESTS,
+    API_RETRY_ATTEMPTS, API_RETRY_DELAY, API_RETRY_MAX_DELAY, API_POOL_MAXSIZE, API_RETRY_STATUS_CODES,
     MIN_VALID_TEMPERATURE, MAX_VALID_TEMPERATURE,
     MIN_VALID_HUMIDITY, MAX_VALID_HUMIDITY,
     EMOJI_LOADING, EMOJI_FILE, EMOJI_CHART
 )
 from .column_names import RawColumns
 from .exceptions import WeatherAPIError, CityNotFoundError, DataValidationError, FileOperationError
+from .history_store import append_forecast
 from .logger import get_logger, log_success, log_error, log_warning, log_info
+from .response_cache import get_response_cache
+from .storage import write_frame, write_frame_async
+
+if TYPE_CHECKING:
+    # Chỉ dùng cho type hint: requests được import trong hàm khi thật sự gọi API
+    # (import requests mất ~0.1s, không cần cho GUI/CLI khi chỉ xem dữ liệu có sẵn)
+    import requests
 
 
 # Logger cho module này
 logger = get_logger(__name__)
 
+# HTTP session dùng chung cho toàn module (connection pooling + keep-alive)
+_session: Optional["requests.Session"] = None
+_session_lock = threading.Lock()
+
 
 def _validate_api_key() -> None:
     """
@@ -67,6 +87,126 @@ def _validate_city_name(city_name_viet: str) -> str:
     return city_name_en
 
 
+def _get_session() -> "requests.Session":
+    """
+    Lấy HTTP session dùng chung, tạo mới nếu chưa có.
+    
+    Session giữ kết nối keep-alive tới API nên các request liên tiếp
+    (hoặc song song) không phải bắt tay TCP/DNS lại từ đầu.
+    
+    Returns:
+        requests.Session: Session với connection pool giới hạn API_POOL_MAXSIZE
+    """
+    global _session
+    
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=API_POOL_MAXSIZE,
+                    pool_maxsize=API_POOL_MAXSIZE,
+                    pool_block=True
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    
+    return _session
+
+
+def _parse_retry_after(retry_after: str) -> Optional[float]:
+    """
+    Đọc header Retry-After: số giây hoặc HTTP-date (RFC 7231).
+    
+    Returns:
+        Optional[float]: Số giây cần chờ (>= 0), None nếu giá trị không hợp lệ
+    """
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = email.utils.parsedate_to_datetime(retry_after)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _compute_backoff_delay(attempt: int, retry_after: Optional[str] = None) -> float:
+    """
+    Tính thời gian chờ trước lần thử lại (exponential backoff + jitter).
+    
+    Retry-After của server được tôn trọng nếu lâu hơn backoff, nhưng không chờ
+    quá API_RETRY_MAX_DELAY giây (một worker không bị treo hàng giờ).
+    
+    Args:
+        attempt: Số thứ tự lần thử lại (bắt đầu từ 0)
+        retry_after: Giá trị header Retry-After (nếu server trả về)
+        
+    Returns:
+        float: Số giây cần chờ
+    """
+    base = API_RETRY_DELAY * (2 ** attempt)
+    delay = base / 2 + random.uniform(0, base / 2)
+    
+    if retry_after is not None:
+        server_delay = _parse_retry_after(retry_after)
+        if server_delay is not None:
+            delay = max(delay, server_delay)
+    
+    return min(delay, API_RETRY_MAX_DELAY)
+
+
+def _send_request_with_retry(url: str) -> "requests.Response":
+    """
+    Gửi GET request, tự động thử lại khi timeout, mất kết nối hoặc lỗi 5xx/429.
+    
+    Args:
+        url: URL cần gọi
+        
+    Returns:
+        requests.Response: Response cuối cùng nhận được
+        
+    Raises:
+        requests.exceptions.Timeout: Nếu vẫn timeout sau API_RETRY_ATTEMPTS lần thử lại
+        requests.exceptions.ConnectionError: Nếu vẫn mất kết nối sau API_RETRY_ATTEMPTS lần thử lại
+    """
+    import requests
+    
+    session = _get_session()
+    
+    for attempt in range(API_RETRY_ATTEMPTS + 1):
+        is_last_attempt = attempt == API_RETRY_ATTEMPTS
+        retry_after = None
+        
+        try:
+            response = session.get(url, timeout=API_TIMEOUT_SECONDS)
+        except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+            if is_last_attempt:
+                raise
+            reason = type(e).__name__
+        else:
+            if response.status_code not in API_RETRY_STATUS_CODES or is_last_attempt:
+                return response
+            reason = f"HTTP {response.status_code}"
+            retry_after = response.headers.get('Retry-After')
+            response.close()
+        
+        delay = _compute_backoff_delay(attempt, retry_after)
+        log_warning(
+            f"Request thất bại ({reason}), thử lại lần {attempt + 1}/{API_RETRY_ATTEMPTS} sau {delay:.1f} giây",
+            logger
+        )
+        time.sleep(delay)
+
+
 def _make_api_request(city_name_en: str) -> Dict[str, Any]:
     """
     Gửi request tới API và xử lý response.
@@ -80,11 +220,13 @@ def _make_api_request(city_name_en: str) -> Dict[str, Any]:
     Raises:
         WeatherAPIError: Nếu có lỗi khi gọi API
     """
+    import requests
+    
     url = f"{BASE_URL}?q={city_name_en}&appid={API_KEY}&units=metric&lang=vi"
     
     try:
         logger.info(f"Đang gửi request tới OpenWeatherMap API...")
-        response = requests.get(url, timeout=API_TIMEOUT_SECONDS)
+        response = _send_request_with_retry(url)
         
         # Xử lý các mã lỗi HTTP cụ thể
         if response.status_code == 401:
@@ -110,7 +252,7 @@ def _make_api_request(city_name_en: str) -> Dict[str, Any]:
         return data
         
     except requests.exceptions.Timeout:
-        error_msg = f"Timeout sau {API_TIMEOUT_SECONDS} giây - API không phản hồi"
+        error_msg = f"Timeout sau {API_TIMEOUT_SECONDS} giây ({API_RETRY_ATTEMPTS} lần thử lại) - API không phản hồi"
         log_error(error_msg, logger)
         raise WeatherAPIError(error_msg) from None
         
@@ -119,6 +261,11 @@ def _make_api_request(city_name_en: str) -> Dict[str, Any]:
         log_error(error_msg, logger)
         raise WeatherAPIError(error_msg) from None
         
+    except requests.exceptions.HTTPError as e:
+        error_msg = f"Lỗi HTTP từ API: {e}"
+        log_error(error_msg, logger)
+        raise WeatherAPIError(error_msg, status_code=e.response.status_code if e.response is not None else None) from e
+        
     except ValueError as e:
         error_msg = f"Dữ liệu trả về không phải JSON hợp lệ: {e}"
         log_error(error_msg, logger)
@@ -152,77 +299,166 @@ def _validate_api_response(data: Dict[str, Any]) -> None:
         log_warning("Dữ liệu thiếu thông tin thành phố", logger)
 
 
-def _validate_weather_record(record: Dict[str, Any], index: int) -> bool:
+# Các trường bắt buộc ở cấp cao nhất của mỗi bản ghi trong data['list']
+_REQUIRED_RECORD_FIELDS = ['dt_txt', 'main', 'wind', 'weather']
+
+# Các trường cần đọc từ mỗi bản ghi: {trường: danh sách khóa con cần tách (None nếu là giá trị đơn)}
+_RECORD_FIELDS = {
+    'dt_txt': None,
+    'main': ['temp', 'feels_like', 'humidity', 'pressure'],
+    'wind': ['speed', 'deg'],
+    'weather': None,
+    'clouds': ['all'],
+    'visibility': None,
+}
+
+
+def _flatten_weather_records(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Flatten toàn bộ danh sách bản ghi API thành một DataFrame dạng cột.
+    
+    Chỉ các trường trong _RECORD_FIELDS được đọc; các object lồng nhau được
+    tách thành cột 'trường.khóa' (ví dụ 'main.temp'). Cột cấp cao nhất vẫn được
+    giữ lại để kiểm tra trường có mặt hay không.
+    
+    Args:
+        records: Danh sách bản ghi trong data['list']
+        
+    Returns:
+        pd.DataFrame: DataFrame đã flatten, index là vị trí bản ghi
+    """
+    top = pd.DataFrame(records, columns=list(_RECORD_FIELDS))
+    frames = [top]
+    
+    for field, keys in _RECORD_FIELDS.items():
+        if keys is None:
+            continue
+        nested = pd.DataFrame(
+            [value if isinstance(value, dict) else {} for value in top[field]],
+            columns=keys,
+            index=top.index
+        )
+        nested.columns = [f"{field}.{key}" for key in keys]
+        frames.append(nested)
+    
+    return pd.concat(frames, axis=1)
+
+
+def _validate_weather_frame(flat: pd.DataFrame) -> pd.Series:
     """
-    Kiểm tra một bản ghi thời tiết có hợp lệ không.
+    Kiểm tra toàn bộ bản ghi thời tiết bằng các mask boolean.
+    
+    Thứ tự kiểm tra giống khi kiểm tra từng bản ghi: mỗi dòng chỉ bị báo lỗi
+    ở điều kiện đầu tiên mà nó vi phạm, và cảnh báo được log theo thứ tự bản ghi.
     
     Args:
-        record: Dictionary chứa dữ liệu một mốc thời gian
-        index: Index của bản ghi (để log)
+        flat: DataFrame đã flatten từ data['list']
         
     Returns:
-        bool: True nếu hợp lệ, False nếu không hợp lệ
+        pd.Series: Mask boolean, True nếu bản ghi hợp lệ
     """
+    reasons = pd.Series(None, index=flat.index, dtype=object)
+    
+    def reject(mask: pd.Series, message: str, values: Optional[pd.Series] = None) -> None:
+        mask = mask & reasons.isna()
+        if not mask.any():
+            return
+        if values is None:
+            reasons[mask] = message
+        else:
+            reasons[mask] = [message.format(value=v) for v in values[mask]]
+    
     # Kiểm tra các trường bắt buộc
-    required_fields = ['dt_txt', 'main', 'wind', 'weather']
-    if not all(field in record for field in required_fields):
-        log_warning(f"Bản ghi {index}: Thiếu trường dữ liệu bắt buộc", logger)
-        return False
+    has_required = flat[_REQUIRED_RECORD_FIELDS].notna().all(axis=1)
+    reject(~has_required, "Thiếu trường dữ liệu bắt buộc")
     
     # Kiểm tra các giá trị con
-    if 'temp' not in record['main'] or 'humidity' not in record['main']:
-        log_warning(f"Bản ghi {index}: Thiếu dữ liệu thời tiết", logger)
-        return False
+    temp_raw = flat['main.temp']
+    humidity_raw = flat['main.humidity']
+    reject(temp_raw.isna() | humidity_raw.isna(), "Thiếu dữ liệu thời tiết")
+    
+    # Kiểm tra kiểu dữ liệu số
+    temp = pd.to_numeric(temp_raw, errors='coerce')
+    humidity = pd.to_numeric(humidity_raw, errors='coerce')
+    reject(temp.isna() | humidity.isna(), "Lỗi xử lý - giá trị nhiệt độ/độ ẩm không phải số")
     
     # Kiểm tra nhiệt độ hợp lý
-    temp = record['main']['temp']
-    if not (MIN_VALID_TEMPERATURE <= temp <= MAX_VALID_TEMPERATURE):
-        log_warning(f"Bản ghi {index}: Nhiệt độ {temp}°C ngoài phạm vi hợp lệ", logger)
-        return False
+    reject(~temp.between(MIN_VALID_TEMPERATURE, MAX_VALID_TEMPERATURE),
+           "Nhiệt độ {value}°C ngoài phạm vi hợp lệ", temp_raw)
     
     # Kiểm tra độ ẩm hợp lý
-    humidity = record['main']['humidity']
-    if not (MIN_VALID_HUMIDITY <= humidity <= MAX_VALID_HUMIDITY):
-        log_warning(f"Bản ghi {index}: Độ ẩm {humidity}% ngoài phạm vi hợp lệ", logger)
-        return False
+    reject(~humidity.between(MIN_VALID_HUMIDITY, MAX_VALID_HUMIDITY),
+           "Độ ẩm {value}% ngoài phạm vi hợp lệ", humidity_raw)
+    
+    # Log theo thứ tự bản ghi (chỉ duyệt các dòng không hợp lệ)
+    for idx, reason in reasons.dropna().items():
+        log_warning(f"Bản ghi {idx}: {reason}", logger)
     
-    return True
+    return reasons.isna()
 
 
-def _extract_weather_record(record: Dict[str, Any]) -> Dict[str, Any]:
+def _numeric_column(flat: pd.DataFrame, column: str) -> pd.Series:
     """
-    Trích xuất dữ liệu từ một bản ghi API.
+    Chuyển một cột đã flatten sang số.
+    
+    Giá trị không phải số thành NaN (được log, coi như thiếu) thay vì làm hỏng
+    cả thành phố; các bước làm sạch xử lý giá trị thiếu sau đó.
+    """
+    values = pd.to_numeric(flat[column], errors='coerce')
+    invalid = values.isna() & flat[column].notna()
+    if invalid.any():
+        log_warning(f"Trường {column}: {int(invalid.sum())} giá trị không phải số (coi như thiếu)", logger)
+    return values
+
+
+def _extract_weather_columns(flat: pd.DataFrame) -> pd.DataFrame:
+    """
+    Trích xuất các cột dữ liệu từ DataFrame đã flatten.
     
     Args:
-        record: Dictionary chứa dữ liệu từ API
+        flat: DataFrame đã flatten (chỉ gồm các bản ghi hợp lệ)
         
     Returns:
-        Dict: Dictionary chứa dữ liệu đã trích xuất
+        pd.DataFrame: DataFrame với các cột theo RawColumns
     """
-    row = {
-        RawColumns.DT_TXT.value: record['dt_txt'],
-        RawColumns.TEMP.value: record['main']['temp'],
-        RawColumns.FEELS_LIKE.value: record['main'].get('feels_like', record['main']['temp']),
-        RawColumns.HUMIDITY.value: record['main']['humidity'],
-        RawColumns.PRESSURE.value: record['main'].get('pressure', None),
-        RawColumns.WIND_SPEED.value: record['wind'].get('speed', 0),
-        RawColumns.WIND_DEG.value: record['wind'].get('deg', None),
-        RawColumns.CLOUDS.value: record.get('clouds', {}).get('all', None) if isinstance(record.get('clouds'), dict) else record.get('clouds', None),
-        RawColumns.VISIBILITY.value: record.get('visibility', None),
-        RawColumns.DESCRIPTION.value: record['weather'][0]['description'] if record['weather'] else 'Không xác định'
-    }
+    temp = _numeric_column(flat, 'main.temp')
     
-    # Chuyển đổi visibility từ mét sang km
-    if row[RawColumns.VISIBILITY.value] is not None:
-        row[RawColumns.VISIBILITY.value] = row[RawColumns.VISIBILITY.value] / 1000.0
+    # 'clouds' có thể là object {'all': ...} hoặc giá trị trực tiếp
+    clouds = _numeric_column(flat, 'clouds.all').combine_first(
+        pd.to_numeric(flat['clouds'], errors='coerce')
+    )
     
-    return row
+    # Mô tả lấy từ phần tử đầu tiên của danh sách 'weather'
+    first_weather = flat['weather'].str[0]
+    if first_weather.notna().any():
+        description = first_weather.str.get('description').fillna('Không xác định')
+    else:
+        description = pd.Series('Không xác định', index=flat.index)
+    
+    df = pd.DataFrame({
+        RawColumns.DT_TXT.value: flat['dt_txt'],
+        RawColumns.TEMP.value: temp,
+        RawColumns.FEELS_LIKE.value: _numeric_column(flat, 'main.feels_like').fillna(temp),
+        RawColumns.HUMIDITY.value: _numeric_column(flat, 'main.humidity'),
+        RawColumns.PRESSURE.value: _numeric_column(flat, 'main.pressure'),
+        RawColumns.WIND_SPEED.value: _numeric_column(flat, 'wind.speed').fillna(0),
+        RawColumns.WIND_DEG.value: _numeric_column(flat, 'wind.deg'),
+        RawColumns.CLOUDS.value: clouds,
+        # Chuyển đổi visibility từ mét sang km
+        RawColumns.VISIBILITY.value: _numeric_column(flat, 'visibility') / 1000.0,
+        RawColumns.DESCRIPTION.value: description,
+    })
+    
+    return df.reset_index(drop=True)
 
 
 def _parse_weather_data(data: Dict[str, Any], city_name_viet: str) -> pd.DataFrame:
     """
     Parse dữ liệu từ API response thành DataFrame.
     
+    Toàn bộ data['list'] được flatten một lần thành DataFrame dạng cột, sau đó
+    kiểm tra và trích xuất theo cột (vectorized) thay vì duyệt từng bản ghi.
+    
     Args:
         data: JSON response từ API
         city_name_viet: Tên thành phố tiếng Việt
@@ -234,35 +470,24 @@ def _parse_weather_data(data: Dict[str, Any], city_name_viet: str) -> pd.DataFra
         DataValidationError: Nếu không có bản ghi hợp lệ
     """
     weather_list = data['list']
-    rows = []
-    invalid_count = 0
     
     logger.info(f"Đang xử lý {len(weather_list)} bản ghi dữ liệu...")
     
-    for idx, record in enumerate(weather_list):
-        try:
-            # Validate record
-            if not _validate_weather_record(record, idx):
-                invalid_count += 1
-                continue
-            
-            # Extract data
-            row = _extract_weather_record(record)
-            rows.append(row)
-            
-        except (KeyError, IndexError, TypeError) as e:
-            log_warning(f"Bản ghi {idx}: Lỗi xử lý - {e}", logger)
-            invalid_count += 1
-            continue
+    # Flatten toàn bộ response một lần
+    flat = _flatten_weather_records(weather_list)
+    
+    # Validate bằng mask boolean
+    valid_mask = _validate_weather_frame(flat)
+    invalid_count = int((~valid_mask).sum())
     
     # Kiểm tra có dữ liệu hợp lệ không
-    if len(rows) == 0:
+    if not valid_mask.any():
         error_msg = "Không có bản ghi hợp lệ sau khi xử lý"
         log_error(error_msg, logger)
         raise DataValidationError(error_msg)
     
-    # Tạo DataFrame
-    df = pd.DataFrame(rows)
+    # Trích xuất dữ liệu
+    df = _extract_weather_columns(flat[valid_mask])
     
     # Log kết quả
     if invalid_count > 0:
@@ -283,7 +508,7 @@ def _parse_weather_data(data: Dict[str, Any], city_name_viet: str) -> pd.DataFra
 
 def _save_raw_data(df: pd.DataFrame, filepath: str) -> None:
     """
-    Lưu DataFrame thành file CSV.
+    Lưu DataFrame thành file (CSV/Parquet/Feather theo phần mở rộng).
     
     Args:
         df: DataFrame cần lưu
@@ -293,8 +518,7 @@ def _save_raw_data(df: pd.DataFrame, filepath: str) -> None:
         FileOperationError: Nếu không thể lưu file
     """
     try:
-        os.makedirs(os.path.dirname(filepath), exist_ok=True)
-        df.to_csv(filepath, index=False, encoding='utf-8-sig')
+        write_frame(df, filepath)
         
         file_size = df.memory_usage(deep=True).sum() / 1024
         log_success(f"Đã lưu {len(df)} dòng dữ liệu", logger)
@@ -307,24 +531,29 @@ def _save_raw_data(df: pd.DataFrame, filepath: str) -> None:
         raise FileOperationError(error_msg, filepath) from e
         
     except IOError as e:
-        error_msg = f"Lỗi I/O khi lưu file CSV: {e}"
+        error_msg = f"Lỗi I/O khi lưu file dữ liệu thô: {e}"
         log_error(error_msg, logger, exc_info=True)
         raise FileOperationError(error_msg, filepath) from e
 
 
-def fetch_weather_data(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[pd.DataFrame]:
+def fetch_weather_data(
+    city_name_viet: str = DEFAULT_CITY_VIET,
+    force_refresh: bool = False
+) -> Optional[pd.DataFrame]:
     """
-    Lấy dữ liệu thời tiết từ API OpenWeatherMap và lưu thành CSV.
+    Lấy dữ liệu thời tiết từ API OpenWeatherMap và lưu xuống đĩa.
     
     Hàm này thực hiện các bước:
     1. Xác thực API Key
-    2. Gửi request tới API với thành phố được chỉ định
+    2. Lấy response từ cache nếu còn hạn, nếu không thì gửi request tới API
     3. Xử lý response JSON
     4. Chuyển đổi thành DataFrame với nhiều metric
-    5. Lưu file CSV thô
+    5. Lưu file thô ở luồng nền (DataFrame được trả về ngay cho bước clean)
+    6. Ghi thêm response mới (không phải từ cache) vào kho lịch sử dự báo
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt (mặc định: "Hà Nội")
+        force_refresh: True để bỏ qua cache và luôn gọi API
     
     Returns:
         Optional[pd.DataFrame]: DataFrame chứa dữ liệu thô nếu thành công, 
@@ -347,7 +576,6 @@ def fetch_weather_data(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[pd.D
         WeatherAPIError: Lỗi liên quan đến API
         CityNotFoundError: Thành phố không tồn tại
         DataValidationError: Dữ liệu không hợp lệ
-        FileOperationError: Lỗi khi lưu file
         
     Examples:
         >>> df = fetch_weather_data("Hà Nội")
@@ -362,18 +590,32 @@ def fetch_weather_data(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[pd.D
         # 2. Validate và chuyển đổi tên thành phố
         city_name_en = _validate_city_name(city_name_viet)
         
-        # 3. Gửi request tới API
-        data = _make_api_request(city_name_en)
+        # 3. Lấy từ cache hoặc gửi request tới API
+        cache = get_response_cache()
+        data = None if force_refresh else cache.get(city_name_en, BASE_URL)
+        from_cache = data is not None
+        if not from_cache:
+            data = _make_api_request(city_name_en)
         
         # 4. Validate response structure
         _validate_api_response(data)
         
-        # 5. Parse dữ liệu
+        # 5. Parse dữ liệu; chỉ lưu cache response parse được ra dữ liệu
         df = _parse_weather_data(data, city_name_viet)
+        if not from_cache and not df.empty:
+            cache.set(city_name_en, BASE_URL, data)
         
-        # 6. Lưu file
+        # 6. Lưu file (bất đồng bộ, lỗi ghi được log ở luồng nền)
         raw_data_path = get_raw_data_path(city_name_viet)
-        _save_raw_data(df, raw_data_path)
+        write_frame_async(df, raw_data_path, writer=_save_raw_data)
+        
+        # 7. Ghi thêm vào kho lịch sử (chỉ response mới; lỗi chỉ được log, không làm hỏng lần tải)
+        if HISTORY_STORE_ENABLED and not from_cache:
+            issued_at = pd.Timestamp.now(tz='UTC').tz_localize(None).floor('s')
+            write_frame_async(
+                df, get_history_dir(city_name_viet),
+                writer=lambda frame, _: append_forecast(frame, city_name_viet, issued_at)
+            )
         
         return df
         
@@ -388,15 +630,26 @@ def fetch_weather_data(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[pd.D
         return None
 
 
-def fetch_multiple_cities(city_list: Optional[List[str]] = None) -> Dict[str, pd.DataFrame]:
+def fetch_multiple_cities(
+    city_list: Optional[List[str]] = None,
+    max_workers: Optional[int] = None,
+    force_refresh: bool = False
+) -> Dict[str, pd.DataFrame]:
     """
     Lấy dữ liệu thời tiết cho nhiều thành phố.
     
+    Các request được gửi song song qua một thread pool giới hạn, mỗi thành phố
+    được xử lý độc lập nên lỗi của một thành phố không ảnh hưởng các thành phố khác.
+    
     Args:
         city_list: Danh sách tên thành phố tiếng Việt. Nếu None thì lấy tất cả.
+        max_workers: Số request tối đa chạy cùng lúc (mặc định: API_MAX_CONCURRENT_REQUESTS).
+                     Truyền 1 để chạy tuần tự.
+        force_refresh: True để bỏ qua cache và luôn gọi API
     
     Returns:
         Dict[str, pd.DataFrame]: Dictionary với key là tên thành phố, value là DataFrame
+                                 (giữ nguyên thứ tự của city_list)
         
     Example:
         >>> results = fetch_multiple_cities(['Hà Nội', 'TP. Hồ Chí Minh'])
@@ -406,21 +659,43 @@ def fetch_multiple_cities(city_list: Optional[List[str]] = None) -> Dict[str, pd
     if city_list is None:
         city_list = list(VIETNAM_CITIES.keys())
     
-    logger.info(f"Bắt đầu lấy dữ liệu cho {len(city_list)} thành phố...")
+    if max_workers is None:
+        max_workers = API_MAX_CONCURRENT_REQUESTS
+    max_workers = max(1, min(max_workers, len(city_list)))
+    
+    logger.info(f"Bắt đầu lấy dữ liệu cho {len(city_list)} thành phố ({max_workers} luồng)...")
+    
+    fetched: Dict[str, Optional[pd.DataFrame]] = {}
+    
+    if max_workers == 1:
+        for city in city_list:
+            logger.info(f"\n{'='*50}")
+            logger.info(f"Đang xử lý: {city}")
+            logger.info(f"{'='*50}")
+            fetched[city] = fetch_weather_data(city, force_refresh)
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fetch') as executor:
+            futures = {executor.submit(fetch_weather_data, city, force_refresh): city for city in city_list}
+            for future in as_completed(futures):
+                city = futures[future]
+                try:
+                    fetched[city] = future.result()
+                except Exception as e:
+                    # fetch_weather_data đã tự bắt lỗi, đây chỉ là lưới an toàn
+                    log_error(f"Lỗi không xác định khi lấy dữ liệu {city}: {e}", logger, exc_info=True)
+                    fetched[city] = None
     
     results = {}
     for city in city_list:
-        logger.info(f"\n{'='*50}")
-        logger.info(f"Đang xử lý: {city}")
-        logger.info(f"{'='*50}")
-        
-        df = fetch_weather_data(city)
+        df = fetched.get(city)
         if df is not None:
             results[city] = df
         else:
             log_warning(f"Không lấy được dữ liệu cho {city}", logger)
     
     log_success(f"Hoàn thành! Lấy được dữ liệu cho {len(results)}/{len(city_list)} thành phố", logger)
+    cache_stats = get_response_cache().stats()
+    logger.info(f"Cache: {cache_stats['hits']} hit / {cache_stats['misses']} miss")
     return results
 
 
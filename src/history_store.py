@@ -0,0 +1,279 @@
+# src/history_store.py
+"""
+Module lưu lịch sử mọi bản dự báo đã tải (append-only, phân vùng theo tháng).
+
+File raw của mỗi thành phố bị ghi đè ở mỗi lần tải; module này giữ lại tất cả
+các bản dự báo để có thể xây dựng lịch sử.
+
+Bố cục thư mục (Parquet, cần pyarrow):
+    data/history/<thành_phố>/<YYYY-MM>/part-<issued_at>-<id>.parquet   ← mỗi lần ghi thêm
+    data/history/<thành_phố>/<YYYY-MM>/compacted.parquet               ← sau khi compact
+
+Chức năng:
+    - Ghi thêm (append) bản dự báo kèm thời điểm phát hành (issued_at), không sửa file cũ
+    - Phân vùng theo tháng của thời gian dự báo; đọc theo khoảng thời gian chỉ
+      mở các tháng liên quan
+    - Loại trùng theo (thành phố, thời gian dự báo, issued_at) khi đọc và khi compact
+    - Compact: gộp các file part của một tháng thành một file duy nhất
+
+Author: Weather Forecast Pro Team
+Date: 2025-12-27
+"""
+
+import os
+import uuid
+from typing import Dict, List, Optional, Sequence
+
+import pandas as pd
+
+from .column_names import RawColumns
+from .config import VIETNAM_CITIES, get_history_dir
+from .constants import PARQUET_EXTENSION
+from .logger import get_logger, log_success
+from .storage import TimeLike, write_frame
+
+
+# Logger cho module này
+logger = get_logger(__name__)
+
+CITY_COLUMN = RawColumns.CITY_NAME.value
+FORECAST_TIME_COLUMN = RawColumns.DT_TXT.value
+ISSUED_AT_COLUMN = RawColumns.ISSUED_AT.value
+
+# Khóa duy nhất của một dòng lịch sử
+HISTORY_KEY_COLUMNS = [CITY_COLUMN, FORECAST_TIME_COLUMN, ISSUED_AT_COLUMN]
+
+_PART_PREFIX = 'part-'
+_COMPACTED_FILENAME = 'compacted' + PARQUET_EXTENSION
+_MONTH_FORMAT = '%Y-%m'
+
+
+def get_partition_dir(city_name_viet: str, month: str) -> str:
+    """Thư mục phân vùng của một thành phố trong một tháng (month dạng 'YYYY-MM')."""
+    return os.path.join(get_history_dir(city_name_viet), month)
+
+
+def _write_atomic(df: pd.DataFrame, filepath: str) -> None:
+    """Ghi file Parquet qua file tạm + os.replace (người đọc không bao giờ thấy file dở)."""
+    directory, filename = os.path.split(filepath)
+    tmp_path = os.path.join(directory, f".tmp-{uuid.uuid4().hex}-{filename}")
+    try:
+        write_frame(df, tmp_path)
+        os.replace(tmp_path, filepath)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _prepare_history_frame(df: pd.DataFrame, city_name_viet: str, issued_at: pd.Timestamp) -> pd.DataFrame:
+    """Chuẩn hóa DataFrame raw để ghi vào lịch sử: thời gian dạng datetime + cột issued_at."""
+    history = df.copy()
+    history[FORECAST_TIME_COLUMN] = pd.to_datetime(history[FORECAST_TIME_COLUMN])
+    history[CITY_COLUMN] = city_name_viet
+    history[ISSUED_AT_COLUMN] = issued_at
+    return history
+
+
+def append_forecast(
+    df: pd.DataFrame,
+    city_name_viet: str,
+    issued_at: Optional[pd.Timestamp] = None
+) -> List[str]:
+    """
+    Ghi thêm một bản dự báo (DataFrame raw của fetch_weather_data) vào lịch sử.
+
+    Các dòng được chia theo tháng của thời gian dự báo; mỗi tháng nhận một file
+    part mới, file cũ không bị sửa.
+
+    Args:
+        df: DataFrame raw (có cột dt_txt)
+        city_name_viet: Tên thành phố tiếng Việt
+        issued_at: Thời điểm phát hành bản dự báo (mặc định: bây giờ, UTC, làm tròn giây)
+
+    Returns:
+        List[str]: Các file part đã được ghi
+
+    Raises:
+        FileOperationError: Nếu chưa cài pyarrow
+        OSError: Nếu không thể ghi file
+    """
+    if df.empty:
+        return []
+    if issued_at is None:
+        issued_at = pd.Timestamp.now(tz='UTC').tz_localize(None).floor('s')
+
+    history = _prepare_history_frame(df, city_name_viet, issued_at)
+    months = history[FORECAST_TIME_COLUMN].dt.strftime(_MONTH_FORMAT)
+
+    written = []
+    stamp = issued_at.strftime('%Y%m%dT%H%M%S')
+    for month, part in history.groupby(months, sort=True):
+        part_dir = get_partition_dir(city_name_viet, month)
+        os.makedirs(part_dir, exist_ok=True)
+        part_path = os.path.join(part_dir, f"{_PART_PREFIX}{stamp}-{uuid.uuid4().hex[:8]}{PARQUET_EXTENSION}")
+        _write_atomic(part, part_path)
+        written.append(part_path)
+
+    logger.info(f"🗄️ Đã lưu lịch sử {city_name_viet}: {len(history)} dòng, "
+                f"{len(written)} phân vùng (issued_at {issued_at})")
+    return written
+
+
+def list_partitions(city_name_viet: str) -> List[str]:
+    """
+    Các tháng đã có dữ liệu lịch sử của một thành phố.
+
+    Returns:
+        List[str]: Danh sách 'YYYY-MM' tăng dần
+    """
+    city_dir = get_history_dir(city_name_viet)
+    if not os.path.isdir(city_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(city_dir)
+        if not name.startswith('.') and os.path.isdir(os.path.join(city_dir, name))
+    )
+
+
+def _partition_files(part_dir: str) -> List[str]:
+    """Các file dữ liệu của một phân vùng (file compacted trước, rồi các part theo thứ tự ghi)."""
+    try:
+        names = os.listdir(part_dir)
+    except FileNotFoundError:
+        return []
+    parts = sorted(name for name in names if name.startswith(_PART_PREFIX) and name.endswith(PARQUET_EXTENSION))
+    files = [_COMPACTED_FILENAME] if _COMPACTED_FILENAME in names else []
+    return [os.path.join(part_dir, name) for name in files + parts]
+
+
+def _deduplicate(df: pd.DataFrame) -> pd.DataFrame:
+    """Bỏ dòng trùng khóa (giữ bản ghi sau cùng), sắp xếp theo thời gian dự báo rồi issued_at."""
+    df = df.drop_duplicates(subset=HISTORY_KEY_COLUMNS, keep='last')
+    return df.sort_values([FORECAST_TIME_COLUMN, ISSUED_AT_COLUMN], kind='stable').reset_index(drop=True)
+
+
+def _read_files(
+    files: List[str],
+    columns: Optional[Sequence[str]],
+    filters: Optional[List[tuple]] = None
+) -> pd.DataFrame:
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys([*HISTORY_KEY_COLUMNS, *columns]))
+    frames = [pd.read_parquet(path, columns=read_columns, filters=filters or None) for path in files]
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+
+
+def _months_in_range(start: Optional[pd.Timestamp], end: Optional[pd.Timestamp], months: List[str]) -> List[str]:
+    """Lọc các tháng giao với [start, end] (None = không giới hạn)."""
+    first = start.strftime(_MONTH_FORMAT) if start is not None else None
+    last = end.strftime(_MONTH_FORMAT) if end is not None else None
+    return [
+        month for month in months
+        if (first is None or month >= first) and (last is None or month <= last)
+    ]
+
+
+def read_history(
+    city_name_viet: str,
+    start: Optional[TimeLike] = None,
+    end: Optional[TimeLike] = None,
+    columns: Optional[Sequence[str]] = None
+) -> pd.DataFrame:
+    """
+    Đọc lịch sử dự báo của một thành phố trong khoảng thời gian dự báo [start, end].
+
+    Chỉ các phân vùng tháng giao với khoảng thời gian được mở; trong mỗi file,
+    điều kiện thời gian được đẩy xuống pyarrow (bỏ qua các row group ngoài khoảng).
+
+    Args:
+        city_name_viet: Tên thành phố tiếng Việt
+        start: Thời gian dự báo nhỏ nhất (None = không giới hạn)
+        end: Thời gian dự báo lớn nhất (None = không giới hạn)
+        columns: Chỉ đọc các cột này (luôn kèm các cột khóa)
+
+    Returns:
+        pd.DataFrame: Các dòng đã loại trùng, sắp xếp theo thời gian dự báo và issued_at
+                      (DataFrame rỗng nếu không có dữ liệu)
+    """
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    files = []
+    for month in _months_in_range(start, end, list_partitions(city_name_viet)):
+        files.extend(_partition_files(get_partition_dir(city_name_viet, month)))
+    if not files:
+        return pd.DataFrame(columns=list(columns) if columns is not None else HISTORY_KEY_COLUMNS)
+
+    filters = []
+    if start is not None:
+        filters.append((FORECAST_TIME_COLUMN, '>=', start))
+    if end is not None:
+        filters.append((FORECAST_TIME_COLUMN, '<=', end))
+
+    df = _deduplicate(_read_files(files, columns, filters))
+    if columns is not None:
+        df = df[list(dict.fromkeys([*HISTORY_KEY_COLUMNS, *columns]))]
+    return df
+
+
+def compact_partition(city_name_viet: str, month: str) -> int:
+    """
+    Gộp các file của một phân vùng tháng thành một file compacted.parquet đã loại trùng.
+
+    Chỉ xóa các part đã được gộp; part được ghi thêm trong lúc compact vẫn giữ lại
+    cho lần compact sau. Nếu bị ngắt giữa chừng, dữ liệu trùng sẽ được loại khi đọc.
+
+    Args:
+        city_name_viet: Tên thành phố tiếng Việt
+        month: Tháng dạng 'YYYY-MM'
+
+    Returns:
+        int: Số part đã được gộp (0 nếu phân vùng đã gọn)
+    """
+    part_dir = get_partition_dir(city_name_viet, month)
+    files = _partition_files(part_dir)
+    parts = [path for path in files if os.path.basename(path) != _COMPACTED_FILENAME]
+    if not parts:
+        return 0
+
+    df = _deduplicate(_read_files(files, None))
+    _write_atomic(df, os.path.join(part_dir, _COMPACTED_FILENAME))
+
+    for path in parts:
+        os.remove(path)
+
+    logger.info(f"Đã compact {city_name_viet} {month}: {len(parts)} part → {len(df)} dòng")
+    return len(parts)
+
+
+def compact_history(city_list: Optional[List[str]] = None) -> Dict[str, int]:
+    """
+    Compact tất cả phân vùng của các thành phố.
+
+    Args:
+        city_list: Danh sách thành phố (None = tất cả)
+
+    Returns:
+        Dict[str, int]: {thành phố: số part đã được gộp}
+    """
+    if city_list is None:
+        city_list = list(VIETNAM_CITIES.keys())
+
+    merged = {
+        city: sum(compact_partition(city, month) for month in list_partitions(city))
+        for city in city_list
+    }
+    log_success(f"Compact lịch sử xong: gộp {sum(merged.values())} part", logger)
+    return merged
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compact kho lịch sử dự báo")
+    parser.add_argument("--cities", nargs="+", help="Tên thành phố (mặc định: tất cả)")
+    args = parser.parse_args()
+
+    compact_history(args.cities)
@@ -0,0 +1,154 @@
+# src/image_cache.py
+"""
+Module cache ảnh biểu đồ trong bộ nhớ cho GUI.
+
+Chức năng:
+    - Giữ các ảnh đã sẵn sàng hiển thị (ví dụ ImageTk.PhotoImage) theo key
+    - Giới hạn tổng dung lượng, loại bỏ ảnh ít dùng nhất (LRU)
+    - Xóa có chọn lọc các ảnh đã cũ (ví dụ sau khi cập nhật dữ liệu một thành phố)
+    - Đếm số lần hit/miss/evict
+
+Author: Weather Forecast Pro Team
+Date: 2025-12-27
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .constants import CHART_IMAGE_CACHE_MAX_BYTES
+from .logger import get_logger
+
+
+# Logger cho module này
+logger = get_logger(__name__)
+
+
+class ImageCache:
+    """
+    Cache LRU trong bộ nhớ, giới hạn theo tổng dung lượng (byte).
+
+    Dung lượng mỗi ảnh do nơi gọi cung cấp (với ảnh RGBA: rộng x cao x 4), vì
+    cache không cần biết kiểu của đối tượng ảnh.
+
+    Example:
+        >>> cache = ImageCache(max_bytes=64 * 1024 * 1024)
+        >>> cache.put(('Hà Nội', 'main', version), photo, 1000 * 650 * 4)
+        >>> cache.get(('Hà Nội', 'main', version)) is photo
+        True
+        >>> cache.invalidate(lambda key: key[0] == 'Hà Nội')
+        1
+    """
+
+    def __init__(self, max_bytes: int = CHART_IMAGE_CACHE_MAX_BYTES):
+        """
+        Khởi tạo cache.
+
+        Args:
+            max_bytes: Tổng dung lượng tối đa của các ảnh trong cache (byte)
+        """
+        self.max_bytes = max_bytes
+
+        # key -> (ảnh, dung lượng byte), theo thứ tự dùng gần nhất ở cuối
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Lấy ảnh theo key và đánh dấu vừa được dùng.
+
+        Args:
+            key: Key của ảnh
+
+        Returns:
+            Optional[Any]: Ảnh nếu có trong cache, None nếu không
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, image: Any, nbytes: int) -> None:
+        """
+        Thêm (hoặc thay) ảnh, loại bỏ ảnh ít dùng nhất nếu vượt max_bytes.
+
+        Ảnh lớn hơn max_bytes không được lưu.
+
+        Args:
+            key: Key của ảnh
+            image: Đối tượng ảnh
+            nbytes: Dung lượng ảnh (byte)
+        """
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._total_bytes -= old[1]
+
+            if nbytes > self.max_bytes:
+                logger.debug(f"Ảnh {key} ({nbytes} byte) lớn hơn giới hạn cache, không lưu")
+                return
+
+            self._entries[key] = (image, nbytes)
+            self._total_bytes += nbytes
+
+            while self._total_bytes > self.max_bytes:
+                evicted_key, (_, evicted_bytes) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_bytes
+                self.evictions += 1
+                logger.debug(f"Đã loại bỏ ảnh khỏi cache: {evicted_key}")
+
+    def invalidate(self, match: Callable[[Hashable], bool]) -> int:
+        """
+        Xóa các ảnh có key thỏa điều kiện.
+
+        Args:
+            match: Hàm nhận key, trả về True nếu cần xóa
+
+        Returns:
+            int: Số ảnh đã xóa
+        """
+        with self._lock:
+            stale = [key for key in self._entries if match(key)]
+            for key in stale:
+                self._total_bytes -= self._entries.pop(key)[1]
+            return len(stale)
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache và reset bộ đếm."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Lấy thống kê sử dụng cache.
+
+        Returns:
+            Dict: entries, bytes, max_bytes, hits, misses, evictions và hit_rate
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            }
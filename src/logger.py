@@ -16,6 +16,7 @@ import logging
 import sys
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
+from .config import LOG_TO_STDERR
 from .constants import (
     LOG_FILENAME, LOG_MAX_BYTES, LOG_BACKUP_COUNT,
     LOG_FORMAT, LOG_DATE_FORMAT,
@@ -114,7 +115,7 @@ def setup_logger(
     
     # ===== CONSOLE HANDLER =====
     if console_output:
-        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler = logging.StreamHandler(sys.stderr if LOG_TO_STDERR else sys.stdout)
         console_handler.setLevel(level)
         
         # Sử dụng ColoredFormatter cho console
@@ -7,27 +7,42 @@ Chức năng:
     - Tìm thành phố có nhiệt độ cao nhất/thấp nhất
     - Phân tích xu hướng chung
     - Tạo báo cáo so sánh
+    - Gộp nhiều thành phố thành bảng dạng dài và tổng hợp bằng groupby
 
 Author: Weather Forecast Pro Team
 Date: 2025-12-27
 """
 
 import pandas as pd
+import numpy as np
 import os
-from typing import Dict, List, Optional
-from .config import get_processed_data_path, VIETNAM_CITIES
+import sqlite3
+from typing import Any, Dict, List, Optional, Tuple
+from . import weather_db
+from .config import get_processed_data_path, VIETNAM_CITIES, WEATHER_DATABASE_ENABLED, COMPACT_DTYPES_ENABLED
+from .column_names import CleanColumns
 from .statistics import calculate_statistics, analyze_trend
-from .logger import get_logger
+from .logger import get_logger, log_warning
+from .storage import (
+    read_frame_cached, resolve_data_path, load_processed_data, processed_data_version,
+    to_compact_dtypes, flush_pending_writes
+)
 
 
 # Logger for module
 logger = get_logger(__name__)
 
+# Cột thành phố trong bảng dạng dài
+CITY_COLUMN = CleanColumns.THANH_PHO.value
+
 
 def load_multiple_cities_data(city_list: List[str]) -> Dict[str, pd.DataFrame]:
     """
     Load dữ liệu từ nhiều thành phố.
     
+    File chưa thay đổi kể từ lần đọc trước được lấy lại từ cache trong bộ nhớ
+    (xem storage.read_frame_cached), không parse lại.
+    
     Args:
         city_list: Danh sách tên thành phố tiếng Việt
     
@@ -38,11 +53,10 @@ def load_multiple_cities_data(city_list: List[str]) -> Dict[str, pd.DataFrame]:
     data_dict = {}
     
     for city in city_list:
-        processed_path = get_processed_data_path(city)
+        processed_path = resolve_data_path(get_processed_data_path, city)
         if os.path.exists(processed_path):
             try:
-                df = pd.read_csv(processed_path)
-                df['Thời Gian'] = pd.to_datetime(df['Thời Gian'])
+                df = read_frame_cached(processed_path)
                 data_dict[city] = df
                 logger.info("Đã load dữ liệu %s: %d mốc", city, len(df))
             except Exception as e:
@@ -53,85 +67,220 @@ def load_multiple_cities_data(city_list: List[str]) -> Dict[str, pd.DataFrame]:
     return data_dict
 
 
-def compare_cities_statistics(city_list: List[str], metric: str = 'Nhiệt Độ') -> pd.DataFrame:
+# Các phép tổng hợp cho mỗi metric, tính cho tất cả metric trong một lần groupby
+PANEL_AGGREGATIONS = ['mean', 'min', 'max', 'median', 'std', 'count', 'size']
+
+# Tên cột hiển thị trong bảng so sánh
+COMPARISON_LABELS = {
+    'mean': 'Trung Bình',
+    'min': 'Tối Thiểu',
+    'max': 'Tối Đa',
+    'median': 'Trung Vị',
+    'std': 'Độ Lệch Chuẩn',
+    'size': 'Số Mốc',
+}
+
+
+def _select_cities_data(
+    city_list: List[str],
+    data: Optional[Dict[str, pd.DataFrame]]
+) -> Dict[str, pd.DataFrame]:
+    """Lấy dữ liệu của city_list từ data đã load sẵn, hoặc load mới nếu data là None."""
+    if data is None:
+        return load_multiple_cities_data(city_list)
+    return {city: data[city] for city in city_list if city in data}
+
+
+def _concat_column(frames: List[pd.DataFrame], column: str) -> Any:
+    """Nối một cột của nhiều DataFrame; DataFrame thiếu cột được điền NaN."""
+    parts = [
+        df[column].to_numpy() if column in df.columns else np.full(len(df), np.nan)
+        for df in frames
+    ]
+    if not parts:
+        return np.array([], dtype=np.float64)
+    try:
+        return np.concatenate(parts)
+    except TypeError:
+        # Kiểu không tương thích (ví dụ datetime với NaN) → để pandas tự chọn kiểu chung
+        return pd.concat([pd.Series(part) for part in parts], ignore_index=True)
+
+
+def build_city_panel(
+    data: Dict[str, pd.DataFrame],
+    metrics: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Gộp dữ liệu nhiều thành phố thành một bảng dạng dài (long format).
+    
+    Mỗi dòng là một mốc thời gian của một thành phố; cột 'Thành Phố' có kiểu
+    categorical (thứ tự category = thứ tự trong data) nên groupby theo thành
+    phố không phải so sánh chuỗi. Các cột được nối trực tiếp ở mức mảng NumPy
+    (nhanh hơn nhiều so với pd.concat từng DataFrame khi có hàng nghìn trạm).
+    
+    Args:
+        data: {thành phố: DataFrame} (kết quả của load_multiple_cities_data)
+        metrics: Chỉ giữ các cột này (None = tất cả các cột). Thành phố thiếu cột
+                 sẽ có giá trị NaN ở cột đó
+    
+    Returns:
+        pd.DataFrame: Bảng dài với cột 'Thành Phố' + các cột metric
+                      (kiểu gọn COMPACT_CLEAN_DTYPES nếu COMPACT_DTYPES_ENABLED)
+    """
+    cities = list(data)
+    frames = [data[city] for city in cities]
+    
+    if metrics is None:
+        metrics = list(dict.fromkeys(
+            col for df in frames for col in df.columns if col != CITY_COLUMN
+        ))
+    
+    codes = np.repeat(np.arange(len(cities)), [len(df) for df in frames])
+    panel = {CITY_COLUMN: pd.Categorical.from_codes(codes, categories=cities)}
+    for metric in metrics:
+        panel[metric] = _concat_column(frames, metric)
+    
+    df = pd.DataFrame(panel)
+    return to_compact_dtypes(df) if COMPACT_DTYPES_ENABLED else df
+
+
+def summarize_panel(
+    panel: pd.DataFrame,
+    metrics: List[str],
+    aggregations: Optional[List[str]] = None
+) -> pd.DataFrame:
+    """
+    Tính thống kê của tất cả metric cho tất cả thành phố bằng một lần groupby().agg().
+    
+    Args:
+        panel: Bảng dài từ build_city_panel
+        metrics: Các metric cần tổng hợp
+        aggregations: Các phép tổng hợp (mặc định: PANEL_AGGREGATIONS)
+    
+    Returns:
+        pd.DataFrame: Index là thành phố, cột MultiIndex (metric, phép tổng hợp).
+                      Kết quả float32 (schema gọn) được nâng lên float64 để làm tròn hiển thị đúng
+    """
+    if aggregations is None:
+        aggregations = PANEL_AGGREGATIONS
+    metrics = [metric for metric in metrics if metric in panel.columns]
+    summary = panel.groupby(CITY_COLUMN, observed=True, sort=True)[metrics].agg(aggregations)
+    widen = {col: np.float64 for col, dtype in summary.dtypes.items() if dtype == np.float32}
+    return summary.astype(widen) if widen else summary
+
+
+def _metric_summary(summary: pd.DataFrame, metric: str) -> pd.DataFrame:
+    """Lấy thống kê của một metric, bỏ các thành phố không có dữ liệu cho metric đó."""
+    if metric not in summary.columns.get_level_values(0):
+        return pd.DataFrame()
+    
+    metric_stats = summary[metric]
+    missing = metric_stats.index[metric_stats['count'] == 0]
+    if len(missing) > 0:
+        logger.warning("Cột '%s' không có dữ liệu cho: %s", metric, ', '.join(map(str, missing)))
+        metric_stats = metric_stats.drop(index=missing)
+    
+    return metric_stats
+
+
+def _comparison_from_summary(summary: pd.DataFrame, metric: str) -> pd.DataFrame:
+    """Tạo bảng so sánh một metric (sắp xếp theo trung bình giảm dần) từ kết quả summarize_panel."""
+    metric_stats = _metric_summary(summary, metric)
+    if metric_stats.empty:
+        return pd.DataFrame()
+    
+    result_df = metric_stats[list(COMPARISON_LABELS)].rename(columns=COMPARISON_LABELS)
+    result_df = result_df.round(2).rename_axis(CITY_COLUMN).reset_index()
+    result_df[CITY_COLUMN] = result_df[CITY_COLUMN].astype(str)
+    result_df = result_df.sort_values('Trung Bình', ascending=False)
+    
+    return result_df
+
+
+def _extremes_from_summary(summary: pd.DataFrame, metric: str) -> Dict[str, str]:
+    """Tìm thành phố có trung bình cao nhất/thấp nhất từ kết quả summarize_panel."""
+    metric_stats = _metric_summary(summary, metric)
+    if metric_stats.empty:
+        return {}
+    
+    means = metric_stats['mean']
+    max_city = means.idxmax()
+    min_city = means.idxmin()
+    
+    return {
+        'Cao Nhất': f"{max_city} ({means[max_city]:.2f})",
+        'Thấp Nhất': f"{min_city} ({means[min_city]:.2f})"
+    }
+
+
+def _summarize_cities(
+    city_list: List[str],
+    metrics: List[str],
+    data: Optional[Dict[str, pd.DataFrame]]
+) -> pd.DataFrame:
+    """Load (nếu cần), gộp thành bảng dài và tổng hợp các metric cho city_list."""
+    data_dict = _select_cities_data(city_list, data)
+    if len(data_dict) == 0:
+        return pd.DataFrame()
+    
+    panel = build_city_panel(data_dict, metrics)
+    return summarize_panel(panel, metrics)
+
+
+def compare_cities_statistics(
+    city_list: List[str],
+    metric: str = 'Nhiệt Độ',
+    data: Optional[Dict[str, pd.DataFrame]] = None
+) -> pd.DataFrame:
     """
     So sánh thống kê một metric giữa các thành phố.
     
     Args:
         city_list: Danh sách tên thành phố tiếng Việt
         metric: Metric cần so sánh (tiếng Việt: 'Nhiệt Độ', 'Độ Ẩm', 'Tốc Gió', 'Áp Suất')
+        data: Dữ liệu đã load sẵn (kết quả của load_multiple_cities_data).
+              None = tự load cho city_list
     
     Returns:
         pd.DataFrame: DataFrame chứa thống kê của các thành phố
     """
     
-    data_dict = load_multiple_cities_data(city_list)
+    summary = _summarize_cities(city_list, [metric], data)
     
-    if len(data_dict) == 0:
+    if summary.empty:
         logger.error("Không có dữ liệu để so sánh")
         return pd.DataFrame()
     
-    stats_list = []
-    
-    for city, df in data_dict.items():
-        # Validate column exists
-        if metric not in df.columns:
-            logger.warning("Cột '%s' không tồn tại trong dữ liệu %s", metric, city)
-            continue
-        
-        stats_list.append({
-            'Thành Phố': city,
-            'Trung Bình': round(df[metric].mean(), 2),
-            'Tối Thiểu': round(df[metric].min(), 2),
-            'Tối Đa': round(df[metric].max(), 2),
-            'Trung Vị': round(df[metric].median(), 2),
-            'Độ Lệch Chuẩn': round(df[metric].std(), 2),
-            'Số Mốc': len(df)
-        })
-    
-    if len(stats_list) == 0:
+    result_df = _comparison_from_summary(summary, metric)
+    if result_df.empty:
         logger.error("Không có dữ liệu hợp lệ để tạo thống kê")
-        return pd.DataFrame()
-    
-    result_df = pd.DataFrame(stats_list)
-    result_df = result_df.sort_values('Trung Bình', ascending=False)
     
     return result_df
 
 
-def find_extreme_cities(city_list: List[str], metric: str = 'Nhiệt Độ') -> Dict[str, str]:
+def find_extreme_cities(
+    city_list: List[str],
+    metric: str = 'Nhiệt Độ',
+    data: Optional[Dict[str, pd.DataFrame]] = None
+) -> Dict[str, str]:
     """
     Tìm thành phố có giá trị cao nhất và thấp nhất cho một metric.
     
     Args:
         city_list: Danh sách tên thành phố tiếng Việt
         metric: Metric cần so sánh
+        data: Dữ liệu đã load sẵn (None = tự load cho city_list)
     
     Returns:
         Dict[str, str]: Dictionary chứa thành phố cao nhất và thấp nhất
     """
     
-    data_dict = load_multiple_cities_data(city_list)
+    summary = _summarize_cities(city_list, [metric], data)
     
-    if len(data_dict) == 0:
+    if summary.empty:
         return {}
     
-    city_averages = {}
-    
-    for city, df in data_dict.items():
-        if metric in df.columns:
-            city_averages[city] = df[metric].mean()
-    
-    if len(city_averages) == 0:
-        return {}
-    
-    max_city = max(city_averages, key=city_averages.get)
-    min_city = min(city_averages, key=city_averages.get)
-    
-    return {
-        'Cao Nhất': f"{max_city} ({city_averages[max_city]:.2f})",
-        'Thấp Nhất': f"{min_city} ({city_averages[min_city]:.2f})"
-    }
+    return _extremes_from_summary(summary, metric)
 
 
 def print_comparison_report(city_list: List[str]) -> None:
@@ -148,19 +297,20 @@ def print_comparison_report(city_list: List[str]) -> None:
 
     logger.info("📍 Các thành phố được so sánh: %s\n", ', '.join(city_list))
     
-    # So sánh từng metric
+    # So sánh từng metric: load một lần, tổng hợp tất cả metric bằng một lần groupby
     metrics = ['Nhiệt Độ', 'Độ Ẩm', 'Tốc Gió']
+    summary = _summarize_cities(city_list, metrics, None)
     
     for metric in metrics:
         logger.info("%s", "\n" + "="*80)
         logger.info("🌡️ SO SÁNH %s", metric.upper())
         logger.info("%s", "="*80)
         
-        comparison_df = compare_cities_statistics(city_list, metric)
+        comparison_df = _comparison_from_summary(summary, metric) if not summary.empty else pd.DataFrame()
         if not comparison_df.empty:
             logger.info('\n%s', comparison_df.to_string(index=False))
 
-            extremes = find_extreme_cities(city_list, metric)
+            extremes = _extremes_from_summary(summary, metric)
             if extremes:
                 logger.info('\n🏆 Thành phố %s:', metric)
                 logger.info('   • Cao nhất: %s', extremes['Cao Nhất'])
@@ -171,19 +321,66 @@ def print_comparison_report(city_list: List[str]) -> None:
     logger.info("%s", "\n" + "="*80 + "\n")
 
 
-def get_city_ranking(city_list: List[str], metric: str = 'Nhiệt Độ') -> pd.DataFrame:
+def _ranking_from_database(city_list: List[str], metric: str) -> pd.DataFrame:
+    """
+    Bảng so sánh (Thành Phố, Trung Bình, Tối Thiểu, Tối Đa) từ truy vấn SQL, giảm dần theo trung bình.
+    
+    Chờ các lần ghi nền (file + cơ sở dữ liệu) xong trước khi truy vấn; thành phố
+    chưa có trong cơ sở dữ liệu được tổng hợp từ file dữ liệu sạch.
+    """
+    aggregations = ['mean', 'min', 'max', 'count']
+    flush_pending_writes()
+    try:
+        summary = weather_db.aggregate(city_list, [metric], aggregations)
+    except sqlite3.Error as e:
+        log_warning(f"Không thể truy vấn cơ sở dữ liệu, đọc từ file: {e}", logger)
+        return compare_cities_statistics(city_list, metric)
+    
+    missing = [city for city in city_list if city not in summary.index]
+    if missing:
+        logger.info("Chưa có trong cơ sở dữ liệu, đọc từ file: %s", ', '.join(missing))
+        data = load_multiple_cities_data(missing)
+        if data:
+            from_files = summarize_panel(build_city_panel(data, [metric]), [metric], aggregations)
+            from_files.index = from_files.index.astype(str)
+            summary = pd.concat([summary, from_files]) if not summary.empty else from_files
+    
+    metric_stats = _metric_summary(summary, metric)
+    if metric_stats.empty:
+        logger.error("Không có dữ liệu để so sánh")
+        return pd.DataFrame()
+    
+    labels = {agg: COMPARISON_LABELS[agg] for agg in ('mean', 'min', 'max')}
+    result_df = metric_stats[list(labels)].rename(columns=labels)
+    result_df = result_df.round(2).rename_axis(CITY_COLUMN).reset_index()
+    return result_df.sort_values('Trung Bình', ascending=False)
+
+
+def get_city_ranking(
+    city_list: List[str],
+    metric: str = 'Nhiệt Độ',
+    data: Optional[Dict[str, pd.DataFrame]] = None
+) -> pd.DataFrame:
     """
     Xếp hạng các thành phố theo một metric.
     
     Args:
         city_list: Danh sách tên thành phố tiếng Việt
         metric: Metric để xếp hạng
+        data: Dữ liệu đã load sẵn (None = tự load cho city_list)
     
     Returns:
         pd.DataFrame: DataFrame xếp hạng các thành phố
+    
+    Note:
+        Khi bật WEATHER_DATABASE và data là None, thống kê được tính bằng truy vấn
+        tổng hợp SQL (không đọc DataFrame của các thành phố).
     """
     
-    comparison_df = compare_cities_statistics(city_list, metric)
+    if data is None and WEATHER_DATABASE_ENABLED:
+        comparison_df = _ranking_from_database(city_list, metric)
+    else:
+        comparison_df = compare_cities_statistics(city_list, metric, data)
     
     if comparison_df.empty:
         return pd.DataFrame()
@@ -194,12 +391,114 @@ def get_city_ranking(city_list: List[str], metric: str = 'Nhiệt Độ') -> pd.
     return comparison_df
 
 
-if __name__ == "__main__":
-    # Chạy thử
-    cities = ["Hà Nội", "TP. Hồ Chí Minh", "Đà Nẵng"]
-    print_comparison_report(cities)
+# Các metric và phép tổng hợp của bảng tổng quan (tab Tổng Quan trong GUI)
+OVERVIEW_METRICS = ['Nhiệt Độ', 'Độ Ẩm', 'Tốc Gió', 'Áp Suất']
+OVERVIEW_AGGREGATIONS = ['mean', 'max', 'min', 'count']
+
+
+class OverviewModel:
+    """
+    Bảng tổng quan mean/max/min của các metric cho nhiều thành phố, có cache.
+
+    Mỗi thành phố được đọc một lần (chỉ các cột metric) và tổng hợp tất cả metric
+    trong một lần groupby. Kết quả được giữ theo phiên bản file dữ liệu sạch
+    (đường dẫn, mtime, kích thước): lần refresh sau chỉ đọc lại các thành phố có
+    file thay đổi. Khi bật WEATHER_DATABASE, các thành phố thay đổi được tổng hợp
+    bằng một truy vấn SQL; thành phố chưa có trong cơ sở dữ liệu vẫn đọc từ file.
+
+    Example:
+        >>> model = OverviewModel()
+        >>> summary = model.refresh(['Hà Nội', 'Đà Nẵng'])
+        >>> summary['Nhiệt Độ']['mean']
+        >>> model.refresh(['Hà Nội', 'Đà Nẵng'])   # không đọc lại file nào
+        >>> model.last_reloaded
+        []
+    """
+
+    def __init__(self, metrics: Optional[List[str]] = None):
+        """
+        Khởi tạo model.
+
+        Args:
+            metrics: Các metric cần tổng hợp (mặc định: OVERVIEW_METRICS)
+        """
+        self.metrics = list(metrics) if metrics is not None else list(OVERVIEW_METRICS)
+        self.last_reloaded: List[str] = []
+
+        self._versions: Dict[str, Tuple[str, int, int]] = {}
+        self._summary = pd.DataFrame()
+
+    def _aggregate_from_database(self, cities: List[str]) -> pd.DataFrame:
+        """Tổng hợp các thành phố bằng SQL (DataFrame rỗng nếu lỗi cơ sở dữ liệu)."""
+        try:
+            return weather_db.aggregate(cities, self.metrics, OVERVIEW_AGGREGATIONS)
+        except sqlite3.Error as e:
+            log_warning(f"Không thể truy vấn cơ sở dữ liệu, đọc từ file: {e}", logger)
+            return pd.DataFrame()
+
+    def _load_changed(self, cities: List[str]) -> pd.DataFrame:
+        """Đọc và tổng hợp các thành phố có dữ liệu thay đổi."""
+        from_database = pd.DataFrame()
+        if WEATHER_DATABASE_ENABLED and cities:
+            from_database = self._aggregate_from_database(cities)
+            cities = [city for city in cities if city not in from_database.index]
+            if not cities:
+                return from_database
+
+        data = {}
+        for city in cities:
+            try:
+                data[city] = load_processed_data(city, columns=self.metrics)
+            except Exception as e:
+                log_warning(f"Bỏ qua {city} trong bảng tổng quan: {e}", logger)
+
+        if not data:
+            return from_database
+
+        summary = summarize_panel(build_city_panel(data, self.metrics), self.metrics,
+                                  OVERVIEW_AGGREGATIONS)
+        summary.index = summary.index.astype(str)
+        return pd.concat([from_database, summary]) if not from_database.empty else summary
+
+    def refresh(self, city_list: List[str]) -> pd.DataFrame:
+        """
+        Cập nhật bảng tổng quan cho city_list.
+
+        Args:
+            city_list: Danh sách thành phố cần hiển thị
+
+        Returns:
+            pd.DataFrame: Index là thành phố (theo thứ tự city_list, bỏ thành phố
+                          không có dữ liệu), cột MultiIndex (metric, mean/max/min/count)
+        """
+        versions = {city: processed_data_version(city) for city in city_list}
 
+        # Thành phố đã mất file dữ liệu → bỏ khỏi cache
+        removed = [city for city, version in versions.items() if version is None and city in self._versions]
+        versions = {city: version for city, version in versions.items() if version is not None}
+        changed = [city for city, version in versions.items() if self._versions.get(city) != version]
 
+        if changed or removed:
+            fresh = self._load_changed(changed)
+            kept = self._summary.drop(index=changed + removed, errors='ignore')
+            frames = [frame for frame in (kept, fresh) if not frame.empty]
+            self._summary = pd.concat(frames) if frames else pd.DataFrame()
 
+            for city in removed:
+                del self._versions[city]
+            for city in changed:
+                if city in fresh.index:
+                    self._versions[city] = versions[city]
+                else:
+                    self._versions.pop(city, None)
 
+            logger.info("Bảng tổng quan: đọc lại %d/%d thành phố", len(changed), len(versions))
 
+        self.last_reloaded = changed
+        return self._summary.reindex([city for city in city_list if city in self._summary.index])
+
+
+if __name__ == "__main__":
+    # Chạy thử
+    cities = ["Hà Nội", "TP. Hồ Chí Minh", "Đà Nẵng"]
+    print_comparison_report(cities)
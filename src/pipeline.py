@@ -0,0 +1,233 @@
+# src/pipeline.py
+"""
+Module cập nhật dữ liệu cho nhiều thành phố (tải → làm sạch → vẽ biểu đồ).
+
+Chức năng:
+    - Chạy pipeline của mỗi thành phố trên một thread pool có quản lý,
+      các thành phố chạy đồng thời nên thời gian tổng ~ thành phố chậm nhất
+    - Báo tiến độ từng thành phố qua callback (GUI chuyển về thread Tk bằng root.after)
+    - Hỗ trợ hủy: thành phố chưa bắt đầu bị bỏ, thành phố đang chạy dừng
+      trước stage kế tiếp
+    - Lỗi của một thành phố không ảnh hưởng các thành phố khác
+
+Author: Weather Forecast Pro Team
+Date: 2025-12-27
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional
+
+from . import data_cleaner as cleaner
+from . import data_loader as loader
+from .config import VIETNAM_CITIES
+from .constants import API_MAX_CONCURRENT_REQUESTS, CHART_RENDER_MAX_WORKERS
+from .logger import get_logger, log_success, log_warning
+
+
+# Logger cho module này
+logger = get_logger(__name__)
+
+# Các stage của pipeline một thành phố, theo thứ tự
+PIPELINE_STAGES = ('fetch', 'clean', 'render')
+
+# Trạng thái kết thúc của một thành phố
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+STATUS_CANCELLED = 'cancelled'
+
+# Nhãn hiển thị cho stage/trạng thái
+STAGE_LABELS = {
+    'fetch': 'Đang tải dữ liệu',
+    'clean': 'Đang xử lý dữ liệu',
+    'render': 'Đang vẽ biểu đồ',
+    STATUS_DONE: 'Hoàn tất',
+    STATUS_FAILED: 'Lỗi',
+    STATUS_CANCELLED: 'Đã hủy',
+}
+
+# Callback tiến độ: (thành phố, stage hoặc trạng thái kết thúc)
+ProgressCallback = Callable[[str, str], None]
+
+# Thread điều phối các lần cập nhật chạy nền (không block thread gọi, ví dụ GUI)
+_pipeline_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pipeline')
+
+
+def _notify(on_progress: Optional[ProgressCallback], city: str, stage: str) -> None:
+    """Gọi callback tiến độ; lỗi trong callback không làm hỏng pipeline."""
+    if on_progress is None:
+        return
+    try:
+        on_progress(city, stage)
+    except Exception as e:
+        logger.warning(f"Lỗi trong callback tiến độ ({city}, {stage}): {e}")
+
+
+def refresh_city(
+    city_name_viet: str,
+    force_refresh: bool = False,
+    render_workers: Optional[int] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Dict[str, Any]:
+    """
+    Chạy pipeline tải → làm sạch → vẽ biểu đồ cho một thành phố.
+
+    Args:
+        city_name_viet: Tên thành phố tiếng Việt
+        force_refresh: True để bỏ qua cache response API
+        render_workers: Số process vẽ biểu đồ (xem render_city_charts)
+        on_progress: Callback (thành phố, stage) khi bắt đầu mỗi stage và khi kết thúc
+        cancel_event: Đặt event này để dừng trước stage kế tiếp
+
+    Returns:
+        Dict[str, Any]: {'status': done/failed/cancelled, 'stage': stage cuối cùng,
+                         'charts': {tên biểu đồ: đường dẫn hoặc None (vẽ lỗi)},
+                         'error': thông báo lỗi hoặc None, 'seconds': thời gian chạy,
+                         'timings': {stage: thời gian chạy stage (giây)}}
+    """
+    start = time.perf_counter()
+    result: Dict[str, Any] = {
+        'status': STATUS_DONE, 'stage': None, 'charts': {}, 'error': None, 'seconds': 0.0,
+        'timings': {}
+    }
+
+    def finish(status: str, error: Optional[str] = None) -> Dict[str, Any]:
+        result['status'] = status
+        result['error'] = error
+        result['seconds'] = time.perf_counter() - start
+        _notify(on_progress, city_name_viet, status)
+        return result
+
+    df = None
+    try:
+        for stage in PIPELINE_STAGES:
+            if cancel_event is not None and cancel_event.is_set():
+                return finish(STATUS_CANCELLED)
+
+            result['stage'] = stage
+            _notify(on_progress, city_name_viet, stage)
+            stage_start = time.perf_counter()
+
+            try:
+                if stage == 'fetch':
+                    df = loader.fetch_weather_data(city_name_viet, force_refresh)
+                elif stage == 'clean':
+                    df = cleaner.clean_data(city_name_viet, df=df)
+                else:
+                    # Import khi cần: render_scheduler kéo theo matplotlib/seaborn
+                    from .render_scheduler import render_city_charts
+
+                    # Biểu đồ lỗi không làm hỏng cả thành phố (dữ liệu đã cập nhật xong)
+                    result['charts'] = render_city_charts(city_name_viet, df, max_workers=render_workers)
+            finally:
+                result['timings'][stage] = time.perf_counter() - stage_start
+
+            if df is None:
+                error = "Không lấy được dữ liệu từ API" if stage == 'fetch' else "Lỗi xử lý dữ liệu"
+                return finish(STATUS_FAILED, error)
+
+    except Exception as e:
+        logger.error(f"Lỗi khi cập nhật {city_name_viet} ({result['stage']}): {e}", exc_info=True)
+        return finish(STATUS_FAILED, str(e))
+
+    return finish(STATUS_DONE)
+
+
+def refresh_all_cities(
+    city_list: Optional[List[str]] = None,
+    max_workers: Optional[int] = None,
+    force_refresh: bool = False,
+    on_progress: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Cập nhật dữ liệu và biểu đồ cho nhiều thành phố đồng thời.
+
+    Mỗi thành phố là một job độc lập trên thread pool: phần tải dữ liệu (chờ
+    mạng) của các thành phố chồng lên nhau, biểu đồ được vẽ trên process pool
+    dùng chung của render_scheduler.
+
+    Args:
+        city_list: Danh sách tên thành phố tiếng Việt (None = tất cả)
+        max_workers: Số thành phố chạy cùng lúc (mặc định: API_MAX_CONCURRENT_REQUESTS)
+        force_refresh: True để bỏ qua cache response API
+        on_progress: Callback (thành phố, stage) - được gọi từ thread của pool
+        cancel_event: Đặt event này để hủy các thành phố chưa xong
+
+    Returns:
+        Dict[str, Dict[str, Any]]: {thành phố: kết quả refresh_city}, theo thứ tự city_list
+
+    Example:
+        >>> results = refresh_all_cities(['Hà Nội', 'Đà Nẵng'])
+        >>> results['Hà Nội']['status']
+        'done'
+    """
+    if city_list is None:
+        city_list = list(VIETNAM_CITIES.keys())
+    if not city_list:
+        return {}
+
+    if max_workers is None:
+        max_workers = API_MAX_CONCURRENT_REQUESTS
+    max_workers = max(1, min(max_workers, len(city_list)))
+
+    # Cố định số process vẽ để mọi thành phố dùng chung một process pool
+    render_workers = min(CHART_RENDER_MAX_WORKERS, os.cpu_count() or 1)
+
+    logger.info(f"🌏 Cập nhật {len(city_list)} thành phố ({max_workers} luồng)...")
+    start = time.perf_counter()
+
+    results: Dict[str, Dict[str, Any]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='refresh') as executor:
+        futures = {
+            executor.submit(refresh_city, city, force_refresh, render_workers,
+                            on_progress, cancel_event): city
+            for city in city_list
+        }
+        for future in as_completed(futures):
+            city = futures[future]
+            try:
+                results[city] = future.result()
+            except Exception as e:
+                # refresh_city đã tự bắt lỗi, đây chỉ là lưới an toàn
+                logger.error(f"Lỗi không xác định khi cập nhật {city}: {e}", exc_info=True)
+                results[city] = {'status': STATUS_FAILED, 'stage': None, 'charts': {},
+                                 'error': str(e), 'seconds': 0.0, 'timings': {}}
+
+    results = {city: results[city] for city in city_list}
+
+    counts = {status: 0 for status in (STATUS_DONE, STATUS_FAILED, STATUS_CANCELLED)}
+    for result in results.values():
+        counts[result['status']] += 1
+    summary = (f"{counts[STATUS_DONE]}/{len(city_list)} thành phố thành công, "
+               f"{counts[STATUS_FAILED]} lỗi, {counts[STATUS_CANCELLED]} đã hủy "
+               f"({time.perf_counter() - start:.1f}s)")
+    if counts[STATUS_DONE] == len(city_list):
+        log_success(f"Cập nhật xong: {summary}", logger)
+    else:
+        log_warning(f"Cập nhật kết thúc: {summary}", logger)
+
+    return results
+
+
+def start_refresh_all(
+    city_list: Optional[List[str]] = None,
+    max_workers: Optional[int] = None,
+    force_refresh: bool = False,
+    on_progress: Optional[ProgressCallback] = None,
+    cancel_event: Optional[threading.Event] = None
+) -> Future:
+    """
+    Chạy refresh_all_cities ở thread nền, trả về ngay.
+
+    Các lần gọi liên tiếp được xếp hàng (chạy lần lượt, không chồng lên nhau).
+
+    Returns:
+        Future: Kết quả là dict của refresh_all_cities
+    """
+    return _pipeline_executor.submit(
+        refresh_all_cities, city_list, max_workers, force_refresh, on_progress, cancel_event
+    )
@@ -13,9 +13,12 @@ Date: 2025-12-27
 
 import matplotlib.pyplot as plt
 import matplotlib
+import numpy as np
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Dict, Iterator, Optional, Tuple
 import os
+import threading
 
 from .constants import (
     DEFAULT_FIGSIZE, DEFAULT_DPI,
@@ -30,6 +33,9 @@ from .exceptions import ChartGenerationError
 # Logger cho module này
 logger = get_logger(__name__)
 
+# Đích chụp ảnh trong bộ nhớ của thread hiện tại (xem capture_figure)
+_capture_state = threading.local()
+
 
 def setup_vietnamese_font() -> None:
     """
@@ -193,20 +199,85 @@ def format_secondary_axis_labels(
     ax.tick_params(axis='y', labelsize=FONT_SIZE_TICK)
 
 
+@contextmanager
+def capture_figure(size_px: Tuple[int, int]) -> Iterator[Dict[str, Any]]:
+    """
+    Chuyển save_plot_with_config sang chế độ vẽ vào bộ nhớ.
+
+    Trong khối with, các hàm vẽ gọi save_plot_with_config sẽ không ghi file mà
+    render figure ra mảng RGBA đúng kích thước size_px (không cần resample khi
+    hiển thị). Chỉ áp dụng cho thread hiện tại.
+
+    Args:
+        size_px: (rộng, cao) tính bằng pixel
+
+    Yields:
+        Dict[str, Any]: {'size': size_px, 'image': mảng RGBA (cao x rộng x 4) hoặc None}
+
+    Example:
+        >>> with capture_figure((1000, 650)) as target:
+        ...     create_weather_chart('Hà Nội', df)
+        >>> target['image'].shape
+        (650, 1000, 4)
+    """
+    previous = getattr(_capture_state, 'target', None)
+    target: Dict[str, Any] = {'size': tuple(size_px), 'image': None}
+    _capture_state.target = target
+    try:
+        yield target
+    finally:
+        _capture_state.target = previous
+
+
+def is_capturing() -> bool:
+    """True nếu thread hiện tại đang ở trong khối capture_figure."""
+    return getattr(_capture_state, 'target', None) is not None
+
+
+def _render_to_buffer(fig: plt.Figure, target: Dict[str, Any], facecolor: str) -> None:
+    """
+    Vẽ figure ra mảng RGBA đúng target['size'].
+
+    Giữ nguyên chiều rộng (inch) để cỡ chữ tương đương ảnh lưu file, đổi chiều
+    cao theo tỉ lệ hiển thị rồi chọn DPI sao cho số pixel khớp chính xác.
+    """
+    width_px, height_px = target['size']
+    width_in = fig.get_figwidth()
+    dpi = width_px / width_in
+
+    fig.set_dpi(dpi)
+    fig.set_size_inches(width_px / dpi, height_px / dpi)
+    if facecolor != 'auto':
+        fig.patch.set_facecolor(facecolor)
+    fig.tight_layout()
+    fig.canvas.draw()
+
+    image = np.asarray(fig.canvas.buffer_rgba())
+    if image.shape[:2] != (height_px, width_px):
+        raise ChartGenerationError(
+            f"Kích thước ảnh {image.shape[1]}x{image.shape[0]} khác yêu cầu {width_px}x{height_px}"
+        )
+    target['image'] = image.copy()
+
+
 def save_plot_with_config(
     fig: plt.Figure,
     filepath: str,
     dpi: Optional[int] = None,
-    close_after_save: bool = True
+    close_after_save: bool = True,
+    facecolor: str = 'white'
 ) -> bool:
     """
     Lưu biểu đồ với cấu hình chuẩn và xử lý lỗi.
     
+    Trong khối capture_figure, figure được render vào bộ nhớ thay vì ghi file.
+    
     Args:
         fig: Figure cần lưu
         filepath: Đường dẫn file output
         dpi: DPI khi lưu (mặc định: DEFAULT_DPI)
         close_after_save: Có đóng figure sau khi lưu không
+        facecolor: Màu nền ảnh ('auto' = giữ màu nền của figure)
         
     Returns:
         bool: True nếu lưu thành công, False nếu thất bại
@@ -222,6 +293,22 @@ def save_plot_with_config(
     if dpi is None:
         dpi = DEFAULT_DPI
     
+    target = getattr(_capture_state, 'target', None)
+    if target is not None:
+        try:
+            _render_to_buffer(fig, target, facecolor)
+        except ChartGenerationError:
+            raise
+        except Exception as e:
+            error_msg = f"Lỗi khi render biểu đồ vào bộ nhớ: {e}"
+            log_error(error_msg, logger, exc_info=True)
+            raise ChartGenerationError(error_msg) from e
+        finally:
+            if close_after_save:
+                plt.close(fig)
+        logger.debug(f"Đã render biểu đồ vào bộ nhớ ({target['size'][0]}x{target['size'][1]})")
+        return True
+    
     try:
         # Tạo thư mục nếu chưa tồn tại
         Path(filepath).parent.mkdir(parents=True, exist_ok=True)
@@ -231,7 +318,7 @@ def save_plot_with_config(
             filepath,
             dpi=dpi,
             bbox_inches='tight',
-            facecolor='white',
+            facecolor=facecolor,
             edgecolor='none'
         )
         
@@ -0,0 +1,177 @@
+# src/render_cache.py
+"""
+Module cache kết quả vẽ biểu đồ.
+
+Chức năng:
+    - Tính key cho mỗi biểu đồ: hash nội dung dữ liệu + tham số vẽ + hằng số style
+    - Lưu key trong file cạnh ảnh PNG (ví dụ weather_chart_Hà_Nội_main.png.key)
+    - Bỏ qua vẽ lại khi ảnh hiện có được tạo từ đúng các input đó
+    - Ghi log lý do bỏ qua / vẽ lại
+
+Author: Weather Forecast Pro Team
+Date: 2025-12-27
+"""
+
+import functools
+import hashlib
+import os
+import tempfile
+from typing import Any, Callable, Optional
+
+import matplotlib
+import pandas as pd
+
+from . import constants
+from .config import DEFAULT_CITY_VIET, get_chart_path, get_processed_data_path
+from .constants import RENDER_CACHE_VERSION, RENDER_CACHE_KEY_EXTENSION
+from .logger import get_logger
+from .plot_helpers import is_capturing
+from .storage import read_frame_cached, resolve_data_path
+
+
+# Logger cho module này
+logger = get_logger(__name__)
+
+# Nhóm hằng số ảnh hưởng tới hình ảnh biểu đồ (đổi giá trị → vẽ lại)
+_STYLE_PREFIXES = ('COLOR_', 'LINE_WIDTH_', 'FONT_', 'ALPHA_', 'GRID_', 'HISTOGRAM_')
+
+
+def _style_fingerprint() -> str:
+    """Chuỗi mô tả các hằng số style và phiên bản matplotlib."""
+    style = sorted(
+        (name, repr(getattr(constants, name)))
+        for name in dir(constants)
+        if name.startswith(_STYLE_PREFIXES)
+    )
+    return repr((RENDER_CACHE_VERSION, matplotlib.__version__, style))
+
+
+_STYLE_FINGERPRINT = _style_fingerprint()
+
+
+def data_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Hash nội dung DataFrame (tên cột, kiểu dữ liệu và toàn bộ giá trị).
+
+    Args:
+        df: DataFrame cần hash
+
+    Returns:
+        str: Chuỗi hex SHA-1
+    """
+    digest = hashlib.sha1()
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def chart_cache_key(chart_type: str, df: pd.DataFrame, params: dict) -> str:
+    """
+    Tính key cache của một biểu đồ.
+
+    Args:
+        chart_type: Loại biểu đồ ("main", "histogram", ...)
+        df: Dữ liệu dùng để vẽ
+        params: Tham số vẽ (figsize, dpi, ...)
+
+    Returns:
+        str: Key dạng hex
+    """
+    digest = hashlib.sha1()
+    digest.update(chart_type.encode('utf-8'))
+    digest.update(repr(sorted(params.items())).encode('utf-8'))
+    digest.update(_STYLE_FINGERPRINT.encode('utf-8'))
+    digest.update(data_fingerprint(df).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _key_path(chart_path: str) -> str:
+    return chart_path + RENDER_CACHE_KEY_EXTENSION
+
+
+def _stale_reason(chart_path: str, key: str) -> Optional[str]:
+    """
+    Kiểm tra ảnh hiện có còn dùng được không.
+
+    Returns:
+        Optional[str]: Lý do phải vẽ lại, None nếu ảnh vẫn đúng với key
+    """
+    if not os.path.exists(chart_path):
+        return "chưa có ảnh"
+
+    try:
+        with open(_key_path(chart_path), 'r', encoding='utf-8') as f:
+            stored_key = f.read().strip()
+    except FileNotFoundError:
+        return "ảnh chưa có key cache"
+    except OSError as e:
+        return f"không đọc được key cache ({e})"
+
+    if stored_key != key:
+        return "dữ liệu hoặc tham số vẽ đã thay đổi"
+    return None
+
+
+def _store_key(chart_path: str, key: str) -> None:
+    """Ghi key cạnh ảnh (ghi nguyên tử qua file tạm + os.replace)."""
+    directory = os.path.dirname(chart_path)
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(key)
+        os.replace(tmp_path, _key_path(chart_path))
+    except OSError as e:
+        logger.warning(f"Không thể ghi key cache cho {chart_path}: {e}")
+
+
+def cached_chart(chart_type: str, **params: Any) -> Callable:
+    """
+    Decorator cho hàm vẽ biểu đồ một thành phố, dạng func(city_name_viet, df=None).
+
+    Trước khi vẽ, tính key từ dữ liệu + params + hằng số style; nếu ảnh tại
+    get_chart_path(city, chart_type) đã được tạo từ cùng key thì trả về đường
+    dẫn ngay, không vẽ lại. Sau khi vẽ thành công thì lưu key mới.
+    Khi đang render vào bộ nhớ (capture_figure) thì luôn vẽ, không dùng cache.
+
+    Args:
+        chart_type: Loại biểu đồ (phần cuối tên file ảnh)
+        **params: Tham số vẽ ảnh hưởng tới kết quả (figsize, dpi, ...)
+
+    Example:
+        >>> @cached_chart("main", figsize=(14, 7), dpi=120)
+        ... def create_weather_chart(city_name_viet, df=None): ...
+    """
+    def decorator(chart_func: Callable[..., Optional[str]]) -> Callable[..., Optional[str]]:
+        @functools.wraps(chart_func)
+        def wrapper(
+            city_name_viet: str = DEFAULT_CITY_VIET,
+            df: Optional[pd.DataFrame] = None
+        ) -> Optional[str]:
+            if is_capturing():
+                return chart_func(city_name_viet, df)
+
+            if df is None:
+                processed_path = resolve_data_path(get_processed_data_path, city_name_viet)
+                if not os.path.exists(processed_path):
+                    # Để hàm vẽ tự báo lỗi thiếu dữ liệu như trước
+                    return chart_func(city_name_viet, None)
+                df = read_frame_cached(processed_path)
+
+            chart_path = get_chart_path(city_name_viet, chart_type)
+            key = chart_cache_key(chart_type, df, params)
+            reason = _stale_reason(chart_path, key)
+
+            if reason is None:
+                logger.info(f"⏭️ Bỏ qua vẽ '{chart_type}' cho {city_name_viet}: "
+                            f"dữ liệu và tham số không đổi (key {key[:10]})")
+                return chart_path
+
+            logger.info(f"Vẽ '{chart_type}' cho {city_name_viet}: {reason}")
+            result = chart_func(city_name_viet, df)
+            if result is not None:
+                _store_key(result, key)
+            return result
+
+        return wrapper
+
+    return decorator
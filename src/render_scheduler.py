@@ -0,0 +1,367 @@
+# src/render_scheduler.py
+"""
+Module điều phối vẽ biểu đồ song song trên nhiều process.
+
+Chức năng:
+    - Chia mỗi biểu đồ (thành phố x loại biểu đồ) thành một job độc lập
+    - Chạy các job trên process pool dùng backend Agg (vẽ bằng CPU, không cần GUI)
+    - Lỗi của một biểu đồ không ảnh hưởng các biểu đồ khác
+    - Trả kết quả cùng dạng dict với create_all_charts/create_all_advanced_charts
+    - Vẽ một biểu đồ thẳng vào bộ nhớ đúng kích thước hiển thị cho GUI
+    - Đọc ảnh PNG đã xuất ở kích thước hiển thị cho GUI (không vẽ lại)
+
+Matplotlib giữ GIL khi vẽ nên chạy nhiều thread không nhanh hơn; mỗi process
+có interpreter riêng nên các biểu đồ được vẽ thật sự song song.
+
+Author: Weather Forecast Pro Team
+Date: 2025-12-27
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from . import visualizer as vis
+from . import visualizer_advanced as vis_adv
+from .config import get_processed_data_path
+from .constants import CHART_RENDER_MAX_WORKERS, CHART_DISPLAY_WIDTH, CHART_DISPLAY_HEIGHT
+from .logger import get_logger, log_success, log_warning
+from .plot_helpers import capture_figure
+from .storage import read_frame_cached, resolve_data_path
+
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+# Logger cho module này
+logger = get_logger(__name__)
+
+# Các biểu đồ của một thành phố: {tên hiển thị: hàm vẽ (city_name_viet, df)}
+BASIC_CHARTS: Dict[str, Callable[..., Optional[str]]] = {
+    'Biểu đồ chính': vis.create_weather_chart,
+    'Histogram': vis.create_temperature_histogram,
+    'Tốc gió': vis.create_wind_speed_chart,
+}
+ADVANCED_CHARTS: Dict[str, Callable[..., Optional[str]]] = {
+    'Áp suất': vis_adv.create_pressure_chart,
+    'Tầm nhìn': vis_adv.create_visibility_chart,
+    'Độ che phủ mây': vis_adv.create_cloud_cover_chart,
+}
+CITY_CHARTS: Dict[str, Callable[..., Optional[str]]] = {**BASIC_CHARTS, **ADVANCED_CHARTS}
+
+# Hàm vẽ theo loại biểu đồ (phần cuối tên file ảnh, dùng bởi GUI)
+CHART_TYPES: Dict[str, Callable[..., Optional[str]]] = {
+    'main': vis.create_weather_chart,
+    'histogram': vis.create_temperature_histogram,
+    'wind': vis.create_wind_speed_chart,
+    'heatmap': vis_adv.create_correlation_heatmap,
+    'pressure': vis_adv.create_pressure_chart,
+    'visibility': vis_adv.create_visibility_chart,
+    'pressure_visibility': vis_adv.create_pressure_visibility_chart,
+    'clouds': vis_adv.create_cloud_cover_chart,
+}
+
+# Process pool dùng chung (tạo khi cần, tạo lại nếu bị hỏng)
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+# pyplot không an toàn đa luồng: mọi lần vẽ trong process hiện tại (vẽ tuần tự,
+# vẽ vào bộ nhớ cho GUI) đi qua khóa này
+_inprocess_render_lock = threading.Lock()
+
+
+def _init_worker() -> None:
+    """Khởi tạo process con: ép backend Agg trước khi vẽ bất kỳ biểu đồ nào."""
+    import matplotlib
+    matplotlib.use('Agg')
+
+
+def _render_chart(
+    chart_func: Callable[..., Optional[str]],
+    city_name_viet: str,
+    df: Optional[pd.DataFrame]
+) -> Optional[str]:
+    """
+    Vẽ một biểu đồ (chạy trong process con).
+
+    Hàm vẽ đã tự bắt lỗi và trả về None; mọi lỗi còn sót lại cũng chỉ làm hỏng
+    biểu đồ này.
+    """
+    try:
+        return chart_func(city_name_viet, df)
+    except Exception as e:
+        logger.error(f"Lỗi khi vẽ {chart_func.__name__} cho {city_name_viet}: {e}")
+        return None
+
+
+def _resolve_workers(max_workers: Optional[int], job_count: int) -> int:
+    if max_workers is None:
+        max_workers = min(CHART_RENDER_MAX_WORKERS, os.cpu_count() or 1)
+    return max(1, min(max_workers, job_count))
+
+
+def _get_executor(max_workers: int) -> ProcessPoolExecutor:
+    """Lấy process pool dùng chung, tạo mới nếu chưa có hoặc khác số worker."""
+    global _executor, _executor_workers
+
+    with _executor_lock:
+        if _executor is None or _executor_workers != max_workers:
+            if _executor is not None:
+                _executor.shutdown(wait=True)
+            # spawn: an toàn khi gọi từ thread của GUI (fork một process nhiều thread dễ treo)
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker
+            )
+            _executor_workers = max_workers
+        return _executor
+
+
+def _discard_executor() -> None:
+    """Bỏ pool bị hỏng (ví dụ process con bị kill) để lần sau tạo lại."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def shutdown_render_pool() -> None:
+    """Đóng process pool (tự gọi khi thoát chương trình)."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
+
+
+atexit.register(shutdown_render_pool)
+
+
+def _preload_data(
+    city_list: List[str],
+    data: Dict[str, pd.DataFrame]
+) -> Dict[str, Optional[pd.DataFrame]]:
+    """
+    Đọc dữ liệu sạch một lần cho mỗi thành phố chưa có trong data, để các
+    process con không phải mỗi biểu đồ tự đọc lại file.
+
+    Thành phố chưa có file sẽ nhận None; hàm vẽ trong process con sẽ tự báo lỗi.
+    """
+    loaded: Dict[str, Optional[pd.DataFrame]] = dict(data)
+    for city in city_list:
+        if city in loaded:
+            continue
+        processed_path = resolve_data_path(get_processed_data_path, city)
+        try:
+            loaded[city] = read_frame_cached(processed_path)
+        except Exception as e:
+            logger.warning(f"Không đọc được dữ liệu {city}: {e}")
+            loaded[city] = None
+    return loaded
+
+
+def _run_jobs(
+    jobs: List[Tuple[str, str, Callable[..., Optional[str]]]],
+    data: Dict[str, Optional[pd.DataFrame]],
+    max_workers: Optional[int]
+) -> Dict[Tuple[str, str], Optional[str]]:
+    """
+    Chạy danh sách job (thành phố, tên biểu đồ, hàm vẽ).
+
+    Returns:
+        Dict[(thành phố, tên biểu đồ), đường dẫn ảnh hoặc None]
+    """
+    workers = _resolve_workers(max_workers, len(jobs))
+    results: Dict[Tuple[str, str], Optional[str]] = {}
+
+    if workers == 1:
+        for city, name, chart_func in jobs:
+            with _inprocess_render_lock:
+                results[(city, name)] = _render_chart(chart_func, city, data.get(city))
+        return results
+
+    executor = _get_executor(workers)
+    futures = {
+        (city, name): executor.submit(_render_chart, chart_func, city, data.get(city))
+        for city, name, chart_func in jobs
+    }
+
+    pool_broken = False
+    for key, future in futures.items():
+        try:
+            results[key] = future.result()
+        except BrokenProcessPool:
+            pool_broken = True
+            results[key] = None
+        except Exception as e:
+            logger.error(f"Lỗi khi vẽ {key[1]} cho {key[0]}: {e}")
+            results[key] = None
+
+    if pool_broken:
+        log_warning("Process vẽ biểu đồ bị dừng đột ngột, vẽ lại tuần tự các biểu đồ lỗi", logger)
+        _discard_executor()
+        chart_funcs = {(city, name): chart_func for city, name, chart_func in jobs}
+        for key, path in results.items():
+            if path is None:
+                with _inprocess_render_lock:
+                    results[key] = _render_chart(chart_funcs[key], key[0], data.get(key[0]))
+
+    return results
+
+
+def render_charts(
+    city_list: List[str],
+    data: Optional[Dict[str, pd.DataFrame]] = None,
+    charts: Optional[Dict[str, Callable[..., Optional[str]]]] = None,
+    max_workers: Optional[int] = None
+) -> Dict[str, Dict[str, Optional[str]]]:
+    """
+    Vẽ các biểu đồ của nhiều thành phố song song trên process pool.
+
+    Args:
+        city_list: Danh sách tên thành phố tiếng Việt
+        data: {thành phố: DataFrame dữ liệu sạch} đã có trong bộ nhớ.
+              Thành phố không có trong data được đọc từ file một lần ở process hiện tại
+        charts: {tên: hàm vẽ} cần chạy cho mỗi thành phố (mặc định: CITY_CHARTS)
+        max_workers: Số process tối đa (mặc định: min(CHART_RENDER_MAX_WORKERS, số CPU)).
+                     Truyền 1 để vẽ tuần tự trong process hiện tại
+
+    Returns:
+        Dict[str, Dict[str, Optional[str]]]: {thành phố: {tên biểu đồ: đường dẫn ảnh hoặc None}}
+
+    Example:
+        >>> results = render_charts(['Hà Nội', 'Đà Nẵng'])
+        >>> results['Hà Nội']['Histogram']
+        '.../assets/weather_chart_Hà_Nội_histogram.png'
+    """
+    if data is None:
+        data = {}
+    if charts is None:
+        charts = CITY_CHARTS
+
+    jobs = [(city, name, chart_func) for city in city_list for name, chart_func in charts.items()]
+    if not jobs:
+        return {city: {} for city in city_list}
+
+    logger.info(f"🎨 Vẽ {len(jobs)} biểu đồ cho {len(city_list)} thành phố "
+                f"({_resolve_workers(max_workers, len(jobs))} process)...")
+
+    flat_results = _run_jobs(jobs, _preload_data(city_list, data), max_workers)
+
+    results = {city: {name: flat_results[(city, name)] for name in charts} for city in city_list}
+
+    failed = sum(path is None for path in flat_results.values())
+    if failed:
+        log_warning(f"{failed}/{len(jobs)} biểu đồ tạo thất bại", logger)
+    else:
+        log_success(f"Đã vẽ xong {len(jobs)} biểu đồ", logger)
+
+    return results
+
+
+def render_city_charts(
+    city_name_viet: str,
+    df: Optional[pd.DataFrame] = None,
+    charts: Optional[Dict[str, Callable[..., Optional[str]]]] = None,
+    max_workers: Optional[int] = None
+) -> Dict[str, Optional[str]]:
+    """
+    Vẽ các biểu đồ của một thành phố song song.
+
+    Args:
+        city_name_viet: Tên thành phố tiếng Việt
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ (None = đọc từ file)
+        charts: {tên: hàm vẽ} (mặc định: CITY_CHARTS - 3 biểu đồ cơ bản + 3 nâng cao)
+        max_workers: Số process tối đa
+
+    Returns:
+        Dict[str, Optional[str]]: {tên biểu đồ: đường dẫn ảnh hoặc None}
+    """
+    data = {city_name_viet: df} if df is not None else None
+    return render_charts([city_name_viet], data, charts, max_workers)[city_name_viet]
+
+
+def render_chart_image(
+    city_name_viet: str,
+    chart_type: str,
+    df: Optional[pd.DataFrame] = None,
+    size: Tuple[int, int] = (CHART_DISPLAY_WIDTH, CHART_DISPLAY_HEIGHT)
+) -> Optional["Image.Image"]:
+    """
+    Vẽ một biểu đồ thẳng vào bộ nhớ, đúng kích thước pixel hiển thị.
+
+    Không đọc/ghi file ảnh và không cần resize, ảnh trả về đưa thẳng vào
+    ImageTk.PhotoImage. Muốn xuất file PNG thì dùng render_charts/render_city_charts.
+    An toàn khi gọi từ thread nền (các lần vẽ trong process được tuần tự hóa).
+
+    Args:
+        city_name_viet: Tên thành phố tiếng Việt
+        chart_type: Loại biểu đồ (khóa của CHART_TYPES)
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ (None = đọc từ file, có cache)
+        size: (rộng, cao) pixel của ảnh
+
+    Returns:
+        Optional[Image.Image]: Ảnh RGBA, None nếu vẽ thất bại
+
+    Raises:
+        KeyError: Nếu chart_type không có trong CHART_TYPES
+
+    Example:
+        >>> img = render_chart_image('Hà Nội', 'histogram')
+        >>> img.size
+        (1000, 650)
+    """
+    chart_func = CHART_TYPES[chart_type]
+
+    if df is None:
+        df = _preload_data([city_name_viet], {})[city_name_viet]
+
+    with _inprocess_render_lock, capture_figure(size) as target:
+        _render_chart(chart_func, city_name_viet, df)
+
+    image = target['image']
+    if image is None:
+        return None
+
+    from PIL import Image
+
+    height, width = image.shape[:2]
+    return Image.frombuffer('RGBA', (width, height), image, 'raw', 'RGBA', 0, 1)
+
+
+def load_chart_image(
+    chart_path: str,
+    size: Tuple[int, int] = (CHART_DISPLAY_WIDTH, CHART_DISPLAY_HEIGHT)
+) -> Optional["Image.Image"]:
+    """
+    Đọc ảnh PNG đã xuất bởi render_charts/render_city_charts, thu về kích thước hiển thị.
+
+    Rẻ hơn nhiều so với vẽ lại biểu đồ, nhưng giải mã + resize vẫn mất vài chục
+    ms mỗi ảnh nên GUI gọi hàm này ở thread nền.
+
+    Args:
+        chart_path: Đường dẫn file PNG (get_chart_path)
+        size: (rộng, cao) pixel của ảnh
+
+    Returns:
+        Optional[Image.Image]: Ảnh RGBA, None nếu file không có hoặc không đọc được
+    """
+    from PIL import Image
+
+    try:
+        with Image.open(chart_path) as img:
+            return img.convert('RGBA').resize(size, Image.Resampling.LANCZOS)
+    except OSError as e:
+        logger.warning(f"Không đọc được ảnh biểu đồ {chart_path}: {e}")
+        return None
@@ -0,0 +1,239 @@
+# src/response_cache.py
+"""
+Module cache response từ API OpenWeatherMap trên đĩa.
+
+Chức năng:
+    - Lưu JSON response theo (thành phố, endpoint)
+    - Tự động hết hạn theo TTL
+    - Ghi file nguyên tử (atomic) để tránh cache hỏng khi bị ngắt giữa chừng
+    - Giới hạn dung lượng, loại bỏ entry ít dùng nhất (LRU)
+    - Đếm số lần hit/miss để đo số request API tiết kiệm được
+
+Author: Weather Forecast Pro Team
+Date: 2025-12-27
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .config import get_cache_dir
+from .constants import RESPONSE_CACHE_TTL_SECONDS, RESPONSE_CACHE_MAX_BYTES
+from .logger import get_logger, log_warning
+
+
+# Logger cho module này
+logger = get_logger(__name__)
+
+# Instance cache dùng chung
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+class ResponseCache:
+    """
+    Cache response API trên đĩa với TTL và giới hạn dung lượng (LRU).
+
+    Mỗi entry là một file JSON trong cache_dir. Thời điểm lấy dữ liệu được lưu
+    trong nội dung entry (để tính TTL), còn mtime của file được cập nhật mỗi lần
+    đọc (để xác định entry ít dùng nhất khi cần giải phóng dung lượng).
+
+    Example:
+        >>> cache = ResponseCache()
+        >>> cache.set('Hanoi', 'forecast', {'list': [...]})
+        >>> data = cache.get('Hanoi', 'forecast')
+        >>> cache.stats()
+        {'hits': 1, 'misses': 0, ...}
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+        max_bytes: int = RESPONSE_CACHE_MAX_BYTES
+    ):
+        """
+        Khởi tạo cache.
+
+        Args:
+            cache_dir: Thư mục lưu cache (mặc định: get_cache_dir())
+            ttl_seconds: Thời gian sống của mỗi entry (giây)
+            max_bytes: Tổng dung lượng tối đa của cache (byte)
+        """
+        self.cache_dir = cache_dir or get_cache_dir()
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _entry_path(self, city: str, endpoint: str) -> str:
+        """Đường dẫn file cache cho cặp (thành phố, endpoint)."""
+        key = hashlib.sha1(f"{endpoint}|{city}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, city: str, endpoint: str) -> Optional[Dict[str, Any]]:
+        """
+        Lấy response còn hạn từ cache.
+
+        Args:
+            city: Tên thành phố (dùng để gọi API)
+            endpoint: Endpoint API
+
+        Returns:
+            Optional[Dict]: JSON response nếu còn hạn, None nếu không có hoặc đã hết hạn
+        """
+        path = self._entry_path(city, endpoint)
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            self._record(hit=False)
+            return None
+        except (OSError, ValueError) as e:
+            log_warning(f"Entry cache hỏng cho {city} ({e}), bỏ qua", logger)
+            self._remove(path)
+            self._record(hit=False)
+            return None
+
+        age = time.time() - entry.get('fetched_at', 0)
+        if age > self.ttl_seconds:
+            logger.debug(f"Cache hết hạn cho {city} ({age:.0f}s > {self.ttl_seconds}s)")
+            self._record(hit=False)
+            return None
+
+        # Cập nhật mtime để đánh dấu vừa được sử dụng (phục vụ LRU)
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        self._record(hit=True)
+        logger.info(f"Dùng dữ liệu cache cho {city} (cách đây {age / 60:.0f} phút)")
+        return entry.get('data')
+
+    def set(self, city: str, endpoint: str, data: Dict[str, Any]) -> None:
+        """
+        Ghi response vào cache (ghi nguyên tử qua file tạm + os.replace).
+
+        Args:
+            city: Tên thành phố (dùng để gọi API)
+            endpoint: Endpoint API
+            data: JSON response cần lưu
+        """
+        path = self._entry_path(city, endpoint)
+        entry = {
+            'city': city,
+            'endpoint': endpoint,
+            'fetched_at': time.time(),
+            'data': data,
+        }
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(tmp_path, path)
+            except BaseException:
+                self._remove(tmp_path)
+                raise
+        except OSError as e:
+            log_warning(f"Không thể ghi cache cho {city}: {e}", logger)
+            return
+
+        self._evict_if_needed()
+
+    def _evict_if_needed(self) -> None:
+        """Xóa các entry ít dùng nhất cho tới khi tổng dung lượng <= max_bytes."""
+        with self._lock:
+            try:
+                entries = []
+                for name in os.listdir(self.cache_dir):
+                    if not name.endswith('.json'):
+                        continue
+                    path = os.path.join(self.cache_dir, name)
+                    st = os.stat(path)
+                    entries.append((st.st_mtime, st.st_size, path))
+            except OSError as e:
+                log_warning(f"Không thể kiểm tra dung lượng cache: {e}", logger)
+                return
+
+            total = sum(size for _, size, _ in entries)
+            if total <= self.max_bytes:
+                return
+
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+                self.evictions += 1
+                logger.debug(f"Đã loại bỏ entry cache: {path}")
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """Xóa toàn bộ cache và reset bộ đếm."""
+        if os.path.isdir(self.cache_dir):
+            for name in os.listdir(self.cache_dir):
+                if name.endswith('.json'):
+                    self._remove(os.path.join(self.cache_dir, name))
+
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Lấy thống kê sử dụng cache.
+
+        Returns:
+            Dict: hits, misses, evictions và hit_rate (tỉ lệ request API tiết kiệm được)
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            }
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    Lấy instance cache dùng chung hoặc tạo mới nếu chưa tồn tại.
+
+    Returns:
+        ResponseCache: Cache mặc định (thư mục get_cache_dir())
+    """
+    global _default_cache
+
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache()
+
+    return _default_cache
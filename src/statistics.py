@@ -12,13 +12,15 @@ Date: 2025-12-27 (Refactored for code quality)
 """
 
 import pandas as pd
-import os
+import numpy as np
+import warnings
 from typing import Dict, Optional, Any
 
-from .config import DEFAULT_CITY_VIET, get_processed_data_path
+from .config import DEFAULT_CITY_VIET
 from .column_names import CleanColumns, NUMERIC_CLEAN_COLUMNS
-from .exceptions import FileOperationError, EmptyDataFrameError, MissingColumnError
+from .exceptions import EmptyDataFrameError, MissingColumnError
 from .logger import get_logger, log_success, log_error, log_warning
+from .storage import TimeLike, load_processed_data
 
 
 # Logger cho module này
@@ -58,10 +60,82 @@ def _validate_columns_exist(df: pd.DataFrame, columns: list) -> None:
             raise MissingColumnError(col, df.columns.tolist())
 
 
+# Các phân vị cần tính: Q1, trung vị, Q3
+_QUANTILES = np.array([0.25, 0.5, 0.75])
+
+
+def _describe_columns(values: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Tính tất cả chỉ số thống kê cho mọi cột cùng lúc.
+    
+    Mỗi dòng của values là một cột dữ liệu (bố cục liên tục trong bộ nhớ).
+    Mean/std dùng phép rút gọn NumPy theo từng dòng; sau đó sắp xếp tại chỗ
+    một lần để lấy min, max và các phân vị (nội suy tuyến tính như pandas)
+    bằng cách đánh chỉ số trực tiếp. NaN được xếp cuối nên chỉ cần biết số
+    giá trị hợp lệ của mỗi dòng.
+    
+    Args:
+        values: Ma trận float (số cột x số dòng), NaN là giá trị thiếu.
+                Ma trận bị sắp xếp lại tại chỗ.
+        
+    Returns:
+        Dict[str, np.ndarray]: {chỉ_số: mảng giá trị theo từng cột}
+    """
+    n_columns = values.shape[0]
+    counts = np.count_nonzero(~np.isnan(values), axis=1)
+    
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        # Cột toàn NaN hoặc chỉ 1 giá trị → NaN giống pandas, không cần cảnh báo
+        warnings.simplefilter('ignore', RuntimeWarning)
+        if (counts < values.shape[1]).any():
+            mean = np.nanmean(values, axis=1)
+            std = np.nanstd(values, axis=1, ddof=1)
+        else:
+            mean = values.mean(axis=1)
+            std = values.std(axis=1, ddof=1)
+    
+    values.sort(axis=1)
+    rows = np.arange(n_columns)[:, None]
+    last = np.maximum(counts - 1, 0)[:, None]
+    
+    # Vị trí phân vị trong phần đã sắp xếp (cùng công thức nội suy với numpy/pandas)
+    position = _QUANTILES * last
+    lower = np.floor(position).astype(np.intp)
+    upper = np.minimum(lower + 1, last)
+    weight = position - lower
+    low_values = values[rows, lower]
+    high_values = values[rows, upper]
+    diff = high_values - low_values
+    quantiles = np.where(
+        weight >= 0.5,
+        high_values - diff * (1 - weight),
+        low_values + diff * weight
+    )
+    
+    empty = counts == 0
+    minimum = np.where(empty, np.nan, values[:, 0])
+    maximum = np.where(empty, np.nan, values[rows[:, 0], last[:, 0]])
+    quantiles[empty] = np.nan
+    
+    return {
+        'count': counts,
+        'mean': mean,
+        'min': minimum,
+        'max': maximum,
+        'std': std,
+        'median': quantiles[:, 1],
+        'q25': quantiles[:, 0],
+        'q75': quantiles[:, 2],
+    }
+
+
 def calculate_statistics(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
     """
     Tính toán thống kê cho các cột dữ liệu.
     
+    Tất cả các cột số được gom thành một ma trận và tính trong một lượt
+    (xem _describe_columns) thay vì gọi 8 method Series cho từng cột.
+    
     Args:
         df: DataFrame chứa dữ liệu thời tiết
         
@@ -79,26 +153,41 @@ def calculate_statistics(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
     
     _validate_dataframe_not_empty(df)
     
-    stats = {}
+    # Các cột numeric để tính toán (bỏ qua cột không phải kiểu số)
+    numeric_columns = [
+        col.value for col in NUMERIC_CLEAN_COLUMNS
+        if col.value in df.columns and pd.api.types.is_numeric_dtype(df[col.value])
+    ]
+    skipped = [
+        col.value for col in NUMERIC_CLEAN_COLUMNS
+        if col.value in df.columns and col.value not in numeric_columns
+    ]
+    for col in skipped:
+        log_warning(f"Không thể tính toán thống kê cho cột {col}: không phải kiểu số", logger)
+    
+    if not numeric_columns:
+        return {}
     
-    # Các cột numeric để tính toán
-    numeric_columns = [col.value for col in NUMERIC_CLEAN_COLUMNS if col.value in df.columns]
+    # Mỗi cột thành một dòng liên tục của ma trận (thuận tiện cho sắp xếp theo dòng)
+    values = np.empty((len(numeric_columns), len(df)), dtype=np.float64)
+    for idx, col in enumerate(numeric_columns):
+        values[idx] = df[col].to_numpy(dtype=np.float64, na_value=np.nan)
+    described = _describe_columns(values)
     
-    for col in numeric_columns:
-        try:
-            stats[col] = {
-                'count': int(df[col].count()),
-                'mean': round(df[col].mean(), 2),      # Trung bình
-                'min': round(df[col].min(), 2),        # Tối thiểu
-                'max': round(df[col].max(), 2),        # Tối đa
-                'std': round(df[col].std(), 2),        # Độ lệch chuẩn
-                'median': round(df[col].median(), 2),  # Trung vị
-                'q25': round(df[col].quantile(0.25), 2),  # Phần tư thứ 1
-                'q75': round(df[col].quantile(0.75), 2),  # Phần tư thứ 3
-            }
-        except Exception as e:
-            log_warning(f"Không thể tính toán thống kê cho cột {col}: {e}", logger)
-            continue
+    stats = {}
+    for idx, col in enumerate(numeric_columns):
+        # Cột số nguyên giữ min/max dạng số nguyên như Series.min()/max()
+        is_integer = pd.api.types.is_integer_dtype(df[col])
+        col_stats = {}
+        for name, column_values in described.items():
+            value = column_values[idx]
+            if name == 'count':
+                col_stats[name] = int(value)
+            elif name in ('min', 'max') and is_integer and not np.isnan(value):
+                col_stats[name] = int(value)
+            else:
+                col_stats[name] = round(float(value), 2)
+        stats[col] = col_stats
     
     return stats
 
@@ -206,28 +295,28 @@ def get_weather_summary(df: pd.DataFrame) -> Dict[str, Any]:
     return summary
 
 
-def print_full_statistics(city_name_viet: str = DEFAULT_CITY_VIET, df: Optional[pd.DataFrame] = None) -> None:
+def print_full_statistics(
+    city_name_viet: str = DEFAULT_CITY_VIET,
+    df: Optional[pd.DataFrame] = None,
+    start: Optional[TimeLike] = None,
+    end: Optional[TimeLike] = None
+) -> None:
     """
     In ra báo cáo thống kê đầy đủ.
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt (mặc định: "Hà Nội")
         df: DataFrame dữ liệu (nếu None sẽ đọc từ file)
+        start: Khi đọc từ file, chỉ lấy dữ liệu từ thời điểm này (None = từ đầu)
+        end: Khi đọc từ file, chỉ lấy dữ liệu tới thời điểm này (None = tới cuối)
         
     Raises:
         FileOperationError: Nếu không tìm thấy file dữ liệu
     """
     
-    # Đọc dữ liệu nếu chưa có
+    # Đọc dữ liệu nếu chưa có (chỉ các dòng trong khoảng thời gian)
     if df is None:
-        processed_data_path = get_processed_data_path(city_name_viet)
-        if not os.path.exists(processed_data_path):
-            error_msg = f"Không tìm thấy file dữ liệu sạch cho {city_name_viet}"
-            log_error(error_msg, logger)
-            raise FileOperationError(error_msg, processed_data_path)
-        
-        df = pd.read_csv(processed_data_path)
-        df[CleanColumns.THOI_GIAN.value] = pd.to_datetime(df[CleanColumns.THOI_GIAN.value])
+        df = load_processed_data(city_name_viet, start=start, end=end)
     
     # Validate
     _validate_dataframe_not_empty(df)
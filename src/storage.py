@@ -0,0 +1,747 @@
+# src/storage.py
+"""
+Module lưu trữ DataFrame xuống đĩa với nhiều định dạng.
+
+Chức năng:
+    - Đọc/ghi CSV, Parquet và Feather qua cùng một API
+    - Parquet/Feather giữ nguyên kiểu datetime và categorical (không phải parse lại)
+    - Schema gọn tùy chọn (float32/int8/int16/category) cho dữ liệu sạch
+    - Chỉ đọc các cột cần thiết (column projection)
+    - Đọc theo khoảng thời gian: Parquet chỉ đọc các row group giao với khoảng
+      (filter pushdown), sau đó cắt bằng tìm kiếm nhị phân trên cột thời gian đã sắp xếp
+    - Chuyển đổi các file CSV cũ sang định dạng cột
+    - Ghi file bất đồng bộ ở background (không chặn pipeline fetch → clean → vẽ)
+    - Đọc/ghi theo từng khối cho file rất lớn (iter_frame_chunks, FrameChunkWriter)
+    - Cache DataFrame đã đọc, tự làm mới khi file thay đổi (theo mtime)
+
+Định dạng được chọn theo phần mở rộng của file, còn đường dẫn mặc định được
+quyết định bởi DATA_STORAGE_FORMAT trong config.
+
+Author: Weather Forecast Pro Team
+Date: 2025-12-27
+"""
+
+import functools
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .config import (
+    COMPACT_DTYPES_ENABLED, DATA_FILE_EXTENSIONS, DATA_STORAGE_FORMAT, VIETNAM_CITIES,
+    get_raw_data_path, get_processed_data_path
+)
+from .constants import CSV_EXTENSION, PARQUET_EXTENSION, FEATHER_EXTENSION
+from .column_names import COMPACT_CLEAN_DTYPES, CleanColumns
+from .exceptions import FileOperationError
+from .logger import get_logger, log_success, log_error, log_warning
+
+
+# Logger cho module này
+logger = get_logger(__name__)
+
+# Cột thời gian được parse lại khi đọc CSV
+DATETIME_COLUMNS = [CleanColumns.THOI_GIAN.value]
+
+# Cột thời gian dùng để đọc dữ liệu sạch theo khoảng (load_range)
+TIME_COLUMN = CleanColumns.THOI_GIAN.value
+
+TimeLike = Union[str, pd.Timestamp]
+
+# Cột văn bản lặp lại nhiều, lưu dạng categorical trong định dạng cột
+CATEGORICAL_COLUMNS = [CleanColumns.MO_TA.value, CleanColumns.THANH_PHO.value]
+
+# Một luồng ghi duy nhất: các lần ghi cùng một file luôn theo đúng thứ tự
+_write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='persist')
+_pending_writes: Dict[str, Future] = {}
+_pending_lock = threading.Lock()
+
+# Cache DataFrame đã đọc: {đường dẫn: (mtime_ns, kích thước file, DataFrame)}
+_frame_cache: Dict[str, Tuple[int, int, pd.DataFrame]] = {}
+_frame_cache_lock = threading.Lock()
+
+
+def _require_pyarrow(filepath: str) -> None:
+    """
+    Kiểm tra pyarrow đã được cài đặt (cần cho Parquet/Feather).
+
+    Raises:
+        FileOperationError: Nếu chưa cài pyarrow
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError as e:
+        error_msg = "Định dạng Parquet/Feather cần thư viện pyarrow (pip install pyarrow)"
+        log_error(error_msg, logger)
+        raise FileOperationError(error_msg, filepath) from e
+
+
+def _prepare_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """Chuyển các cột văn bản lặp lại sang categorical trước khi ghi định dạng cột."""
+    categorical = {col: 'category' for col in CATEGORICAL_COLUMNS if col in df.columns}
+    if categorical:
+        df = df.astype(categorical)
+    return df.reset_index(drop=True)
+
+
+def _fits_integer(series: pd.Series, dtype: str) -> bool:
+    """Cột không có NaN và mọi giá trị nằm trong miền của kiểu số nguyên dtype."""
+    if series.empty:
+        return True
+    if series.isna().any():
+        return False
+    info = np.iinfo(dtype)
+    return info.min <= series.min() and series.max() <= info.max
+
+
+def to_compact_dtypes(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ép các cột dữ liệu sạch sang schema gọn COMPACT_CLEAN_DTYPES.
+
+    Cột không có trong DataFrame hoặc đã đúng kiểu được bỏ qua; cột số nguyên
+    có NaN hoặc giá trị ngoài miền của kiểu đích được giữ nguyên (kèm cảnh báo).
+
+    Args:
+        df: DataFrame dữ liệu sạch (tên cột tiếng Việt), không bị sửa đổi
+
+    Returns:
+        pd.DataFrame: DataFrame với kiểu dữ liệu gọn (chính df nếu không có cột nào đổi)
+    """
+    casts = {}
+    for col, dtype in COMPACT_CLEAN_DTYPES.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if dtype.startswith('int') and not _fits_integer(df[col], dtype):
+            log_warning(f"Giữ nguyên kiểu cột {col}: có giá trị thiếu hoặc ngoài miền {dtype}", logger)
+            continue
+        casts[col] = dtype
+    return df.astype(casts) if casts else df
+
+
+def write_frame(df: pd.DataFrame, filepath: str) -> None:
+    """
+    Ghi DataFrame ra file, định dạng theo phần mở rộng (.csv/.parquet/.feather).
+
+    Args:
+        df: DataFrame cần ghi
+        filepath: Đường dẫn file output
+
+    Raises:
+        FileOperationError: Nếu định dạng không hỗ trợ hoặc thiếu pyarrow
+        OSError: Nếu không thể ghi file
+    """
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+    extension = os.path.splitext(filepath)[1]
+
+    if extension == CSV_EXTENSION:
+        df.to_csv(filepath, index=False, encoding='utf-8-sig')
+    elif extension == PARQUET_EXTENSION:
+        _require_pyarrow(filepath)
+        _prepare_columnar(df).to_parquet(filepath, index=False)
+    elif extension == FEATHER_EXTENSION:
+        _require_pyarrow(filepath)
+        _prepare_columnar(df).to_feather(filepath)
+    else:
+        raise FileOperationError(f"Định dạng file không hỗ trợ: {extension}", filepath)
+
+
+def _on_write_done(filepath: str, future: Future) -> None:
+    """Dọn entry đang chờ và log lỗi của lần ghi nền (nếu có)."""
+    with _pending_lock:
+        if _pending_writes.get(filepath) is future:
+            del _pending_writes[filepath]
+
+    error = future.exception()
+    if error is not None and not isinstance(error, FileOperationError):
+        # FileOperationError đã được log bởi hàm ghi
+        log_error(f"Lỗi khi ghi nền {filepath}: {type(error).__name__}: {error}", logger)
+
+
+def write_frame_async(
+    df: pd.DataFrame,
+    filepath: str,
+    writer: Callable[[pd.DataFrame, str], None] = write_frame
+) -> Future:
+    """
+    Ghi DataFrame ra file ở luồng nền, trả về ngay để pipeline chạy tiếp.
+
+    Việc đọc file (read_frame, resolve_data_path) sẽ tự chờ lần ghi đang dở
+    của chính file đó, nên không bao giờ đọc phải dữ liệu cũ.
+
+    Args:
+        df: DataFrame cần ghi (được chụp lại bằng bản sao nông, caller có thể sửa tiếp)
+        filepath: Đường dẫn file output
+        writer: Hàm ghi thực sự, nhận (df, filepath) (mặc định: write_frame)
+
+    Returns:
+        Future: Hoàn thành khi file đã được ghi xong
+    """
+    snapshot = df.copy(deep=False)
+    with _pending_lock:
+        future = _write_executor.submit(writer, snapshot, filepath)
+        _pending_writes[filepath] = future
+    future.add_done_callback(lambda f: _on_write_done(filepath, f))
+    return future
+
+
+def _wait_for_pending_write(filepath: str) -> None:
+    """Chờ lần ghi nền đang dở của filepath (nếu có) hoàn thành."""
+    with _pending_lock:
+        future = _pending_writes.get(filepath)
+    if future is not None:
+        wait([future])
+
+
+def flush_pending_writes(timeout: Optional[float] = None) -> bool:
+    """
+    Chờ tất cả các lần ghi nền hoàn thành.
+
+    Args:
+        timeout: Thời gian chờ tối đa (giây). None = chờ tới khi xong
+
+    Returns:
+        bool: True nếu không còn lần ghi nào đang chờ
+    """
+    with _pending_lock:
+        futures = list(_pending_writes.values())
+    _, not_done = wait(futures, timeout=timeout)
+    return not not_done
+
+
+class FrameChunkWriter:
+    """
+    Ghi một DataFrame lớn theo từng khối vào một file (CSV/Parquet/Feather).
+
+    Các khối được ghi dần vào file tạm cạnh file đích và chỉ thay file đích
+    (os.replace) khi close(): người đọc luôn thấy file cũ hoặc file hoàn chỉnh.
+    Kiểu cột của file theo khối đầu tiên; các khối sau được ép về cùng kiểu.
+    Dùng với `with`: nếu có lỗi, file tạm bị xóa và file đích giữ nguyên.
+
+    Examples:
+        >>> with FrameChunkWriter(path) as writer:
+        ...     for chunk in chunks:
+        ...         writer.write(chunk)
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self.rows = 0
+        self._extension = os.path.splitext(filepath)[1]
+        if self._extension not in DATA_FILE_EXTENSIONS.values():
+            raise FileOperationError(f"Định dạng file không hỗ trợ: {self._extension}", filepath)
+        if self._extension != CSV_EXTENSION:
+            _require_pyarrow(filepath)
+
+        _wait_for_pending_write(filepath)
+        directory, filename = os.path.split(filepath)
+        os.makedirs(directory, exist_ok=True)
+        self._tmp_path = os.path.join(directory, f".tmp-{uuid.uuid4().hex}-{filename}")
+        self._sink = None
+        self._writer = None
+        self._schema = None
+
+    def __enter__(self) -> 'FrameChunkWriter':
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _columnar_schema(self, table):
+        """Schema của file theo khối đầu tiên; categorical dùng chỉ số int32 để mọi khối cùng kiểu."""
+        import pyarrow as pa
+
+        fields = [
+            field.with_type(pa.dictionary(pa.int32(), field.type.value_type))
+            if pa.types.is_dictionary(field.type) else field
+            for field in table.schema
+        ]
+        return pa.schema(fields, metadata=table.schema.metadata)
+
+    def _open_columnar(self, schema) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._extension == PARQUET_EXTENSION:
+            self._writer = pq.ParquetWriter(self._tmp_path, schema)
+        else:
+            # Feather v2 = Arrow IPC file (nén lz4 giống pandas.to_feather)
+            self._sink = pa.OSFile(self._tmp_path, 'wb')
+            options = pa.ipc.IpcWriteOptions(compression='lz4')
+            self._writer = pa.ipc.new_file(self._sink, schema, options=options)
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Ghi thêm một khối.
+
+        Args:
+            df: Khối DataFrame (các cột giống khối đầu tiên). Khối rỗng bị bỏ qua
+
+        Raises:
+            OSError: Nếu không thể ghi file
+        """
+        if df.empty:
+            return
+
+        if self._extension == CSV_EXTENSION:
+            if self._sink is None:
+                self._sink = open(self._tmp_path, 'w', encoding='utf-8-sig', newline='')
+            df.to_csv(self._sink, index=False, header=self.rows == 0)
+        else:
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(_prepare_columnar(df), preserve_index=False)
+            if self._writer is None:
+                self._schema = self._columnar_schema(table)
+                self._open_columnar(self._schema)
+            self._writer.write_table(table.cast(self._schema))
+
+        self.rows += len(df)
+
+    def _close_handles(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def close(self) -> None:
+        """Đóng file tạm và thay file đích bằng nó (không làm gì nếu chưa ghi dòng nào)."""
+        self._close_handles()
+        if self.rows == 0:
+            self.abort()
+            return
+        os.replace(self._tmp_path, self.filepath)
+
+    def abort(self) -> None:
+        """Hủy: xóa file tạm, file đích giữ nguyên."""
+        self._close_handles()
+        if os.path.exists(self._tmp_path):
+            os.remove(self._tmp_path)
+
+
+def _read_csv(filepath: str, columns: Optional[Sequence[str]]) -> pd.DataFrame:
+    usecols = None if columns is None else (lambda col: col in columns)
+    df = pd.read_csv(filepath, encoding='utf-8-sig', usecols=usecols)
+    for col in DATETIME_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    return df
+
+
+def _read_arrow(filepath: str, columns: Optional[Sequence[str]], reader: Callable) -> pd.DataFrame:
+    _require_pyarrow(filepath)
+    if columns is None:
+        return reader(filepath)
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Chỉ đọc schema (metadata) để bỏ qua các cột không tồn tại
+    if filepath.endswith(PARQUET_EXTENSION):
+        available = pq.read_schema(filepath).names
+    else:
+        with pa.memory_map(filepath) as source:
+            available = pa.ipc.open_file(source).schema.names
+    return reader(filepath, columns=[col for col in columns if col in available])
+
+
+def read_frame(filepath: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """
+    Đọc DataFrame từ file, định dạng theo phần mở rộng.
+
+    Args:
+        filepath: Đường dẫn file
+        columns: Chỉ đọc các cột này (cột không tồn tại sẽ bị bỏ qua). None = đọc tất cả
+
+    Returns:
+        pd.DataFrame: Dữ liệu đã đọc, cột thời gian có kiểu datetime
+                      (kiểu gọn COMPACT_CLEAN_DTYPES nếu COMPACT_DTYPES_ENABLED)
+
+    Raises:
+        FileOperationError: Nếu định dạng không hỗ trợ hoặc thiếu pyarrow
+        pd.errors.ParserError: Nếu file CSV lỗi định dạng
+        OSError: Nếu không thể đọc file
+    """
+    _wait_for_pending_write(filepath)
+    extension = os.path.splitext(filepath)[1]
+
+    if extension == CSV_EXTENSION:
+        df = _read_csv(filepath, columns)
+    elif extension == PARQUET_EXTENSION:
+        df = _read_arrow(filepath, columns, pd.read_parquet)
+    elif extension == FEATHER_EXTENSION:
+        df = _read_arrow(filepath, columns, pd.read_feather)
+    else:
+        raise FileOperationError(f"Định dạng file không hỗ trợ: {extension}", filepath)
+
+    # CSV không giữ kiểu dữ liệu: ép lại schema gọn để bộ nhớ giống với trên đĩa
+    return to_compact_dtypes(df) if COMPACT_DTYPES_ENABLED else df
+
+
+def _iter_chunks(filepath: str, chunk_size: int, columns: Optional[Sequence[str]]) -> Iterator[pd.DataFrame]:
+    extension = os.path.splitext(filepath)[1]
+
+    if extension == CSV_EXTENSION:
+        usecols = None if columns is None else (lambda col: col in columns)
+        with pd.read_csv(filepath, encoding='utf-8-sig', usecols=usecols, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                for col in DATETIME_COLUMNS:
+                    if col in chunk.columns:
+                        chunk[col] = pd.to_datetime(chunk[col])
+                yield chunk
+        return
+
+    if extension not in (PARQUET_EXTENSION, FEATHER_EXTENSION):
+        raise FileOperationError(f"Định dạng file không hỗ trợ: {extension}", filepath)
+
+    _require_pyarrow(filepath)
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if extension == PARQUET_EXTENSION:
+        parquet_file = pq.ParquetFile(filepath)
+        names = parquet_file.schema_arrow.names
+        selected = None if columns is None else [col for col in columns if col in names]
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=selected):
+            yield batch.to_pandas()
+        return
+
+    with pa.memory_map(filepath) as source:
+        reader = pa.ipc.open_file(source)
+        selected = None if columns is None else [col for col in columns if col in reader.schema.names]
+        for index in range(reader.num_record_batches):
+            batch = reader.get_batch(index)
+            if selected is not None:
+                batch = batch.select(selected)
+            for offset in range(0, batch.num_rows, chunk_size):
+                yield batch.slice(offset, chunk_size).to_pandas()
+
+
+def iter_frame_chunks(
+    filepath: str,
+    chunk_size: int,
+    columns: Optional[Sequence[str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Đọc file theo từng khối tối đa chunk_size dòng (bộ nhớ không phụ thuộc kích thước file).
+
+    CSV dùng pd.read_csv(chunksize=...), Parquet đọc theo batch của pyarrow,
+    Feather đọc từng record batch qua memory map.
+
+    Args:
+        filepath: Đường dẫn file
+        chunk_size: Số dòng tối đa mỗi khối
+        columns: Chỉ đọc các cột này (cột không tồn tại sẽ bị bỏ qua). None = đọc tất cả
+
+    Yields:
+        pd.DataFrame: Từng khối dữ liệu, theo thứ tự trong file
+                      (kiểu gọn COMPACT_CLEAN_DTYPES nếu COMPACT_DTYPES_ENABLED)
+
+    Raises:
+        FileOperationError: Nếu định dạng không hỗ trợ hoặc thiếu pyarrow
+        pd.errors.ParserError: Nếu file CSV lỗi định dạng
+        OSError: Nếu không thể đọc file
+    """
+    _wait_for_pending_write(filepath)
+    for chunk in _iter_chunks(filepath, chunk_size, columns):
+        yield to_compact_dtypes(chunk) if COMPACT_DTYPES_ENABLED else chunk
+
+
+def slice_time_range(
+    df: pd.DataFrame,
+    start: Optional[TimeLike] = None,
+    end: Optional[TimeLike] = None,
+    time_column: str = TIME_COLUMN
+) -> pd.DataFrame:
+    """
+    Lấy các dòng có thời gian trong [start, end] bằng tìm kiếm nhị phân.
+
+    Dữ liệu sạch thường đã sắp xếp theo thời gian nên chỉ cần searchsorted + cắt
+    (không tạo mask trên toàn bộ cột); nếu chưa sắp xếp thì sắp xếp trước.
+
+    Args:
+        df: DataFrame có cột thời gian kiểu datetime
+        start: Thời gian nhỏ nhất (None = không giới hạn)
+        end: Thời gian lớn nhất (None = không giới hạn)
+        time_column: Tên cột thời gian
+
+    Returns:
+        pd.DataFrame: Các dòng trong khoảng, sắp xếp theo thời gian
+    """
+    times = df[time_column]
+    if not times.is_monotonic_increasing:
+        df = df.sort_values(time_column, kind='stable', ignore_index=True)
+        times = df[time_column]
+
+    lo = 0 if start is None else times.searchsorted(pd.Timestamp(start), side='left')
+    hi = len(df) if end is None else times.searchsorted(pd.Timestamp(end), side='right')
+    return df.iloc[lo:hi]
+
+
+def read_time_range(
+    filepath: str,
+    start: Optional[TimeLike] = None,
+    end: Optional[TimeLike] = None,
+    columns: Optional[Sequence[str]] = None,
+    time_column: str = TIME_COLUMN
+) -> pd.DataFrame:
+    """
+    Đọc các dòng có thời gian trong [start, end] từ file.
+
+    Với Parquet, điều kiện thời gian được đẩy xuống pyarrow: các row group có
+    min/max nằm ngoài khoảng không được đọc. CSV/Feather đọc toàn bộ (chỉ các
+    cột cần) rồi cắt bằng slice_time_range.
+
+    Args:
+        filepath: Đường dẫn file
+        start: Thời gian nhỏ nhất (None = không giới hạn)
+        end: Thời gian lớn nhất (None = không giới hạn)
+        columns: Chỉ đọc các cột này (luôn kèm cột thời gian). None = đọc tất cả
+        time_column: Tên cột thời gian
+
+    Returns:
+        pd.DataFrame: Các dòng trong khoảng, sắp xếp theo thời gian
+
+    Raises:
+        Giống read_frame
+    """
+    if columns is not None:
+        columns = list(dict.fromkeys([time_column, *columns]))
+
+    filters = []
+    if start is not None:
+        filters.append((time_column, '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append((time_column, '<=', pd.Timestamp(end)))
+
+    if filters and filepath.endswith(PARQUET_EXTENSION):
+        _wait_for_pending_write(filepath)
+        df = _read_arrow(filepath, columns, functools.partial(pd.read_parquet, filters=filters))
+    else:
+        df = read_frame(filepath, columns)
+
+    return slice_time_range(df, start, end, time_column)
+
+
+def read_frame_cached(filepath: str) -> pd.DataFrame:
+    """
+    Đọc toàn bộ file như read_frame nhưng dùng lại kết quả của lần đọc trước
+    nếu file chưa thay đổi (cùng mtime và kích thước).
+
+    Args:
+        filepath: Đường dẫn file
+
+    Returns:
+        pd.DataFrame: Bản sao nông của DataFrame trong cache (caller thêm/sửa cột
+                      không ảnh hưởng tới cache)
+
+    Raises:
+        Giống read_frame
+    """
+    _wait_for_pending_write(filepath)
+    st = os.stat(filepath)
+
+    with _frame_cache_lock:
+        cached = _frame_cache.get(filepath)
+    if cached is not None and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return cached[2].copy(deep=False)
+
+    df = read_frame(filepath)
+    with _frame_cache_lock:
+        _frame_cache[filepath] = (st.st_mtime_ns, st.st_size, df)
+    return df.copy(deep=False)
+
+
+def clear_frame_cache() -> None:
+    """Xóa toàn bộ DataFrame đã cache trong bộ nhớ."""
+    with _frame_cache_lock:
+        _frame_cache.clear()
+
+
+def resolve_data_path(path_func: Callable[..., str], city_name_viet: str) -> str:
+    """
+    Tìm file dữ liệu của thành phố, ưu tiên định dạng đang cấu hình.
+
+    Nếu chưa có file theo DATA_STORAGE_FORMAT (ví dụ vừa đổi sang Parquet nhưng
+    chưa chạy migrate) thì dùng file ở định dạng khác nếu tồn tại.
+
+    Args:
+        path_func: get_raw_data_path hoặc get_processed_data_path
+        city_name_viet: Tên thành phố tiếng Việt
+
+    Returns:
+        str: Đường dẫn file tồn tại, hoặc đường dẫn theo định dạng cấu hình nếu không có file nào
+    """
+    preferred = path_func(city_name_viet)
+    _wait_for_pending_write(preferred)
+    if os.path.exists(preferred):
+        return preferred
+
+    for storage_format in DATA_FILE_EXTENSIONS:
+        candidate = path_func(city_name_viet, storage_format)
+        _wait_for_pending_write(candidate)
+        if os.path.exists(candidate):
+            return candidate
+
+    return preferred
+
+
+def processed_data_exists(city_name_viet: str) -> bool:
+    """Kiểm tra thành phố đã có dữ liệu sạch (ở bất kỳ định dạng nào)."""
+    return os.path.exists(resolve_data_path(get_processed_data_path, city_name_viet))
+
+
+def processed_data_version(city_name_viet: str) -> Optional[Tuple[str, int, int]]:
+    """
+    Phiên bản dữ liệu sạch của một thành phố: (đường dẫn, mtime_ns, kích thước).
+
+    Dùng làm một phần key cho các cache dẫn xuất từ dữ liệu (ví dụ ảnh biểu đồ
+    trong GUI): file được ghi lại thì phiên bản đổi. Chờ lần ghi nền đang dở của
+    file (nếu có) để phiên bản khớp với dữ liệu vừa làm sạch.
+
+    Returns:
+        Optional[Tuple[str, int, int]]: None nếu chưa có dữ liệu sạch
+    """
+    filepath = resolve_data_path(get_processed_data_path, city_name_viet)
+    _wait_for_pending_write(filepath)
+    try:
+        st = os.stat(filepath)
+    except OSError:
+        return None
+    return (filepath, st.st_mtime_ns, st.st_size)
+
+
+def load_processed_data(
+    city_name_viet: str,
+    columns: Optional[Sequence[str]] = None,
+    start: Optional[TimeLike] = None,
+    end: Optional[TimeLike] = None
+) -> pd.DataFrame:
+    """
+    Đọc dữ liệu sạch của một thành phố.
+
+    Args:
+        city_name_viet: Tên thành phố tiếng Việt
+        columns: Chỉ đọc các cột này (None = tất cả)
+        start: Chỉ đọc các dòng có 'Thời Gian' >= start (None = không giới hạn)
+        end: Chỉ đọc các dòng có 'Thời Gian' <= end (None = không giới hạn)
+
+    Returns:
+        pd.DataFrame: Dữ liệu sạch, cột 'Thời Gian' có kiểu datetime
+
+    Raises:
+        FileOperationError: Nếu chưa có dữ liệu sạch cho thành phố
+    """
+    filepath = resolve_data_path(get_processed_data_path, city_name_viet)
+    if not os.path.exists(filepath):
+        error_msg = f"Không tìm thấy file dữ liệu sạch cho {city_name_viet}"
+        log_error(error_msg, logger)
+        raise FileOperationError(error_msg, filepath)
+
+    if start is None and end is None:
+        return read_frame(filepath, columns)
+    return read_time_range(filepath, start, end, columns)
+
+
+def load_range(
+    city_list: Optional[List[str]] = None,
+    start: Optional[TimeLike] = None,
+    end: Optional[TimeLike] = None,
+    columns: Optional[Sequence[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Đọc dữ liệu sạch của nhiều thành phố trong khoảng thời gian [start, end].
+
+    Chỉ đọc các cột được yêu cầu và (với Parquet) các row group giao với khoảng
+    thời gian; thành phố chưa có dữ liệu sạch được bỏ qua.
+
+    Args:
+        city_list: Danh sách thành phố (None = tất cả)
+        start: Thời gian nhỏ nhất (None = không giới hạn)
+        end: Thời gian lớn nhất (None = không giới hạn)
+        columns: Chỉ đọc các cột này (luôn kèm 'Thời Gian'). None = tất cả
+
+    Returns:
+        Dict[str, pd.DataFrame]: {thành phố: dữ liệu trong khoảng, sắp xếp theo thời gian}
+
+    Example:
+        >>> data = load_range(['Hà Nội', 'Huế'], '2025-01-01', '2025-01-02', ['Nhiệt Độ'])
+        >>> data['Hà Nội'].columns.tolist()
+        ['Thời Gian', 'Nhiệt Độ']
+    """
+    if city_list is None:
+        city_list = list(VIETNAM_CITIES.keys())
+
+    data = {}
+    for city in city_list:
+        filepath = resolve_data_path(get_processed_data_path, city)
+        if not os.path.exists(filepath):
+            logger.warning(f"Không tìm thấy dữ liệu sạch cho {city}")
+            continue
+        data[city] = read_time_range(filepath, start, end, columns)
+    return data
+
+
+def migrate_csv_files(
+    storage_format: str = DATA_STORAGE_FORMAT,
+    city_list: Optional[List[str]] = None,
+    remove_csv: bool = False
+) -> List[str]:
+    """
+    Chuyển các file CSV raw/processed hiện có sang định dạng khác.
+
+    Args:
+        storage_format: Định dạng đích ("parquet" hoặc "feather")
+        city_list: Danh sách thành phố (None = tất cả)
+        remove_csv: Xóa file CSV gốc sau khi chuyển thành công
+
+    Returns:
+        List[str]: Danh sách file đã được tạo
+    """
+    if storage_format == "csv":
+        log_warning("Định dạng đích là CSV, không cần chuyển đổi", logger)
+        return []
+
+    if city_list is None:
+        city_list = list(VIETNAM_CITIES.keys())
+
+    created = []
+    for city in city_list:
+        for path_func in (get_raw_data_path, get_processed_data_path):
+            source = path_func(city, "csv")
+            if not os.path.exists(source):
+                continue
+
+            target = path_func(city, storage_format)
+            try:
+                write_frame(read_frame(source), target)
+            except (FileOperationError, OSError, pd.errors.ParserError) as e:
+                log_error(f"Không thể chuyển {source}: {e}", logger)
+                continue
+
+            created.append(target)
+            logger.info(f"Đã chuyển {os.path.basename(source)} → {os.path.basename(target)}")
+            if remove_csv:
+                os.remove(source)
+
+    log_success(f"Đã chuyển {len(created)} file sang {storage_format}", logger)
+    return created
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Chuyển dữ liệu CSV sang định dạng cột")
+    parser.add_argument("format", choices=["parquet", "feather"], help="Định dạng đích")
+    parser.add_argument("--remove-csv", action="store_true", help="Xóa file CSV sau khi chuyển")
+    args = parser.parse_args()
+
+    migrate_csv_files(args.format, remove_csv=args.remove_csv)
@@ -31,6 +31,8 @@ from .constants import (
 from .column_names import CleanColumns
 from .exceptions import FileOperationError, ChartGenerationError, EmptyDataFrameError
 from .logger import get_logger, log_success, log_error, log_warning, log_info
+from .storage import read_frame, resolve_data_path
+from .render_cache import cached_chart
 from .plot_helpers import (
     create_figure, format_plot_labels, format_secondary_axis_labels,
     save_plot_with_config, rotate_xlabels, add_legend, setup_tight_layout
@@ -61,14 +63,13 @@ def _load_processed_data(filepath: str) -> pd.DataFrame:
         raise FileOperationError(error_msg, filepath)
     
     try:
-        df = pd.read_csv(filepath)
+        df = read_frame(filepath)
         
         if len(df) == 0:
             error_msg = "Dữ liệu trống"
             log_error(error_msg, logger)
             raise EmptyDataFrameError(error_msg)
         
-        df[CleanColumns.THOI_GIAN.value] = pd.to_datetime(df[CleanColumns.THOI_GIAN.value])
         return df
         
     except pd.errors.ParserError as e:
@@ -77,6 +78,32 @@ def _load_processed_data(filepath: str) -> pd.DataFrame:
         raise FileOperationError(error_msg, filepath) from e
 
 
+def _get_chart_data(city_name_viet: str, df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Lấy dữ liệu để vẽ: dùng DataFrame truyền vào nếu có, nếu không thì đọc từ đĩa.
+    
+    Args:
+        city_name_viet: Tên thành phố tiếng Việt
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ (hoặc None)
+        
+    Returns:
+        pd.DataFrame: Dữ liệu sạch của thành phố
+        
+    Raises:
+        FileOperationError: Nếu phải đọc từ đĩa nhưng chưa có file
+        EmptyDataFrameError: Nếu DataFrame rỗng
+    """
+    if df is None:
+        return _load_processed_data(resolve_data_path(get_processed_data_path, city_name_viet))
+    
+    if len(df) == 0:
+        error_msg = "Dữ liệu trống"
+        log_error(error_msg, logger)
+        raise EmptyDataFrameError(error_msg)
+    
+    return df
+
+
 def _validate_column_exists(df: pd.DataFrame, column: str) -> None:
     """
     Kiểm tra cột tồn tại trong DataFrame.
@@ -94,12 +121,17 @@ def _validate_column_exists(df: pd.DataFrame, column: str) -> None:
         raise ChartGenerationError(error_msg)
 
 
-def create_weather_chart(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[str]:
+@cached_chart("main", figsize=DEFAULT_FIGSIZE, dpi=DEFAULT_DPI, points=MAX_TIME_POINTS_DISPLAY)
+def create_weather_chart(
+    city_name_viet: str = DEFAULT_CITY_VIET,
+    df: Optional[pd.DataFrame] = None
+) -> Optional[str]:
     """
     Vẽ biểu đồ kết hợp (Nhiệt độ & Độ ẩm) và lưu thành ảnh PNG.
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt (mặc định: "Hà Nội")
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ (None = đọc từ file)
     
     Returns:
         Optional[str]: Đường dẫn file ảnh nếu thành công, None nếu thất bại
@@ -109,14 +141,13 @@ def create_weather_chart(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[st
         - Sử dụng 2 trục Y để so sánh hai đại lượng
     """
     
-    processed_data_path = get_processed_data_path(city_name_viet)
     chart_path = get_chart_path(city_name_viet, "main")
     
     logger.info(f"📊 Đang vẽ biểu đồ thời tiết (Nhiệt độ & Độ ẩm) cho {city_name_viet}...")
     
     try:
         # Load data
-        df = _load_processed_data(processed_data_path)
+        df = _get_chart_data(city_name_viet, df)
         
         # Validate columns
         _validate_column_exists(df, CleanColumns.NHIET_DO.value)
@@ -253,12 +284,17 @@ def create_weather_chart(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[st
         return None
 
 
-def create_temperature_histogram(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[str]:
+@cached_chart("histogram", figsize=SMALL_FIGSIZE, dpi=DEFAULT_DPI)
+def create_temperature_histogram(
+    city_name_viet: str = DEFAULT_CITY_VIET,
+    df: Optional[pd.DataFrame] = None
+) -> Optional[str]:
     """
     Vẽ histogram phân bố nhiệt độ và lưu thành ảnh.
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt (mặc định: "Hà Nội")
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ (None = đọc từ file)
     
     Returns:
         Optional[str]: Đường dẫn file ảnh nếu thành công, None nếu thất bại
@@ -268,14 +304,13 @@ def create_temperature_histogram(city_name_viet: str = DEFAULT_CITY_VIET) -> Opt
         - Có đường cong Gaussian overlay
     """
     
-    processed_data_path = get_processed_data_path(city_name_viet)
     chart_path = get_chart_path(city_name_viet, "histogram")
     
     logger.info(f"📊 Đang vẽ histogram phân bố nhiệt độ cho {city_name_viet}...")
     
     try:
         # Load data
-        df = _load_processed_data(processed_data_path)
+        df = _get_chart_data(city_name_viet, df)
         _validate_column_exists(df, CleanColumns.NHIET_DO.value)
         
         # Tạo figure
@@ -343,25 +378,29 @@ def create_temperature_histogram(city_name_viet: str = DEFAULT_CITY_VIET) -> Opt
         return None
 
 
-def create_wind_speed_chart(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional[str]:
+@cached_chart("wind", figsize=DEFAULT_FIGSIZE, dpi=DEFAULT_DPI, points=MAX_TIME_POINTS_DISPLAY)
+def create_wind_speed_chart(
+    city_name_viet: str = DEFAULT_CITY_VIET,
+    df: Optional[pd.DataFrame] = None
+) -> Optional[str]:
     """
     Vẽ biểu đồ tốc gió và lưu thành ảnh.
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt (mặc định: "Hà Nội")
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ (None = đọc từ file)
     
     Returns:
         Optional[str]: Đường dẫn file ảnh nếu thành công, None nếu thất bại
     """
     
-    processed_data_path = get_processed_data_path(city_name_viet)
     chart_path = get_chart_path(city_name_viet, "wind")
     
     logger.info(f"📊 Đang vẽ biểu đồ tốc gió cho {city_name_viet}...")
     
     try:
         # Load data
-        df = _load_processed_data(processed_data_path)
+        df = _get_chart_data(city_name_viet, df)
         _validate_column_exists(df, CleanColumns.TOC_GIO.value)
         
         df_plot = df.head(MAX_TIME_POINTS_DISPLAY)
@@ -428,12 +467,17 @@ def create_wind_speed_chart(city_name_viet: str = DEFAULT_CITY_VIET) -> Optional
         return None
 
 
-def create_all_charts(city_name_viet: str = DEFAULT_CITY_VIET) -> bool:
+def create_all_charts(
+    city_name_viet: str = DEFAULT_CITY_VIET,
+    df: Optional[pd.DataFrame] = None
+) -> bool:
     """
     Vẽ tất cả các biểu đồ (kết hợp, histogram, tốc gió).
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt (mặc định: "Hà Nội")
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ. None = đọc file một lần
+            rồi dùng chung cho cả 3 biểu đồ
     
     Returns:
         bool: True nếu vẽ thành công tất cả, False nếu có biểu đồ thất bại
@@ -443,10 +487,16 @@ def create_all_charts(city_name_viet: str = DEFAULT_CITY_VIET) -> bool:
     logger.info(f"🎨 TRỰC QUAN HÓA DỮ LIỆU THỜI TIẾT - {city_name_viet}")
     logger.info("="*50 + "\n")
     
+    try:
+        df = _get_chart_data(city_name_viet, df)
+    except (FileOperationError, EmptyDataFrameError) as e:
+        logger.error(f"Không thể vẽ biểu đồ: {e}")
+        return False
+    
     results = {
-        'Biểu đồ chính': create_weather_chart(city_name_viet),
-        'Histogram': create_temperature_histogram(city_name_viet),
-        'Tốc gió': create_wind_speed_chart(city_name_viet)
+        'Biểu đồ chính': create_weather_chart(city_name_viet, df),
+        'Histogram': create_temperature_histogram(city_name_viet, df),
+        'Tốc gió': create_wind_speed_chart(city_name_viet, df)
     }
     
     logger.info("\n" + "="*50)
@@ -25,19 +25,47 @@ import seaborn as sns
 from typing import Optional, List, Dict
 from .config import get_processed_data_path, get_chart_path, MULTI_CITY_CHART_PATH, VIETNAM_CITIES
 from .logger import get_logger
+from .storage import TimeLike, load_range, read_frame, resolve_data_path
+from .plot_helpers import save_plot_with_config
+from .render_cache import cached_chart
 
 
 # Logger for module
 logger = get_logger(__name__)
 
 
-def create_comparison_chart(city_list: List[str], metric: str = 'Nhiệt Độ') -> Optional[str]:
+def _get_city_data(city_name_viet: str, df: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """
+    Dùng DataFrame truyền vào nếu có, nếu không thì đọc dữ liệu sạch từ đĩa.
+    
+    Returns:
+        Optional[pd.DataFrame]: Dữ liệu sạch, None nếu chưa có dữ liệu
+    """
+    if df is not None:
+        return df
+    
+    processed_path = resolve_data_path(get_processed_data_path, city_name_viet)
+    if not os.path.exists(processed_path):
+        logger.warning("Không tìm thấy dữ liệu cho %s", city_name_viet)
+        return None
+    
+    return read_frame(processed_path)
+
+
+def create_comparison_chart(
+    city_list: List[str],
+    metric: str = 'Nhiệt Độ',
+    start: Optional[TimeLike] = None,
+    end: Optional[TimeLike] = None
+) -> Optional[str]:
     """
     Vẽ biểu đồ so sánh một metric giữa nhiều thành phố.
     
     Args:
         city_list: Danh sách tên thành phố tiếng Việt
         metric: Metric cần so sánh (Nhiệt Độ, Độ Ẩm, Tốc Gió, ...)
+        start: Chỉ vẽ từ thời điểm này (None = từ đầu)
+        end: Chỉ vẽ tới thời điểm này (None = tới cuối)
     
     Returns:
         Optional[str]: Đường dẫn file ảnh nếu thành công, None nếu thất bại
@@ -48,19 +76,16 @@ def create_comparison_chart(city_list: List[str], metric: str = 'Nhiệt Độ')
     try:
         fig, ax = plt.subplots(figsize=(14, 7))
         
-        # Đọc dữ liệu từ các thành phố
+        # Đọc dữ liệu từ các thành phố (chỉ cột thời gian + metric, trong khoảng thời gian)
         all_data = []
         colors = plt.cm.Set3(np.linspace(0, 1, len(city_list)))
+        city_data = load_range(city_list, start, end, columns=[metric])
         
         for idx, city in enumerate(city_list):
-            processed_path = get_processed_data_path(city)
-            if not os.path.exists(processed_path):
-                logger.warning(f"Không tìm thấy dữ liệu cho {city}")
+            df = city_data.get(city)
+            if df is None:
                 continue
             
-            df = pd.read_csv(processed_path)
-            df['Thời Gian'] = pd.to_datetime(df['Thời Gian'])
-            
             # Validate column exists
             if metric not in df.columns:
                 logger.warning("Cột '%s' không tồn tại trong dữ liệu %s. Có: %s", metric, city, df.columns.tolist())
@@ -96,12 +121,17 @@ def create_comparison_chart(city_list: List[str], metric: str = 'Nhiệt Độ')
         return None
 
 
-def create_correlation_heatmap(city_name_viet: str = "Hà Nội") -> Optional[str]:
+@cached_chart("heatmap", figsize=(10, 8), dpi=100)
+def create_correlation_heatmap(
+    city_name_viet: str = "Hà Nội",
+    df: Optional[pd.DataFrame] = None
+) -> Optional[str]:
     """
     Vẽ heatmap tương quan giữa các biến số.
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ (None = đọc từ file)
     
     Returns:
         Optional[str]: Đường dẫn file ảnh nếu thành công, None nếu thất bại
@@ -110,13 +140,10 @@ def create_correlation_heatmap(city_name_viet: str = "Hà Nội") -> Optional[st
     logger.info(f"📊 Đang vẽ heatmap tương quan cho {city_name_viet}...")
     
     try:
-        processed_path = get_processed_data_path(city_name_viet)
-        if not os.path.exists(processed_path):
-            logger.warning("Không tìm thấy dữ liệu cho %s", city_name_viet)
+        df = _get_city_data(city_name_viet, df)
+        if df is None:
             return None
         
-        df = pd.read_csv(processed_path)
-        
         # Chọn các cột số và kiểm tra tồn tại
         numeric_cols = ['Nhiệt Độ', 'Độ Ẩm', 'Áp Suất', 'Tốc Gió']
         if 'Nhiệt Độ Cảm Nhận' in df.columns:
@@ -149,8 +176,7 @@ def create_correlation_heatmap(city_name_viet: str = "Hà Nội") -> Optional[st
         chart_path = get_chart_path(city_name_viet, "heatmap")
         os.makedirs(os.path.dirname(chart_path), exist_ok=True)
         plt.tight_layout()
-        plt.savefig(chart_path, dpi=100, bbox_inches='tight')
-        plt.close()
+        save_plot_with_config(fig, chart_path, dpi=100, facecolor='auto')
         
         logger.info(f"✅ Đã lưu heatmap: {chart_path}")
         return chart_path
@@ -161,13 +187,20 @@ def create_correlation_heatmap(city_name_viet: str = "Hà Nội") -> Optional[st
         return None
 
 
-def create_boxplot(city_list: List[str], metric: str = 'Nhiệt Độ') -> Optional[str]:
+def create_boxplot(
+    city_list: List[str],
+    metric: str = 'Nhiệt Độ',
+    start: Optional[TimeLike] = None,
+    end: Optional[TimeLike] = None
+) -> Optional[str]:
     """
     Vẽ boxplot so sánh phân bố một metric giữa các thành phố.
     
     Args:
         city_list: Danh sách tên thành phố tiếng Việt
         metric: Metric cần so sánh
+        start: Chỉ lấy dữ liệu từ thời điểm này (None = từ đầu)
+        end: Chỉ lấy dữ liệu tới thời điểm này (None = tới cuối)
     
     Returns:
         Optional[str]: Đường dẫn file ảnh nếu thành công, None nếu thất bại
@@ -179,13 +212,7 @@ def create_boxplot(city_list: List[str], metric: str = 'Nhiệt Độ') -> Optio
         data_to_plot = []
         labels = []
         
-        for city in city_list:
-            processed_path = get_processed_data_path(city)
-            if not os.path.exists(processed_path):
-                continue
-            
-            df = pd.read_csv(processed_path)
-            
+        for city, df in load_range(city_list, start, end, columns=[metric]).items():
             # Validate column exists
             if metric not in df.columns:
                 logger.warning("'%s' không tồn tại trong dữ liệu %s", metric, city)
@@ -230,12 +257,17 @@ def create_boxplot(city_list: List[str], metric: str = 'Nhiệt Độ') -> Optio
         return None
 
 
-def create_pressure_chart(city_name_viet: str = "Hà Nội") -> Optional[str]:
+@cached_chart("pressure", figsize=(14, 7), dpi=100)
+def create_pressure_chart(
+    city_name_viet: str = "Hà Nội",
+    df: Optional[pd.DataFrame] = None
+) -> Optional[str]:
     """
     Vẽ biểu đồ Áp suất riêng biệt.
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ (None = đọc từ file)
     
     Returns:
         Optional[str]: Đường dẫn file ảnh nếu thành công, None nếu thất bại
@@ -244,14 +276,10 @@ def create_pressure_chart(city_name_viet: str = "Hà Nội") -> Optional[str]:
     logger.info(f"📊 Đang vẽ biểu đồ Áp suất cho {city_name_viet}...")
     
     try:
-        processed_path = get_processed_data_path(city_name_viet)
-        if not os.path.exists(processed_path):
-            logger.warning("Không tìm thấy dữ liệu cho %s", city_name_viet)
+        df = _get_city_data(city_name_viet, df)
+        if df is None:
             return None
         
-        df = pd.read_csv(processed_path)
-        df['Thời Gian'] = pd.to_datetime(df['Thời Gian'])
-        
         if 'Áp Suất' not in df.columns:
             logger.warning("Không có dữ liệu Áp Suất")
             return None
@@ -286,8 +314,7 @@ def create_pressure_chart(city_name_viet: str = "Hà Nội") -> Optional[str]:
         chart_path = get_chart_path(city_name_viet, "pressure")
         os.makedirs(os.path.dirname(chart_path), exist_ok=True)
         plt.tight_layout()
-        plt.savefig(chart_path, dpi=100, bbox_inches='tight')
-        plt.close()
+        save_plot_with_config(fig, chart_path, dpi=100, facecolor='auto')
         
         logger.info(f"✅ Đã lưu biểu đồ áp suất: {chart_path}")
         return chart_path
@@ -298,12 +325,17 @@ def create_pressure_chart(city_name_viet: str = "Hà Nội") -> Optional[str]:
         return None
 
 
-def create_visibility_chart(city_name_viet: str = "Hà Nội") -> Optional[str]:
+@cached_chart("visibility", figsize=(14, 7), dpi=100)
+def create_visibility_chart(
+    city_name_viet: str = "Hà Nội",
+    df: Optional[pd.DataFrame] = None
+) -> Optional[str]:
     """
     Vẽ biểu đồ Tầm nhìn riêng biệt.
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ (None = đọc từ file)
     
     Returns:
         Optional[str]: Đường dẫn file ảnh nếu thành công, None nếu thất bại
@@ -312,14 +344,10 @@ def create_visibility_chart(city_name_viet: str = "Hà Nội") -> Optional[str]:
     logger.info(f"📊 Đang vẽ biểu đồ Tầm nhìn cho {city_name_viet}...")
     
     try:
-        processed_path = get_processed_data_path(city_name_viet)
-        if not os.path.exists(processed_path):
-            logger.warning("Không tìm thấy dữ liệu cho %s", city_name_viet)
+        df = _get_city_data(city_name_viet, df)
+        if df is None:
             return None
         
-        df = pd.read_csv(processed_path)
-        df['Thời Gian'] = pd.to_datetime(df['Thời Gian'])
-        
         if 'Tầm Nhìn' not in df.columns:
             logger.warning("Không có dữ liệu Tầm Nhìn")
             return None
@@ -361,8 +389,7 @@ def create_visibility_chart(city_name_viet: str = "Hà Nội") -> Optional[str]:
         chart_path = get_chart_path(city_name_viet, "visibility")
         os.makedirs(os.path.dirname(chart_path), exist_ok=True)
         plt.tight_layout()
-        plt.savefig(chart_path, dpi=100, bbox_inches='tight')
-        plt.close()
+        save_plot_with_config(fig, chart_path, dpi=100, facecolor='auto')
         
         logger.info(f"✅ Đã lưu biểu đồ tầm nhìn: {chart_path}")
         return chart_path
@@ -372,12 +399,17 @@ def create_visibility_chart(city_name_viet: str = "Hà Nội") -> Optional[str]:
         plt.close()
         return None
 
-def create_pressure_visibility_chart(city_name_viet: str = "Hà Nội") -> Optional[str]:
+@cached_chart("pressure_visibility", figsize=(12, 6), dpi=100)
+def create_pressure_visibility_chart(
+    city_name_viet: str = "Hà Nội",
+    df: Optional[pd.DataFrame] = None
+) -> Optional[str]:
     """
     Vẽ biểu đồ kết hợp Áp suất và Tầm nhìn.
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ (None = đọc từ file)
     
     Returns:
         Optional[str]: Đường dẫn file ảnh nếu thành công, None nếu thất bại
@@ -386,14 +418,10 @@ def create_pressure_visibility_chart(city_name_viet: str = "Hà Nội") -> Optio
     logger.info(f"📊 Đang vẽ biểu đồ Áp suất & Tầm nhìn cho {city_name_viet}...")
     
     try:
-        processed_path = get_processed_data_path(city_name_viet)
-        if not os.path.exists(processed_path):
-            logger.warning("Không tìm thấy dữ liệu cho %s", city_name_viet)
+        df = _get_city_data(city_name_viet, df)
+        if df is None:
             return None
         
-        df = pd.read_csv(processed_path)
-        df['Thời Gian'] = pd.to_datetime(df['Thời Gian'])
-        
         if 'Áp Suất' not in df.columns:
             logger.warning("Không có dữ liệu Áp Suất")
             return None
@@ -436,8 +464,7 @@ def create_pressure_visibility_chart(city_name_viet: str = "Hà Nội") -> Optio
         chart_path = get_chart_path(city_name_viet, "pressure_visibility")
         os.makedirs(os.path.dirname(chart_path), exist_ok=True)
         plt.tight_layout()
-        plt.savefig(chart_path, dpi=100, bbox_inches='tight')
-        plt.close()
+        save_plot_with_config(fig, chart_path, dpi=100, facecolor='auto')
         
         logger.info(f"✅ Đã lưu biểu đồ áp suất & tầm nhìn: {chart_path}")
         return chart_path
@@ -448,12 +475,17 @@ def create_pressure_visibility_chart(city_name_viet: str = "Hà Nội") -> Optio
         return None
 
 
-def create_cloud_cover_chart(city_name_viet: str = "Hà Nội") -> Optional[str]:
+@cached_chart("clouds", figsize=(14, 7), dpi=100)
+def create_cloud_cover_chart(
+    city_name_viet: str = "Hà Nội",
+    df: Optional[pd.DataFrame] = None
+) -> Optional[str]:
     """
     Vẽ biểu đồ độ che phủ mây.
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ (None = đọc từ file)
     
     Returns:
         Optional[str]: Đường dẫn file ảnh nếu thành công, None nếu thất bại
@@ -462,14 +494,10 @@ def create_cloud_cover_chart(city_name_viet: str = "Hà Nội") -> Optional[str]
     logger.info(f"📊 Đang vẽ biểu đồ độ che phủ mây cho {city_name_viet}...")
     
     try:
-        processed_path = get_processed_data_path(city_name_viet)
-        if not os.path.exists(processed_path):
-            logger.warning("Không tìm thấy dữ liệu cho %s", city_name_viet)
+        df = _get_city_data(city_name_viet, df)
+        if df is None:
             return None
         
-        df = pd.read_csv(processed_path)
-        df['Thời Gian'] = pd.to_datetime(df['Thời Gian'])
-        
         if 'Độ Che Phủ Mây' not in df.columns:
             logger.warning("Không có dữ liệu Độ Che Phủ Mây")
             return None
@@ -503,8 +531,7 @@ def create_cloud_cover_chart(city_name_viet: str = "Hà Nội") -> Optional[str]
         chart_path = get_chart_path(city_name_viet, "clouds")
         os.makedirs(os.path.dirname(chart_path), exist_ok=True)
         plt.tight_layout()
-        plt.savefig(chart_path, dpi=100, bbox_inches='tight')
-        plt.close()
+        save_plot_with_config(fig, chart_path, dpi=100, facecolor='auto')
         
         logger.info(f"✅ Đã lưu biểu đồ độ che phủ mây: {chart_path}")
         return chart_path
@@ -515,12 +542,17 @@ def create_cloud_cover_chart(city_name_viet: str = "Hà Nội") -> Optional[str]
         return None
 
 
-def create_all_advanced_charts(city_name_viet: str = "Hà Nội") -> Dict[str, Optional[str]]:
+def create_all_advanced_charts(
+    city_name_viet: str = "Hà Nội",
+    df: Optional[pd.DataFrame] = None
+) -> Dict[str, Optional[str]]:
     """
     Vẽ tất cả các biểu đồ nâng cao cho một thành phố.
     
     Args:
         city_name_viet: Tên thành phố tiếng Việt
+        df: DataFrame dữ liệu sạch đã có trong bộ nhớ. None = đọc file một lần
+            rồi dùng chung cho tất cả biểu đồ
     
     Returns:
         Dict[str, Optional[str]]: Dictionary chứa kết quả vẽ biểu đồ
@@ -530,10 +562,19 @@ def create_all_advanced_charts(city_name_viet: str = "Hà Nội") -> Dict[str, O
     logger.info("🎨 TRỰC QUAN HÓA NÂNG CAO - %s", city_name_viet)
     logger.info("%s", "="*50 + "\n")
     
+    try:
+        df = _get_city_data(city_name_viet, df)
+    except Exception as e:
+        logger.error("Lỗi đọc dữ liệu cho %s: %s", city_name_viet, e)
+        df = None
+    
+    if df is None:
+        return {'Áp suất': None, 'Tầm nhìn': None, 'Độ che phủ mây': None}
+    
     results = {
-        'Áp suất': create_pressure_chart(city_name_viet),
-        'Tầm nhìn': create_visibility_chart(city_name_viet),
-        'Độ che phủ mây': create_cloud_cover_chart(city_name_viet)
+        'Áp suất': create_pressure_chart(city_name_viet, df),
+        'Tầm nhìn': create_visibility_chart(city_name_viet, df),
+        'Độ che phủ mây': create_cloud_cover_chart(city_name_viet, df)
     }
     
     logger.info("%s", "\n" + "="*50)
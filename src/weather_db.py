@@ -0,0 +1,337 @@
+# src/weather_db.py
+"""
+Module cơ sở dữ liệu SQLite (tùy chọn) cho dữ liệu thời tiết đã làm sạch.
+
+Bật bằng biến môi trường WEATHER_DATABASE=1: mỗi lần lưu dữ liệu sạch, bản sao
+của thành phố trong cơ sở dữ liệu được thay mới (file CSV/Parquet vẫn là nguồn
+chính). Bảng tổng quan và xếp hạng thành phố khi đó được tính bằng truy vấn
+tổng hợp SQL thay vì đọc toàn bộ DataFrame.
+
+Schema (chuẩn hóa):
+    cities(id, name)                 - tên thành phố tiếng Việt
+    descriptions(id, text)           - mô tả thời tiết
+    observations(city_id, time, ...) - khóa chính (city_id, time), WITHOUT ROWID
+                                       → dữ liệu nằm sẵn theo thứ tự (thành phố, thời gian)
+
+Chức năng:
+    - WAL: GUI/CLI đọc trong khi luồng ghi nền đang ghi
+    - Ghi hàng loạt bằng executemany trong một transaction
+    - Truy vấn theo khoảng thời gian và tổng hợp (mean/min/max/count/sum)
+      với câu SQL cố định (được sqlite3 cache dạng prepared statement)
+
+Author: Weather Forecast Pro Team
+Date: 2025-12-27
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .column_names import CleanColumns, get_raw_column_name
+from .config import COMPACT_DTYPES_ENABLED, VIETNAM_CITIES, get_database_path
+from .logger import get_logger, log_success, log_warning
+from .storage import TimeLike, load_processed_data, processed_data_exists, to_compact_dtypes
+
+
+# Logger cho module này
+logger = get_logger(__name__)
+
+TIME_COLUMN = CleanColumns.THOI_GIAN.value
+DESCRIPTION_COLUMN = CleanColumns.MO_TA.value
+CITY_COLUMN = CleanColumns.THANH_PHO.value
+
+# Các cột số được lưu trong bảng observations: {tên cột sạch: tên cột SQL}
+METRIC_COLUMNS: Dict[str, str] = {
+    column.value: get_raw_column_name(column.value)
+    for column in (
+        CleanColumns.NHIET_DO, CleanColumns.NHIET_DO_CAM_NHAN, CleanColumns.DO_AM,
+        CleanColumns.AP_SUAT, CleanColumns.TOC_GIO, CleanColumns.HUONG_GIO,
+        CleanColumns.MAY, CleanColumns.TAM_NHIN,
+    )
+}
+
+# Phép tổng hợp hỗ trợ: {tên phép (như pandas): hàm SQL}
+SQL_AGGREGATIONS = {
+    'mean': 'AVG',
+    'min': 'MIN',
+    'max': 'MAX',
+    'sum': 'SUM',
+    'count': 'COUNT',
+}
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS cities (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS descriptions (
+    id INTEGER PRIMARY KEY,
+    text TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS observations (
+    city_id INTEGER NOT NULL REFERENCES cities(id),
+    time INTEGER NOT NULL,
+    {', '.join(f'{name} REAL' for name in METRIC_COLUMNS.values())},
+    description_id INTEGER REFERENCES descriptions(id),
+    PRIMARY KEY (city_id, time)
+) WITHOUT ROWID;
+"""
+
+# Danh sách thành phố được truyền dưới dạng một mảng JSON (json_each) để câu SQL
+# không đổi theo số thành phố
+_CITY_FILTER = "c.name IN (SELECT value FROM json_each(?))"
+
+# Mỗi thread một connection cho mỗi file cơ sở dữ liệu
+_local = threading.local()
+
+
+def get_connection(db_path: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Lấy connection của thread hiện tại (tạo mới và tạo schema nếu cần).
+
+    Args:
+        db_path: Đường dẫn file cơ sở dữ liệu (mặc định: get_database_path())
+
+    Returns:
+        sqlite3.Connection: Connection ở chế độ WAL
+    """
+    db_path = db_path or get_database_path()
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = {}
+
+    conn = connections.get(db_path)
+    if conn is None:
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.executescript(_SCHEMA)
+        connections[db_path] = conn
+    return conn
+
+
+def close_connections() -> None:
+    """Đóng các connection của thread hiện tại."""
+    for conn in getattr(_local, 'connections', {}).values():
+        conn.close()
+    _local.connections = {}
+
+
+def _to_epoch_seconds(value: TimeLike) -> int:
+    """Thời gian (không múi giờ) → số giây kể từ 1970-01-01, cách lưu cột time."""
+    return (pd.Timestamp(value) - pd.Timestamp(0)) // pd.Timedelta(seconds=1)
+
+
+def _column_values(df: pd.DataFrame, column: str) -> List[Optional[float]]:
+    """Giá trị một cột số dạng list Python (NaN → NULL; cột thiếu → toàn NULL)."""
+    if column not in df.columns:
+        return [None] * len(df)
+    values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+    return [None if np.isnan(value) else float(value) for value in values]
+
+
+def write_city(
+    df: pd.DataFrame,
+    city_name_viet: str,
+    db_path: Optional[str] = None,
+    replace: bool = True
+) -> int:
+    """
+    Thay dữ liệu của một thành phố trong cơ sở dữ liệu bằng DataFrame sạch.
+
+    Tất cả thao tác (xóa dữ liệu cũ + executemany) nằm trong một transaction:
+    người đọc thấy dữ liệu cũ hoặc mới, không bao giờ thấy dữ liệu dở.
+
+    Args:
+        df: DataFrame đã làm sạch (cột tiếng Việt)
+        city_name_viet: Tên thành phố tiếng Việt
+        db_path: Đường dẫn file cơ sở dữ liệu (mặc định: get_database_path())
+        replace: False = ghi thêm, không xóa dữ liệu cũ (ghi theo từng khối)
+
+    Returns:
+        int: Số dòng đã ghi
+    """
+    conn = get_connection(db_path)
+
+    times = pd.to_datetime(df[TIME_COLUMN]).to_numpy(dtype='datetime64[s]').astype(np.int64).tolist()
+    metrics = [_column_values(df, column) for column in METRIC_COLUMNS]
+    if DESCRIPTION_COLUMN in df.columns:
+        descriptions = [None if pd.isna(text) else str(text) for text in df[DESCRIPTION_COLUMN]]
+    else:
+        descriptions = [None] * len(df)
+
+    with conn:
+        conn.execute("INSERT OR IGNORE INTO cities (name) VALUES (?)", (city_name_viet,))
+        city_id = conn.execute("SELECT id FROM cities WHERE name = ?", (city_name_viet,)).fetchone()[0]
+
+        unique_texts = sorted({text for text in descriptions if text is not None})
+        conn.executemany("INSERT OR IGNORE INTO descriptions (text) VALUES (?)",
+                         [(text,) for text in unique_texts])
+        description_ids = dict(conn.execute(
+            "SELECT text, id FROM descriptions WHERE text IN (SELECT value FROM json_each(?))",
+            (json.dumps(unique_texts, ensure_ascii=False),)
+        ).fetchall())
+
+        if replace:
+            conn.execute("DELETE FROM observations WHERE city_id = ?", (city_id,))
+        columns = ', '.join(['city_id', 'time', *METRIC_COLUMNS.values(), 'description_id'])
+        placeholders = ', '.join('?' * (len(METRIC_COLUMNS) + 3))
+        conn.executemany(
+            f"INSERT OR REPLACE INTO observations ({columns}) VALUES ({placeholders})",
+            zip([city_id] * len(times), times, *metrics,
+                [description_ids.get(text) for text in descriptions])
+        )
+
+    logger.info(f"🗄️ Đã ghi {len(times)} dòng của {city_name_viet} vào cơ sở dữ liệu")
+    return len(times)
+
+
+def _metric_sql_columns(metrics: Sequence[str]) -> Dict[str, str]:
+    """Lọc các metric có trong bảng observations."""
+    unknown = [metric for metric in metrics if metric not in METRIC_COLUMNS]
+    if unknown:
+        log_warning(f"Bỏ qua cột không có trong cơ sở dữ liệu: {', '.join(unknown)}", logger)
+    return {metric: METRIC_COLUMNS[metric] for metric in metrics if metric in METRIC_COLUMNS}
+
+
+def read_range(
+    city_name_viet: str,
+    start: Optional[TimeLike] = None,
+    end: Optional[TimeLike] = None,
+    columns: Optional[Sequence[str]] = None,
+    db_path: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Đọc dữ liệu của một thành phố trong khoảng thời gian [start, end].
+
+    Truy vấn quét theo khóa chính (city_id, time) nên chỉ chạm các dòng trong khoảng.
+
+    Args:
+        city_name_viet: Tên thành phố tiếng Việt
+        start: Thời gian nhỏ nhất (None = không giới hạn)
+        end: Thời gian lớn nhất (None = không giới hạn)
+        columns: Các cột số cần đọc (None = tất cả + 'Mô Tả')
+        db_path: Đường dẫn file cơ sở dữ liệu (mặc định: get_database_path())
+
+    Returns:
+        pd.DataFrame: Cột 'Thời Gian' + các cột yêu cầu, sắp xếp theo thời gian
+                      (kiểu gọn COMPACT_CLEAN_DTYPES nếu COMPACT_DTYPES_ENABLED)
+    """
+    if columns is None:
+        selected = dict(METRIC_COLUMNS)
+    else:
+        selected = _metric_sql_columns([col for col in columns if col not in (TIME_COLUMN, DESCRIPTION_COLUMN)])
+    select_list = ', '.join(['o.time', *(f'o.{name}' for name in selected.values())])
+    with_description = columns is None or DESCRIPTION_COLUMN in columns
+    if with_description:
+        select_list += ', d.text'
+
+    query = (
+        f"SELECT {select_list} FROM observations o "
+        "JOIN cities c ON c.id = o.city_id "
+        "LEFT JOIN descriptions d ON d.id = o.description_id "
+        "WHERE c.name = ? AND o.time >= ? AND o.time <= ? ORDER BY o.time"
+    )
+    low = _to_epoch_seconds(start) if start is not None else -2**63
+    high = _to_epoch_seconds(end) if end is not None else 2**63 - 1
+    rows = get_connection(db_path).execute(query, (city_name_viet, low, high)).fetchall()
+
+    names = [TIME_COLUMN, *selected] + ([DESCRIPTION_COLUMN] if with_description else [])
+    df = pd.DataFrame.from_records(rows, columns=names)
+    df[TIME_COLUMN] = pd.to_datetime(df[TIME_COLUMN].astype(np.int64), unit='s')
+    for metric in selected:
+        df[metric] = df[metric].astype(np.float64)
+    return to_compact_dtypes(df) if COMPACT_DTYPES_ENABLED else df
+
+
+def aggregate(
+    city_list: List[str],
+    metrics: Sequence[str],
+    aggregations: Sequence[str] = ('mean', 'min', 'max', 'count'),
+    db_path: Optional[str] = None
+) -> pd.DataFrame:
+    """
+    Tính thống kê của các metric cho nhiều thành phố bằng một truy vấn GROUP BY.
+
+    Kết quả có cùng dạng với multi_city_analyzer.summarize_panel.
+
+    Args:
+        city_list: Danh sách tên thành phố tiếng Việt
+        metrics: Các metric (tên cột sạch) cần tổng hợp
+        aggregations: Các phép tổng hợp, trong SQL_AGGREGATIONS
+        db_path: Đường dẫn file cơ sở dữ liệu (mặc định: get_database_path())
+
+    Returns:
+        pd.DataFrame: Index là thành phố (thành phố không có trong cơ sở dữ liệu bị bỏ),
+                      cột MultiIndex (metric, phép tổng hợp)
+
+    Raises:
+        ValueError: Nếu có phép tổng hợp không hỗ trợ (ví dụ median, std)
+    """
+    unsupported = [agg for agg in aggregations if agg not in SQL_AGGREGATIONS]
+    if unsupported:
+        raise ValueError(f"Phép tổng hợp không hỗ trợ trong SQL: {', '.join(unsupported)}")
+
+    selected = _metric_sql_columns(metrics)
+    expressions = [
+        f"{SQL_AGGREGATIONS[agg]}(o.{name})"
+        for name in selected.values() for agg in aggregations
+    ]
+    query = (
+        f"SELECT c.name, {', '.join(expressions)} FROM observations o "
+        f"JOIN cities c ON c.id = o.city_id WHERE {_CITY_FILTER} GROUP BY o.city_id"
+    )
+    rows = get_connection(db_path).execute(
+        query, (json.dumps(list(city_list), ensure_ascii=False),)
+    ).fetchall()
+
+    columns = pd.MultiIndex.from_product([list(selected), list(aggregations)])
+    summary = pd.DataFrame([row[1:] for row in rows], index=[row[0] for row in rows],
+                           columns=columns, dtype=np.float64)
+    for metric in selected:
+        if 'count' in aggregations:
+            summary[(metric, 'count')] = summary[(metric, 'count')].astype(np.int64)
+    summary.index.name = CITY_COLUMN
+    return summary
+
+
+def sync_from_files(city_list: Optional[List[str]] = None, db_path: Optional[str] = None) -> List[str]:
+    """
+    Nạp dữ liệu sạch hiện có (file) vào cơ sở dữ liệu.
+
+    Args:
+        city_list: Danh sách thành phố (None = tất cả)
+        db_path: Đường dẫn file cơ sở dữ liệu (mặc định: get_database_path())
+
+    Returns:
+        List[str]: Các thành phố đã được nạp
+    """
+    if city_list is None:
+        city_list = list(VIETNAM_CITIES.keys())
+
+    synced = []
+    for city in city_list:
+        if not processed_data_exists(city):
+            continue
+        write_city(load_processed_data(city), city, db_path)
+        synced.append(city)
+
+    log_success(f"Đã nạp {len(synced)} thành phố vào cơ sở dữ liệu", logger)
+    return synced
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Nạp dữ liệu sạch hiện có vào cơ sở dữ liệu SQLite")
+    parser.add_argument("--cities", nargs="+", help="Tên thành phố (mặc định: tất cả)")
+    args = parser.parse_args()
+
+    sync_from_files(args.cities)
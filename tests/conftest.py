@@ -0,0 +1,13 @@
+# tests/conftest.py
+"""
+Cấu hình chung cho pytest: thêm thư mục gốc dự án vào sys.path để import
+được package src và main.py khi chạy `pytest` từ bất kỳ thư mục nào.
+"""
+
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
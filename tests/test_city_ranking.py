@@ -0,0 +1,46 @@
+# tests/test_city_ranking.py
+"""
+Kiểm tra xếp hạng thành phố (get_city_ranking) khi bật cơ sở dữ liệu SQLite:
+thành phố chưa có trong cơ sở dữ liệu phải được đọc từ file dữ liệu sạch.
+"""
+
+import os
+
+import pandas as pd
+
+import src.multi_city_analyzer as analyzer
+import src.weather_db as weather_db
+from src.storage import write_frame
+
+
+def _clean_frame(city: str, temps: list) -> pd.DataFrame:
+    """Tạo DataFrame sạch tối thiểu (cột tiếng Việt) cho một thành phố"""
+    return pd.DataFrame({
+        'Thời Gian': pd.date_range('2025-01-01', periods=len(temps), freq='3h'),
+        'Nhiệt Độ': temps,
+        'Độ Ẩm': [70] * len(temps),
+        'Thành Phố': city,
+    })
+
+
+def test_ranking_reads_cities_missing_from_database(tmp_path, monkeypatch):
+    def processed_path(city, storage_format=None):
+        extension = {'parquet': '.parquet', 'feather': '.feather'}.get(storage_format, '.csv')
+        return os.path.join(tmp_path, f'weather_clean_{city}{extension}')
+    
+    monkeypatch.setattr(weather_db, 'get_database_path', lambda: str(tmp_path / 'weather.db'))
+    monkeypatch.setattr(analyzer, 'get_processed_data_path', processed_path)
+    monkeypatch.setattr(analyzer, 'WEATHER_DATABASE_ENABLED', True)
+    
+    # Hà Nội có trong cơ sở dữ liệu (và file), Đà Nẵng chỉ có file trên đĩa
+    hanoi = _clean_frame('Hà Nội', [20.0, 22.0, 24.0])
+    danang = _clean_frame('Đà Nẵng', [28.0, 30.0, 32.0])
+    weather_db.write_city(hanoi, 'Hà Nội')
+    write_frame(hanoi, processed_path('Hà Nội'))
+    write_frame(danang, processed_path('Đà Nẵng'))
+    
+    ranking = analyzer.get_city_ranking(['Hà Nội', 'Đà Nẵng'], 'Nhiệt Độ')
+    
+    assert ranking['Thành Phố'].tolist() == ['Đà Nẵng', 'Hà Nội']
+    assert ranking['Trung Bình'].tolist() == [30.0, 22.0]
+    assert ranking['Tối Đa'].tolist() == [32.0, 24.0]
@@ -0,0 +1,48 @@
+# tests/test_cleaning_memory.py
+"""
+Kiểm tra bộ nhớ đỉnh của các bước làm sạch (run_cleaning_steps với tracemalloc)
+nằm trong giới hạn CLEANING_MAX_MEMORY_RATIO lần kích thước đầu vào.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.column_names import RawColumns
+from src.constants import CLEANING_MAX_MEMORY_RATIO
+from src.data_cleaner import CLEANING_STEPS, run_cleaning_steps
+
+# Đủ lớn để khoản dư cố định CLEANING_MEMORY_ALLOWANCE_BYTES không đáng kể
+ROWS = 150_000
+
+
+def _synthetic_raw_frame(rows: int = ROWS) -> pd.DataFrame:
+    """Tạo DataFrame thô giả lập (mốc 3 giờ, vài giá trị thiếu và dòng trùng)"""
+    rng = np.random.default_rng(42)
+    times = pd.date_range("2020-01-01", periods=rows, freq="3h").strftime("%Y-%m-%d %H:%M:%S")
+    df = pd.DataFrame({
+        RawColumns.DT_TXT.value: times,
+        RawColumns.TEMP.value: rng.normal(27, 5, rows),
+        RawColumns.FEELS_LIKE.value: rng.normal(29, 5, rows),
+        RawColumns.HUMIDITY.value: rng.integers(30, 100, rows),
+        RawColumns.PRESSURE.value: rng.integers(990, 1030, rows),
+        RawColumns.WIND_SPEED.value: rng.uniform(0, 15, rows),
+        RawColumns.WIND_DEG.value: rng.integers(0, 360, rows),
+        RawColumns.CLOUDS.value: rng.integers(0, 100, rows),
+        RawColumns.VISIBILITY.value: rng.uniform(1000, 10000, rows),
+        RawColumns.DESCRIPTION.value: rng.choice(["mây rải rác", "mưa nhẹ", "trời quang"], rows),
+        RawColumns.CITY_NAME.value: "Hanoi",
+    })
+    df.loc[df.index[::97], RawColumns.TEMP.value] = np.nan
+    df.loc[df.index[::89], RawColumns.WIND_SPEED.value] = np.nan
+    return pd.concat([df, df.iloc[:1000]], ignore_index=True)
+
+
+def test_cleaning_peak_memory_within_ratio():
+    df = _synthetic_raw_frame()
+    
+    cleaned, report = run_cleaning_steps(df, measure_memory=True)
+    
+    assert len(cleaned) == ROWS
+    assert report['peak_bytes'] <= CLEANING_MAX_MEMORY_RATIO * report['input_bytes']
+    assert report['within_limit']
+    assert set(report['steps']) == {name for name, _ in CLEANING_STEPS}
@@ -0,0 +1,20 @@
+# tests/test_cli_args.py
+"""
+Kiểm tra parse tham số dòng lệnh của CLI (src.cli.build_parser).
+"""
+
+import pytest
+
+from src.cli import build_parser
+
+
+@pytest.mark.parametrize('value', ['0', '-5', 'abc'])
+def test_chunk_size_rejects_non_positive(value):
+    with pytest.raises(SystemExit) as exc_info:
+        build_parser().parse_args(['clean', f'--chunk-size={value}'])
+    assert exc_info.value.code == 2
+
+
+def test_chunk_size_accepts_positive():
+    args = build_parser().parse_args(['clean', '--chunk-size', '1000'])
+    assert args.chunk_size == 1000
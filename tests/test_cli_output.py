@@ -0,0 +1,29 @@
+# tests/test_cli_output.py
+"""
+Kiểm tra stdout của CLI (`python -m src ...`) chỉ chứa bản tóm tắt JSON, kể cả
+khi các biểu đồ được vẽ trên process con (log của process con phải ra stderr).
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_render_with_worker_processes_prints_only_json():
+    pytest.importorskip('matplotlib')
+    cities = ['Hà Nội', 'Đà Nẵng']
+    result = subprocess.run(
+        [sys.executable, '-m', 'src', 'render', '--cities', *cities, '--workers', '2'],
+        cwd=ROOT_DIR, capture_output=True, text=True, encoding='utf-8', timeout=300
+    )
+    
+    summary = json.loads(result.stdout)
+    assert summary['command'] == 'render'
+    assert summary['exit_code'] == result.returncode
+    assert list(summary['cities']) == cities
+    assert result.stderr  # log vẫn còn, chỉ chuyển sang stderr
@@ -0,0 +1,66 @@
+# tests/test_data_loader.py
+"""
+Kiểm tra parse response API (src.data_loader._parse_weather_data).
+"""
+
+import math
+
+from src.column_names import RawColumns
+from src.data_loader import _parse_weather_data
+
+
+def _record(hour: int, **main) -> dict:
+    """Tạo một bản ghi dự báo giống API OpenWeatherMap"""
+    return {
+        'dt_txt': f'2025-01-01 {hour:02d}:00:00',
+        'main': {'temp': 25.0 + hour, 'feels_like': 26.0, 'humidity': 70, 'pressure': 1010, **main},
+        'wind': {'speed': 3.5, 'deg': 90},
+        'clouds': {'all': 40},
+        'visibility': 10000,
+        'weather': [{'description': 'mây rải rác'}],
+    }
+
+
+def test_malformed_optional_fields_do_not_fail_city():
+    bad = _record(3, pressure='abc', feels_like='n/a')
+    bad['wind'] = {'speed': 'fast', 'deg': 'north'}
+    bad['visibility'] = 'far'
+    data = {'list': [_record(0), bad, _record(6)]}
+    
+    df = _parse_weather_data(data, 'Hà Nội')
+    
+    assert len(df) == 3
+    row = df.iloc[1]
+    assert math.isnan(row[RawColumns.PRESSURE.value])
+    assert math.isnan(row[RawColumns.WIND_DEG.value])
+    assert math.isnan(row[RawColumns.VISIBILITY.value])
+    assert row[RawColumns.WIND_SPEED.value] == 0
+    assert row[RawColumns.FEELS_LIKE.value] == row[RawColumns.TEMP.value]
+    assert df[RawColumns.PRESSURE.value].tolist()[::2] == [1010, 1010]
+
+
+def test_non_numeric_temperature_drops_only_that_record():
+    data = {'list': [_record(0), _record(3, temp='hot'), _record(6)]}
+    
+    df = _parse_weather_data(data, 'Hà Nội')
+    
+    assert df[RawColumns.DT_TXT.value].tolist() == ['2025-01-01 00:00:00', '2025-01-01 06:00:00']
+
+
+def test_retry_after_is_capped():
+    from email.utils import format_datetime
+    from datetime import datetime, timedelta, timezone
+    
+    from src.constants import API_RETRY_MAX_DELAY
+    from src.data_loader import _compute_backoff_delay
+    
+    assert _compute_backoff_delay(0, '3600') == API_RETRY_MAX_DELAY
+    assert 5 <= _compute_backoff_delay(0, '5') <= API_RETRY_MAX_DELAY
+    
+    in_an_hour = format_datetime(datetime.now(timezone.utc) + timedelta(hours=1), usegmt=True)
+    assert _compute_backoff_delay(0, in_an_hour) == API_RETRY_MAX_DELAY
+    in_ten_seconds = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=10), usegmt=True)
+    assert 8 <= _compute_backoff_delay(0, in_ten_seconds) <= 10
+    
+    # Giá trị không hợp lệ → chỉ dùng backoff
+    assert _compute_backoff_delay(0, 'soon') <= API_RETRY_MAX_DELAY
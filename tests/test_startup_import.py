@@ -0,0 +1,59 @@
+# tests/test_startup_import.py
+"""
+Kiểm tra thời gian import lúc khởi động GUI (`python -X importtime -c "import main"`):
+matplotlib, seaborn, PIL và requests phải được import khi dùng lần đầu, không phải
+lúc khởi động, và tổng thời gian import nằm trong ngân sách.
+"""
+
+import os
+import subprocess
+import sys
+from typing import Dict, Tuple
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Các package nặng không được import khi khởi động
+LAZY_PACKAGES = ('matplotlib', 'seaborn', 'PIL', 'requests')
+
+# Ngân sách thời gian import main (micro giây); hiện tại khoảng 500-670 ms,
+# trước khi import lười các package trên là 1.26-1.56 giây
+STARTUP_IMPORT_BUDGET_US = 1_200_000
+
+
+def _import_times(module: str) -> Dict[str, Tuple[int, int]]:
+    """
+    Chạy `python -X importtime -c "import <module>"` trong tiến trình con.
+    
+    Returns:
+        Dict[str, Tuple[int, int]]: {tên module: (self us, cumulative us)}
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT_DIR, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not self_us.strip().isdigit():
+            continue  # dòng tiêu đề
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def test_main_import_skips_heavy_packages_and_fits_budget():
+    pytest.importorskip('tkinter')
+    times = _import_times('main')
+    
+    heavy = sorted(name for name in times if name.split('.')[0] in LAZY_PACKAGES)
+    assert not heavy, f"import main kéo theo: {heavy}"
+    
+    total_us = times['main'][1]
+    assert total_us <= STARTUP_IMPORT_BUDGET_US, (
+        f"import main mất {total_us / 1000:.0f} ms > {STARTUP_IMPORT_BUDGET_US / 1000:.0f} ms"
+    )